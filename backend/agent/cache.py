@@ -0,0 +1,291 @@
+"""
+Response cache for agent reports.
+
+Reports are keyed by a canonical hash of the player data, the normalized
+user query, the model version and the prompt version, so a retrained model
+or an edited prompt never serves stale answers. Two interchangeable
+backends share one interface:
+- MemoryCache: in-process LRU with TTL
+- SQLiteCache: on-disk LRU with TTL, shared across workers and restarts
+
+Async callers use aget/aset, which keep SQLite I/O off the event loop.
+
+SingleFlight complements the cache for requests that arrive while the
+first identical one is still running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from backend.agent.prompts import PROMPT_VERSION
+from backend.ml.ingest import DATA_CACHE_DIR
+
+DEFAULT_TTL_SECONDS = 3600.0
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def normalize_query(query: str | None) -> str:
+    """Case- and whitespace-insensitive form of a user query."""
+    return " ".join((query or "").lower().split())
+
+
+def make_cache_key(
+    player_data: dict[str, Any],
+    query: str | None,
+    model_version: str | None,
+    prompt_version: str = PROMPT_VERSION,
+    prediction: dict[str, Any] | None = None,
+    force_llm: bool = False,
+) -> str:
+    """
+    Canonical SHA-256 fingerprint of everything that shapes an agent report,
+    including the prediction the report is built from (risk level and
+    probability rounded to 4 places) when the caller supplies one, and
+    whether the LLM was forced past routing.
+    """
+    if prediction is not None:
+        prediction = {
+            "risk_level": prediction.get("risk_level"),
+            "churn_probability": round(float(prediction.get("churn_probability", 0.0)), 4),
+        }
+    canonical = json.dumps(
+        {
+            "player": player_data,
+            "query": normalize_query(query),
+            "model": model_version,
+            "prompt": prompt_version,
+            "prediction": prediction,
+            "force_llm": bool(force_llm),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def to_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.stats.incr("expirations")
+                entry = None
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+        self.stats.incr("hits")
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.incr("evictions")
+        self.stats.incr("sets")
+
+    async def aget(self, key: str) -> Any | None:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            **self.stats.to_dict(),
+        }
+
+
+class SQLiteCache(MemoryCache):
+    """On-disk LRU cache with TTL; values are stored as JSON."""
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_agent_cache_accessed ON agent_cache(accessed_at)")
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM agent_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM agent_cache WHERE key = ?", (key,))
+                self.stats.incr("expirations")
+                row = None
+            if row is None:
+                self.stats.incr("misses")
+                return None
+            self._conn.execute("UPDATE agent_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.stats.incr("hits")
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO agent_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now + self.ttl, now),
+            )
+            overflow = self._count() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM agent_cache WHERE key IN ("
+                    " SELECT key FROM agent_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats.incr("evictions", overflow)
+        self.stats.incr("sets")
+
+    async def aget(self, key: str) -> Any | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM agent_cache")
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM agent_cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async calls that share a key.
+
+    The first caller starts the work as a task; callers arriving while it is
+    in flight await the same task instead of starting their own. The task is
+    shielded, so one caller disconnecting does not cancel it for the rest.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+def create_report_cache() -> MemoryCache | None:
+    """
+    Build the report cache configured by environment variables:
+    AGENT_CACHE_BACKEND (memory / sqlite / off), AGENT_CACHE_TTL_SECONDS,
+    AGENT_CACHE_MAX_ENTRIES and AGENT_CACHE_PATH (sqlite only; defaults to
+    DATA_CACHE_DIR so the database never lands in the source tree).
+    """
+    backend = os.getenv("AGENT_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("AGENT_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS)))
+    max_entries = int(os.getenv("AGENT_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+
+    if backend in ("off", "none", ""):
+        return None
+    if backend == "sqlite":
+        default_path = os.path.join(DATA_CACHE_DIR, "agent_cache.sqlite3")
+        return SQLiteCache(os.getenv("AGENT_CACHE_PATH", default_path), max_entries=max_entries, ttl=ttl)
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    raise ValueError(f"Unknown AGENT_CACHE_BACKEND: {backend!r}")
@@ -0,0 +1,142 @@
+"""
+Prompt compiler for the agent workflow.
+
+Renders prompt sections as compact JSON, estimates their token cost,
+trims low-priority sections to fit a token budget, and keeps per-node
+token and latency statistics for the LLM calls made with them.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+# Prompt token budget per LLM call (0 disables trimming)
+PROMPT_TOKEN_BUDGET = int(os.getenv("AGENT_PROMPT_TOKEN_BUDGET", "3000"))
+
+# Rough characters-per-token ratio for English text and JSON with Llama-family
+# tokenizers; good enough for budgeting without shipping a tokenizer
+CHARS_PER_TOKEN = 4.0
+
+
+def compact_json(value: Any) -> str:
+    """Serialize without indentation or padding whitespace."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class PromptSection:
+    """
+    One placeholder of a prompt template.
+
+    Lower priority sections are trimmed first: lists lose trailing items,
+    anything else is dropped entirely. Required sections are never trimmed.
+    """
+
+    name: str
+    value: Any
+    priority: int = 0
+    required: bool = False
+
+    def render(self) -> str:
+        return self.value if isinstance(self.value, str) else compact_json(self.value)
+
+
+@dataclass
+class CompiledPrompt:
+    text: str
+    tokens: int
+    trimmed: list[str]
+
+
+def compile_prompt(template: str, sections: list[PromptSection], budget: int | None = None) -> CompiledPrompt:
+    """Render `template` with compact sections, trimming to `budget` tokens if needed."""
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    sections = [PromptSection(s.name, s.value, s.priority, s.required) for s in sections]
+    trimmed: list[str] = []
+
+    def render() -> str:
+        return template.format(**{section.name: section.render() for section in sections})
+
+    text = render()
+    tokens = estimate_tokens(text)
+    trimmable = sorted((s for s in sections if not s.required), key=lambda s: s.priority)
+
+    while budget and tokens > budget and trimmable:
+        section = trimmable[0]
+        if isinstance(section.value, list) and len(section.value) > 1:
+            section.value = section.value[:-1]
+        else:
+            section.value = [] if isinstance(section.value, list) else "(omitted)"
+            trimmable.pop(0)
+        if section.name not in trimmed:
+            trimmed.append(section.name)
+        text = render()
+        tokens = estimate_tokens(text)
+
+    return CompiledPrompt(text=text, tokens=tokens, trimmed=trimmed)
+
+
+class PromptStats:
+    """Thread-safe per-node counters for LLM prompt size, completion size and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: dict[str, dict[str, float]] = {}
+
+    def record(
+        self,
+        node: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency: float,
+        trimmed: bool = False,
+        failed: bool = False,
+    ) -> None:
+        with self._lock:
+            stats = self._nodes.setdefault(node, {
+                "calls": 0, "failures": 0, "trimmed": 0,
+                "prompt_tokens": 0, "completion_tokens": 0,
+                "max_prompt_tokens": 0, "latency_seconds": 0.0, "max_latency_seconds": 0.0,
+            })
+            stats["calls"] += 1
+            stats["failures"] += int(failed)
+            stats["trimmed"] += int(trimmed)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], prompt_tokens)
+            stats["latency_seconds"] += latency
+            stats["max_latency_seconds"] = max(stats["max_latency_seconds"], latency)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            report = {}
+            for node, stats in self._nodes.items():
+                calls = stats["calls"] or 1
+                report[node] = {
+                    "calls": stats["calls"],
+                    "failures": stats["failures"],
+                    "trimmed": stats["trimmed"],
+                    "prompt_tokens": stats["prompt_tokens"],
+                    "completion_tokens": stats["completion_tokens"],
+                    "avg_prompt_tokens": round(stats["prompt_tokens"] / calls, 1),
+                    "max_prompt_tokens": stats["max_prompt_tokens"],
+                    "avg_latency_ms": round(1000.0 * stats["latency_seconds"] / calls, 1),
+                    "max_latency_ms": round(1000.0 * stats["max_latency_seconds"], 1),
+                }
+            return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+
+
+PROMPT_STATS = PromptStats()
@@ -1,3 +1,6 @@
+# Bump whenever a template below changes so cached agent reports are not reused
+PROMPT_VERSION = "2"
+
 ANALYSIS_PROMPT_TEMPLATE = """
 You are a highly skilled gaming retention analyst.
 Given the player data and ML prediction below, explain why this player may churn.
@@ -63,3 +66,32 @@ Rules:
 - Do not invent URLs or citations.
 - Include ethical disclaimers about AI-generated predictions and player data privacy.
 """
+
+COHORT_REPORT_PROMPT_TEMPLATE = """
+You are creating churn-risk reports for a cohort of players in a gaming analytics product.
+
+User question (applies to every player): {user_query}
+
+Players (JSON array; each entry has an "id", the player data, the ML prediction
+and locally derived risk factors):
+{players}
+
+Return a valid JSON array with exactly one object per player, in any order, each with this shape:
+[
+  {{
+    "id": <the player's id>,
+    "direct_answer_to_user": "Short answer to the User question for this player",
+    "executive_summary": "2-3 sentence overview",
+    "engagement_analysis": "clear explanation",
+    "key_risk_factors": ["factor 1", "factor 2"],
+    "personalized_strategies": ["strategy 1", "strategy 2", "strategy 3"],
+    "confidence_level": "high" | "medium" | "low"
+  }}
+]
+
+Rules:
+- Treat every player independently and keep each report grounded in that player's data.
+- Copy each "id" exactly; do not skip, merge or invent players.
+- Do not invent URLs or citations.
+- Return only the JSON array.
+"""
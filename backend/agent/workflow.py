@@ -13,16 +13,31 @@ The module is intentionally resilient:
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
 import json
 import logging
 import os
-from typing import Any, TypedDict
-
-import pandas as pd
-
-from backend.agent.prompts import ANALYSIS_PROMPT_TEMPLATE, REPORT_PROMPT_TEMPLATE
-from backend.ml.feature_engineering import run_feature_engineering
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Any, TypedDict, get_args, get_origin, get_type_hints
+
+from backend.agent.prompt_compiler import (
+    PROMPT_STATS,
+    CompiledPrompt,
+    PromptSection,
+    compile_prompt,
+    estimate_tokens,
+)
+from backend.agent.prompts import (
+    ANALYSIS_PROMPT_TEMPLATE,
+    COHORT_REPORT_PROMPT_TEMPLATE,
+    REPORT_PROMPT_TEMPLATE,
+)
+from backend.ml.feature_engineering import FEATURE_PLAN
 from backend.ml.predict import predict_single
+from backend.ml.rules import RULES, rule_row
 
 try:
     from dotenv import load_dotenv
@@ -32,6 +47,7 @@ except ImportError:  # pragma: no cover - optional dependency at runtime
 
 
 try:
+    from langchain_core.runnables import RunnableLambda
     from langgraph.graph import END, StateGraph
 except ImportError:  # pragma: no cover - optional dependency at runtime
     END = "__END__"
@@ -48,6 +64,21 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Per-call LLM timeout (seconds) and client-side retries
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+
+# Cohort reports: players packed into one LLM prompt, and prompts in flight at once
+COHORT_CHUNK_SIZE = int(os.getenv("AGENT_COHORT_CHUNK_SIZE", "20"))
+COHORT_MAX_CONCURRENCY = int(os.getenv("AGENT_COHORT_MAX_CONCURRENCY", "4"))
+
+# Routing: skip the LLM for LOW-risk requests without a query whose churn
+# probability is clearly below the MEDIUM cutoff (0.4)
+ROUTING_ENABLED = os.getenv("AGENT_ROUTING_ENABLED", "1").lower() in ("1", "true", "yes")
+ROUTE_LOW_RISK_MAX_PROBABILITY = float(os.getenv("AGENT_ROUTE_LOW_RISK_MAX_PROBABILITY", "0.3"))
+
+DEFAULT_COHORT_QUERY = "What are this player's main churn risks and the best retention actions?"
+
 def get_dynamic_query(risk_level: str) -> str:
     if risk_level == "HIGH":
         return "This player is at high risk of churning. What are the critical warning signs, and what immediate, personalized actions can we take to save them?"
@@ -55,10 +86,21 @@ def get_dynamic_query(risk_level: str) -> str:
         return "This player shows some signs of disengagement. Why might they be losing momentum, and how can we proactively re-engage them?"
     return "This player is currently engaged. What are their strongest retention drivers, and how can we reward their loyalty?"
 
+# Where streamed LLM tokens go during ChurnAgent.astream (None when not streaming)
+_token_sink: contextvars.ContextVar = contextvars.ContextVar("agent_token_sink", default=None)
+
+
+def _merge_dicts(left: dict | None, right: dict | None) -> dict:
+    """State reducer: combine updates written by nodes that ran concurrently."""
+    return {**(left or {}), **(right or {})}
+
+
 class AgentState(TypedDict, total=False):
     player_data: dict[str, Any]
     user_query: str
     ml_prediction: dict[str, Any]
+    feature_snapshot: dict[str, Any]
+    player_context: PlayerContext
     engagement_analysis: str
     key_risk_factors: list[str]
     industry_best_practices: list[str]
@@ -67,22 +109,72 @@ class AgentState(TypedDict, total=False):
     confidence_level: str
     final_report: dict[str, Any]
     warnings: list[str]
+    degraded: bool
+    route: dict[str, Any]
+    force_llm: bool
+    node_timings: Annotated[dict[str, float], _merge_dicts]
+
+
+@functools.lru_cache(maxsize=None)
+def _state_reducers() -> dict[str, Any]:
+    # AgentState is fixed at import time, so resolve its type hints once
+    hints = get_type_hints(AgentState, include_extras=True)
+    return {key: get_args(hint)[1] for key, hint in hints.items() if get_origin(hint) is Annotated}
+
+
+def _apply_update(state: AgentState, update: AgentState | None) -> None:
+    """Merge a node update into state, honouring AgentState's reducers."""
+    reducers = _state_reducers()
+    for key, value in (update or {}).items():
+        state[key] = reducers[key](state.get(key), value) if key in reducers else value
 
 
 class SequentialWorkflow:
-    """Fallback workflow used when LangGraph is unavailable."""
+    """
+    Fallback workflow used when LangGraph is unavailable.
+
+    Runs stages in order; the steps within one stage are independent and
+    run concurrently (threads for invoke, tasks for ainvoke), each seeing
+    the state as it was when the stage started.
+    """
 
-    def __init__(self, steps: list):
-        self.steps = steps
+    def __init__(self, stages: list[list[tuple[str, Any, Any]]]):
+        self.stages = stages
 
     def invoke(self, state: AgentState) -> AgentState:
         current_state = dict(state)
-        for step in self.steps:
-            updates = step(current_state)
-            if updates:
-                current_state.update(updates)
+        for stage in self.stages:
+            if len(stage) == 1:
+                updates = [stage[0][1](current_state)]
+            else:
+                snapshot = dict(current_state)
+                with ThreadPoolExecutor(max_workers=len(stage)) as pool:
+                    updates = list(pool.map(lambda step: step[1](snapshot), stage))
+            for update in updates:
+                _apply_update(current_state, update)
         return current_state
 
+    async def ainvoke(self, state: AgentState) -> AgentState:
+        current_state = dict(state)
+        async for chunk in self.astream(current_state):
+            for update in chunk.values():
+                _apply_update(current_state, update)
+        return current_state
+
+    async def astream(self, state: AgentState, stream_mode: str = "updates"):
+        """Yield {step name: update} as each step finishes, like LangGraph's "updates" mode."""
+        current_state = dict(state)
+        for stage in self.stages:
+            snapshot = dict(current_state)
+
+            async def run(name: str, step: Any) -> tuple[str, AgentState]:
+                return name, await step(snapshot)
+
+            for finished in asyncio.as_completed([run(name, step) for name, _, step in stage]):
+                name, update = await finished
+                _apply_update(current_state, update)
+                yield {name: update or {}}
+
 
 def _safe_json_loads(raw_text: str) -> dict[str, Any] | list[Any] | None:
     if not raw_text:
@@ -101,6 +193,61 @@ def _safe_json_loads(raw_text: str) -> dict[str, Any] | list[Any] | None:
     return None
 
 
+def _safe_json_array_loads(raw_text: str) -> list[Any] | None:
+    if not raw_text:
+        return None
+
+    try:
+        parsed = json.loads(raw_text)
+    except json.JSONDecodeError:
+        start = raw_text.find("[")
+        end = raw_text.rfind("]")
+        if start == -1 or end <= start:
+            return None
+        try:
+            parsed = json.loads(raw_text[start : end + 1])
+        except json.JSONDecodeError:
+            return None
+    return parsed if isinstance(parsed, list) else None
+
+
+def _string_list(payload: dict[str, Any], key: str, default: list[Any]) -> list[str]:
+    """Return payload[key] as up to five strings; a non-list value is malformed."""
+    value = payload.get(key, default)
+    if not isinstance(value, list):
+        raise ValueError(f"LLM report field {key!r} is not a list")
+    return [str(item) for item in value][:5]
+
+
+def route_request(
+    prediction: dict[str, Any],
+    user_query: str | None,
+    llm_available: bool = True,
+    force_llm: bool = False,
+) -> dict[str, Any]:
+    """
+    Decide whether the LLM adds value for this request.
+
+    Returns {"use_llm": bool, "reason": str}. Only clear-cut LOW-risk
+    requests without a user question skip the LLM; anything with a
+    question, elevated risk or a probability near the MEDIUM cutoff keeps it.
+    force_llm (an explicit "Ask Agent" request) always keeps it.
+    """
+    if not llm_available:
+        return {"use_llm": False, "reason": "llm_unavailable"}
+    if force_llm:
+        return {"use_llm": True, "reason": "requested"}
+    if not ROUTING_ENABLED:
+        return {"use_llm": True, "reason": "routing_disabled"}
+    if user_query and user_query.strip():
+        return {"use_llm": True, "reason": "user_query"}
+    if prediction["risk_level"] != "LOW":
+        return {"use_llm": True, "reason": "elevated_risk"}
+    if prediction["churn_probability"] > ROUTE_LOW_RISK_MAX_PROBABILITY:
+        return {"use_llm": True, "reason": "borderline_low_risk"}
+    return {"use_llm": False, "reason": "clear_low_risk"}
+
+
 def _normalize_risk_level(risk_level: str) -> str:
     return (risk_level or "MEDIUM").upper()
 
@@ -111,64 +258,64 @@ def _normalize_prediction(prediction: dict[str, Any]) -> dict[str, Any]:
 
     return {
         "churn_probability": round(churn_probability, 4),
-        "will_churn": bool(prediction.get("churned", churn_probability >= 0.5)),
+        "will_churn": bool(
+            prediction.get("churned", prediction.get("will_churn", churn_probability >= 0.5))
+        ),
         "risk_level": risk_level,
     }
 
 
 def _build_feature_snapshot(player_data: dict[str, Any]) -> dict[str, float]:
-    engineered = run_feature_engineering(pd.DataFrame([player_data]))
-    row = engineered.iloc[0]
+    engineered = FEATURE_PLAN.scalar(player_data)
     return {
-        "EngagementScore": round(float(row["EngagementScore"]), 2),
-        "ProgressionRate": round(float(row["ProgressionRate"]), 2),
-        "PurchaseFrequency": round(float(row["PurchaseFrequency"]), 2),
-        "IsInactive": int(row["IsInactive"]),
-        "SessionConsistency": int(row["SessionConsistency"]),
+        feature.name: (
+            int(engineered[feature.name])
+            if feature.dtype is int
+            else round(float(engineered[feature.name]), 2)
+        )
+        for feature in FEATURE_PLAN.features
     }
 
 
-def _derive_risk_factors(player_data: dict[str, Any], prediction: dict[str, Any]) -> list[str]:
-    factors: list[str] = []
-    engineered = _build_feature_snapshot(player_data)
-
-    if player_data.get("SessionsPerWeek", 0) <= 2:
-        factors.append("Player is highly inactive with two or fewer sessions per week.")
-    elif player_data.get("SessionsPerWeek", 0) <= 4:
-        factors.append("Session frequency is below the healthy engagement range.")
-
-    if player_data.get("AvgSessionDurationMinutes", 0) < 35:
-        factors.append("Average session duration is short, which suggests weak gameplay stickiness.")
-
-    if player_data.get("PlayerLevel", 0) < 15 and player_data.get("PlayTimeHours", 0) >= 5:
-        factors.append("Progression is slow relative to play time, which may indicate friction or boredom.")
+class PlayerContext(TypedDict):
+    """
+    Per-request heuristic facts, computed once in predict_node and shared by
+    every fallback helper: engineered features, the rule-table conditions
+    the player meets, and the risk factors, best practices and strategies
+    those conditions fire.
+    """
 
-    if player_data.get("AchievementsUnlocked", 0) <= 3:
-        factors.append("Achievement activity is low, suggesting limited motivation or milestone completion.")
+    feature_snapshot: dict[str, Any]
+    signals: dict[str, bool]
+    risk_factors: list[str]
+    best_practices: list[str]
+    strategies: list[str]
 
-    if player_data.get("InGamePurchases", 0) == 0:
-        factors.append("No purchase activity is a weak monetization and commitment signal.")
 
-    if engineered["IsInactive"] == 1:
-        factors.append("Engineered inactivity flag is triggered by the current behavior pattern.")
+# Rule sets from the shared rule table that make up a player context
+CONTEXT_RULE_SETS = ("risk_factors", "best_practices", "strategies")
 
-    if engineered["SessionConsistency"] == 0:
-        factors.append("Session consistency is low, which often appears before churn.")
 
-    if prediction["risk_level"] == "HIGH" and not factors:
-        factors.append("The model predicts high churn risk based on the overall feature pattern.")
-    elif not factors:
-        factors.append(
-            "No major churn signals are present right now, but retention still depends on maintaining session consistency and progression momentum."
-        )
-
-    return factors[:5]
+def build_player_context(
+    player_data: dict[str, Any],
+    prediction: dict[str, Any],
+    snapshot: dict[str, Any] | None = None,
+) -> PlayerContext:
+    snapshot = snapshot or _build_feature_snapshot(player_data)
+    signals = RULES.signals(rule_row(player_data, prediction["risk_level"], snapshot), CONTEXT_RULE_SETS)
+    return {
+        "feature_snapshot": snapshot,
+        "signals": signals,
+        "risk_factors": RULES["risk_factors"].apply(signals),
+        "best_practices": RULES["best_practices"].apply(signals),
+        "strategies": RULES["strategies"].apply(signals),
+    }
 
 
-def _fallback_analysis(player_data: dict[str, Any], prediction: dict[str, Any]) -> tuple[str, list[str], str]:
-    factors = _derive_risk_factors(player_data, prediction)
+def _fallback_analysis(prediction: dict[str, Any], context: PlayerContext) -> tuple[str, list[str], str]:
+    factors = context["risk_factors"]
     risk_level = prediction["risk_level"].lower()
-    
+
     if prediction["risk_level"] in ("HIGH", "MEDIUM"):
         momentum_text = "These indicators suggest the player may be losing momentum unless the game provides a short-term reason to return."
     else:
@@ -183,71 +330,7 @@ def _fallback_analysis(player_data: dict[str, Any], prediction: dict[str, Any])
     )
 
     confidence = "high" if prediction["risk_level"] == "HIGH" else "medium"
-    return analysis, factors, confidence
-
-
-def _local_best_practices(player_data: dict[str, Any], prediction: dict[str, Any]) -> list[str]:
-    practices: list[str] = []
-    genre = str(player_data.get("GameGenre", "game")).lower()
-
-    if prediction["risk_level"] == "HIGH":
-        practices.append(
-            "High-risk players respond best to fast re-engagement loops such as comeback rewards and short-term goals."
-        )
-    if player_data.get("SessionsPerWeek", 0) <= 2:
-        practices.append(
-            "Low-frequency players are easier to recover when the next session offers immediate progress with minimal friction."
-        )
-    if player_data.get("AchievementsUnlocked", 0) <= 3:
-        practices.append(
-            "Visible milestone systems and easy wins help rebuild momentum when achievement activity is low."
-        )
-    if player_data.get("InGamePurchases", 0) == 0:
-        practices.append(
-            "Non-paying players should see value-first offers or gameplay benefits before any strong monetization push."
-        )
-    if genre in {"strategy", "rpg"}:
-        practices.append(
-            f"For {genre} players, guided progression and clearer medium-term goals usually outperform generic promotional messaging."
-        )
-
-    if not practices:
-        practices.append(
-            "Healthy players are usually retained through consistent progression, fresh content, and timely milestone rewards."
-        )
-
-    return practices[:5]
-
-
-def _fallback_personalized_strategies(
-    player_data: dict[str, Any],
-    prediction: dict[str, Any],
-    risk_factors: list[str],
-) -> list[str]:
-    strategies: list[str] = []
-
-    if player_data.get("SessionsPerWeek", 0) <= 2:
-        strategies.append("Send a comeback notification with a time-limited reward in the next 24 to 48 hours.")
-
-    if player_data.get("PlayerLevel", 0) < 15:
-        strategies.append("Create a short progression mission that helps the player reach the next meaningful level quickly.")
-
-    if player_data.get("AchievementsUnlocked", 0) <= 3:
-        strategies.append("Surface easy-to-complete achievements so the player gets a fast sense of progress.")
-
-    if player_data.get("InGamePurchases", 0) == 0:
-        strategies.append("Offer a starter bundle or beginner-friendly value pack instead of a generic store promotion.")
-
-    if player_data.get("AvgSessionDurationMinutes", 0) < 35:
-        strategies.append("Reduce early-session friction with a focused mission, bonus XP, or guided challenge.")
-
-    if not strategies:
-        strategies.append("Keep the player engaged with fresh content, milestone rewards, and social invitations.")
-
-    if prediction["risk_level"] == "HIGH":
-        strategies.append("Prioritize this player for immediate re-engagement because the model flags a high churn likelihood.")
-
-    return strategies[:5]
+    return analysis, list(factors), confidence
 
 
 def _get_disclaimers() -> list[str]:
@@ -270,7 +353,12 @@ def _get_sources() -> list[str]:
     ]
 
 
-def _build_query_focused_answer(user_query: str | None, player_data: dict[str, Any], prediction: dict[str, Any]) -> str:
+def _build_query_focused_answer(
+    user_query: str | None,
+    player_data: dict[str, Any],
+    prediction: dict[str, Any],
+    context: PlayerContext,
+) -> str:
     """Generate a focused answer that directly addresses the user's question using heuristics."""
     if not user_query or not user_query.strip():
         return ""
@@ -281,7 +369,7 @@ def _build_query_focused_answer(user_query: str | None, player_data: dict[str, A
 
     # Detect common question intents and produce tailored answers
     if any(w in query_lower for w in ["why", "reason", "cause", "factor"]):
-        factors = _derive_risk_factors(player_data, prediction)
+        factors = context["risk_factors"]
         factors_text = " ".join(factors)
         return (
             f"Based on the player profile, the model predicts a {prob:.1%} churn probability ({risk_level} risk). "
@@ -289,7 +377,7 @@ def _build_query_focused_answer(user_query: str | None, player_data: dict[str, A
         )
 
     if any(w in query_lower for w in ["how", "save", "retain", "keep", "prevent", "reduce", "improve", "strategy", "action", "recommend"]):
-        strategies = _fallback_personalized_strategies(player_data, prediction, [])
+        strategies = context["strategies"]
         strategies_text = " ".join(f"({i+1}) {s}" for i, s in enumerate(strategies))
         return (
             f"To address this player's {risk_level.lower()} churn risk ({prob:.1%} probability), "
@@ -297,7 +385,7 @@ def _build_query_focused_answer(user_query: str | None, player_data: dict[str, A
         )
 
     if any(w in query_lower for w in ["engagement", "session", "active", "inactive", "behavior", "behaviour", "pattern"]):
-        snapshot = _build_feature_snapshot(player_data)
+        snapshot = context["feature_snapshot"]
         return (
             f"This player's engagement profile shows: Engagement Score = {snapshot['EngagementScore']}, "
             f"Progression Rate = {snapshot['ProgressionRate']}, Session Consistency = {'Yes' if snapshot['SessionConsistency'] else 'No'}, "
@@ -315,7 +403,7 @@ def _build_query_focused_answer(user_query: str | None, player_data: dict[str, A
         )
 
     # Generic fallback that still incorporates the query
-    factors = _derive_risk_factors(player_data, prediction)
+    factors = context["risk_factors"]
     return (
         f"Regarding your question about this player: The model assigns a {prob:.1%} churn probability ({risk_level} risk). "
         f"Key observations: {' '.join(factors[:3])}"
@@ -323,9 +411,8 @@ def _build_query_focused_answer(user_query: str | None, player_data: dict[str, A
 
 
 def _fallback_report(state: AgentState) -> dict[str, Any]:
-    best_practices = state.get("industry_best_practices") or _local_best_practices(
-        state["player_data"], state["ml_prediction"]
-    )
+    context = state["player_context"]
+    best_practices = state.get("industry_best_practices") or context["best_practices"]
 
     risk_level = state["ml_prediction"]["risk_level"].lower()
     prob = state["ml_prediction"]["churn_probability"]
@@ -340,7 +427,7 @@ def _fallback_report(state: AgentState) -> dict[str, Any]:
     # Build a query-focused direct answer when a user question is present
     user_query = state.get("user_query")
     direct_answer = _build_query_focused_answer(
-        user_query, state["player_data"], state["ml_prediction"]
+        user_query, state["player_data"], state["ml_prediction"], context
     )
 
     return {
@@ -360,187 +447,560 @@ def _fallback_report(state: AgentState) -> dict[str, Any]:
     }
 
 
+def _invoke_with_timeout(llm: Any, prompt: str, timeout: float) -> Any:
+    """
+    Call llm.invoke on a helper thread and wait at most timeout seconds,
+    mirroring asyncio.wait_for on the async path. A hung provider then ties
+    up only the helper thread; the caller gets TimeoutError and falls back.
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-call")
+    try:
+        return pool.submit(llm.invoke, prompt).result(timeout=timeout)
+    finally:
+        pool.shutdown(wait=False)
+
+
+def _timed(name: str, step: Any) -> Any:
+    """Wrap a node so its update records how long it ran (ms) in node_timings."""
+    def run(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        update = step(state) or {}
+        return {**update, "node_timings": {name: round(1000.0 * (time.perf_counter() - started), 3)}}
+    return run
+
+
+def _atimed(name: str, step: Any) -> Any:
+    async def run(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        update = await step(state) or {}
+        return {**update, "node_timings": {name: round(1000.0 * (time.perf_counter() - started), 3)}}
+    return run
+
+
 class ChurnAgent:
-    def __init__(self, llm: Any | None = None):
+    def __init__(self, llm: Any | None = None, llm_timeout: float | None = None):
         self.llm = llm
+        self.llm_timeout = LLM_TIMEOUT_SECONDS if llm_timeout is None else llm_timeout
         self.app = self._compile_workflow()
 
-    def invoke(self, state: AgentState) -> AgentState:
+    def _initial_state(self, state: AgentState) -> AgentState:
         initial_state: AgentState = {
             "player_data": state["player_data"],
             "user_query": state.get("user_query"),
             "warnings": list(state.get("warnings", [])),
         }
-        return self.app.invoke(initial_state)
+        for key in ("ml_prediction", "feature_snapshot", "force_llm"):
+            if state.get(key) is not None:
+                initial_state[key] = state[key]
+        return initial_state
+
+    def invoke(self, state: AgentState) -> AgentState:
+        """
+        Run the workflow for one player.
+
+        Callers that have already scored the player can pass `ml_prediction`
+        (and optionally `feature_snapshot`) so the predict step reuses them
+        instead of running inference again.
+        """
+        return self.app.invoke(self._initial_state(state))
+
+    async def ainvoke(self, state: AgentState) -> AgentState:
+        """Async variant of invoke; LLM calls are awaited instead of blocking a thread."""
+        return await self.app.ainvoke(self._initial_state(state))
+
+    async def astream(self, state: AgentState):
+        """
+        Run the workflow and yield events as they happen:
+        - {"event": "node", "node": name, "update": {...}} when a node finishes
+        - {"event": "token", "node": name, "text": "..."} for each LLM chunk
+        - {"event": "done", "state": {...}} with the final state
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def run_graph() -> None:
+            initial_state = self._initial_state(state)
+            final_state = dict(initial_state)
+            try:
+                async for chunk in self.app.astream(initial_state, stream_mode="updates"):
+                    for node, update in chunk.items():
+                        _apply_update(final_state, update)
+                        events.put_nowait({"event": "node", "node": node, "update": update or {}})
+                events.put_nowait({"event": "done", "state": final_state})
+            except Exception as exc:
+                events.put_nowait({"event": "error", "error": str(exc)})
+            finally:
+                events.put_nowait(done)
+
+        token = _token_sink.set(events.put_nowait)
+        try:
+            task = asyncio.ensure_future(run_graph())
+        finally:
+            _token_sink.reset(token)
+
+        try:
+            while (event := await events.get()) is not done:
+                yield event
+        finally:
+            task.cancel()
 
     def _compile_workflow(self):
+        # analyze and research only need the prediction, so they fan out
+        # after predict and join before generate_report
+        stages = [
+            [("predict", self.predict_node, self.apredict_node)],
+            [
+                ("analyze", self.analyze_node, self.aanalyze_node),
+                ("research", self.research_node, self.aresearch_node),
+            ],
+            [("generate_report", self.generate_report_node, self.agenerate_report_node)],
+        ]
+        stages = [
+            [(name, _timed(name, sync_step), _atimed(name, async_step)) for name, sync_step, async_step in stage]
+            for stage in stages
+        ]
+
         if StateGraph is None:
             logger.warning("LangGraph is not installed. Falling back to sequential workflow.")
-            return SequentialWorkflow(
-                [
-                    self.predict_node,
-                    self.analyze_node,
-                    self.research_node,
-                    self.generate_report_node,
-                ]
-            )
+            return SequentialWorkflow(stages)
 
         workflow = StateGraph(AgentState)
-        workflow.add_node("predict", self.predict_node)
-        workflow.add_node("analyze", self.analyze_node)
-        workflow.add_node("research", self.research_node)
-        workflow.add_node("generate_report", self.generate_report_node)
+        for stage in stages:
+            for name, sync_step, async_step in stage:
+                workflow.add_node(name, RunnableLambda(sync_step, afunc=async_step, name=name))
         workflow.set_entry_point("predict")
         workflow.add_edge("predict", "analyze")
-        workflow.add_edge("analyze", "research")
-        workflow.add_edge("research", "generate_report")
+        workflow.add_edge("predict", "research")
+        workflow.add_edge(["analyze", "research"], "generate_report")
         workflow.add_edge("generate_report", END)
         return workflow.compile()
 
+    @staticmethod
+    def _record_llm_call(node: str, prompt: CompiledPrompt, response: Any, started: float) -> str:
+        """Record token/latency stats for one LLM call and return its text."""
+        latency = time.perf_counter() - started
+        if response is None:
+            PROMPT_STATS.record(node, prompt.tokens, 0, latency, bool(prompt.trimmed), failed=True)
+            return ""
+        content = getattr(response, "content", "")
+        # Prefer the provider's usage numbers; fall back to the estimate
+        usage = getattr(response, "usage_metadata", None) or {}
+        PROMPT_STATS.record(
+            node,
+            usage.get("input_tokens", prompt.tokens),
+            usage.get("output_tokens", estimate_tokens(content)),
+            latency,
+            bool(prompt.trimmed),
+        )
+        return content
+
+    def _call_llm(self, node: str, prompt: CompiledPrompt) -> str:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = _invoke_with_timeout(self.llm, prompt.text, self.llm_timeout)
+        finally:
+            content = self._record_llm_call(node, prompt, response, started)
+        return content
+
+    async def _acall_llm(self, node: str, prompt: CompiledPrompt) -> str:
+        started = time.perf_counter()
+        response = None
+        sink = _token_sink.get()
+        try:
+            if sink is not None and hasattr(self.llm, "astream"):
+                response = await asyncio.wait_for(self._astream_llm(node, prompt, sink), timeout=self.llm_timeout)
+            else:
+                response = await asyncio.wait_for(self.llm.ainvoke(prompt.text), timeout=self.llm_timeout)
+        finally:
+            content = self._record_llm_call(node, prompt, response, started)
+        return content
+
+    async def _astream_llm(self, node: str, prompt: CompiledPrompt, sink) -> Any:
+        """Stream an LLM call, forwarding each chunk to the sink; returns the merged message."""
+        merged = None
+        async for chunk in self.llm.astream(prompt.text):
+            text = getattr(chunk, "content", "")
+            if text:
+                sink({"event": "token", "node": node, "text": text})
+            merged = chunk if merged is None else merged + chunk
+        return merged
+
     def predict_node(self, state: AgentState) -> AgentState:
         logger.info("Agent step: predict")
-        prediction = predict_single(state["player_data"])
+        prediction = state.get("ml_prediction")
+        if prediction is None:
+            prediction = predict_single(state["player_data"])
+        snapshot = state.get("feature_snapshot") or _build_feature_snapshot(state["player_data"])
         normalized = _normalize_prediction(prediction)
-        return {"ml_prediction": normalized}
+        return {
+            "ml_prediction": normalized,
+            "feature_snapshot": snapshot,
+            "player_context": build_player_context(state["player_data"], normalized, snapshot),
+            "route": route_request(
+                normalized, state.get("user_query"), self.llm is not None, state.get("force_llm", False)
+            ),
+        }
+
+    def _uses_llm(self, state: AgentState) -> bool:
+        return self.llm is not None and state.get("route", {}).get("use_llm", True)
+
+    async def apredict_node(self, state: AgentState) -> AgentState:
+        if state.get("ml_prediction") is None:
+            # predict_single runs the model; keep it off the event loop
+            return await asyncio.to_thread(self.predict_node, state)
+        return self.predict_node(state)
+
+    def _fallback_analysis_update(
+        self,
+        state: AgentState,
+        warning: str | None = None,
+        degraded: bool = False,
+    ) -> AgentState:
+        analysis, factors, confidence = _fallback_analysis(state["ml_prediction"], state["player_context"])
+        warnings = list(state.get("warnings", []))
+        if warning:
+            warnings.append(warning)
+        update: AgentState = {
+            "engagement_analysis": analysis,
+            "key_risk_factors": factors,
+            "confidence_level": confidence,
+            "warnings": warnings,
+        }
+        if degraded:
+            update["degraded"] = True
+        return update
+
+    def _analysis_prompt(self, state: AgentState) -> CompiledPrompt:
+        return compile_prompt(ANALYSIS_PROMPT_TEMPLATE, [
+            PromptSection("player_data", state["player_data"], required=True),
+            PromptSection("prediction", state["ml_prediction"], required=True),
+        ])
+
+    @staticmethod
+    def _parse_analysis(content: str) -> AgentState:
+        payload = _safe_json_loads(content) or {}
+        analysis = payload.get("engagement_analysis")
+        factors = payload.get("key_risk_factors")
+        confidence = payload.get("confidence_level")
+
+        if not analysis or not isinstance(factors, list):
+            raise ValueError("LLM returned incomplete analysis payload")
+
+        return {
+            "engagement_analysis": analysis,
+            "key_risk_factors": [str(item) for item in factors][:5],
+            "confidence_level": str(confidence or "medium").lower(),
+        }
 
     def analyze_node(self, state: AgentState) -> AgentState:
         logger.info("Agent step: analyze")
 
         if self.llm is None:
-            analysis, factors, confidence = _fallback_analysis(
-                state["player_data"], state["ml_prediction"]
+            return self._fallback_analysis_update(
+                state, "LLM unavailable or API key missing. Used fallback explanation."
             )
-            warnings = list(state.get("warnings", []))
-            warnings.append("LLM unavailable or API key missing. Used fallback explanation.")
-            return {
-                "engagement_analysis": analysis,
-                "key_risk_factors": factors,
-                "confidence_level": confidence,
-                "warnings": warnings,
-            }
+        if not self._uses_llm(state):
+            return self._fallback_analysis_update(state)
 
         try:
-            prompt_str = ANALYSIS_PROMPT_TEMPLATE.format(
-                player_data=json.dumps(state["player_data"], indent=2),
-                prediction=json.dumps(state["ml_prediction"], indent=2),
+            return self._parse_analysis(self._call_llm("analyze", self._analysis_prompt(state)))
+        except Exception as exc:  # pragma: no cover - exercised in integration runtime
+            logger.warning("LLM analysis failed: %s", exc)
+            return self._fallback_analysis_update(
+                state, "LLM analysis failed. Used fallback explanation.", degraded=True
             )
-            response = self.llm.invoke(prompt_str)
-            payload = _safe_json_loads(getattr(response, "content", "")) or {}
-            analysis = payload.get("engagement_analysis")
-            factors = payload.get("key_risk_factors")
-            confidence = payload.get("confidence_level")
 
-            if not analysis or not isinstance(factors, list):
-                raise ValueError("LLM returned incomplete analysis payload")
+    async def aanalyze_node(self, state: AgentState) -> AgentState:
+        logger.info("Agent step: analyze")
 
-            return {
-                "engagement_analysis": analysis,
-                "key_risk_factors": [str(item) for item in factors][:5],
-                "confidence_level": str(confidence or "medium").lower(),
-            }
+        if self.llm is None:
+            return self._fallback_analysis_update(
+                state, "LLM unavailable or API key missing. Used fallback explanation."
+            )
+        if not self._uses_llm(state):
+            return self._fallback_analysis_update(state)
+
+        try:
+            return self._parse_analysis(await self._acall_llm("analyze", self._analysis_prompt(state)))
         except Exception as exc:  # pragma: no cover - exercised in integration runtime
-            logger.warning("LLM analysis failed: %s", exc)
-            analysis, factors, confidence = _fallback_analysis(
-                state["player_data"], state["ml_prediction"]
+            logger.warning("LLM analysis failed: %r", exc)
+            return self._fallback_analysis_update(
+                state, "LLM analysis failed. Used fallback explanation.", degraded=True
             )
-            warnings = list(state.get("warnings", []))
-            warnings.append("LLM analysis failed. Used fallback explanation.")
-            return {
-                "engagement_analysis": analysis,
-                "key_risk_factors": factors,
-                "confidence_level": confidence,
-                "warnings": warnings,
-            }
 
     def research_node(self, state: AgentState) -> AgentState:
         logger.info("Agent step: research")
         return {
-            "industry_best_practices": _local_best_practices(
-                state["player_data"], state["ml_prediction"]
-            ),
+            "industry_best_practices": list(state["player_context"]["best_practices"]),
             "sources": [],
         }
 
+    async def aresearch_node(self, state: AgentState) -> AgentState:
+        return self.research_node(state)
+
+    @staticmethod
+    def _with_route(state: AgentState, update: AgentState) -> AgentState:
+        """Record the routing decision in the final report."""
+        update["final_report"]["route"] = state.get("route")
+        return update
+
+    def _fallback_report_update(
+        self,
+        state: AgentState,
+        personalized_strategies: list[str],
+        warning: str | None = None,
+    ) -> AgentState:
+        update: AgentState = {
+            "personalized_strategies": personalized_strategies,
+            "final_report": _fallback_report(
+                {
+                    **state,
+                    "personalized_strategies": personalized_strategies,
+                }
+            ),
+        }
+        if warning:
+            # A fallback caused by an LLM failure, not by a missing LLM
+            update["warnings"] = [*state.get("warnings", []), warning]
+            update["degraded"] = True
+        return update
+
+    def _report_prompt(self, state: AgentState) -> CompiledPrompt:
+        query_to_use = state.get("user_query") or get_dynamic_query(
+            state.get("ml_prediction", {}).get("risk_level", "MEDIUM")
+        )
+        analysis_dict = {
+            "engagement_analysis": state["engagement_analysis"],
+            "key_risk_factors": state["key_risk_factors"],
+            "confidence_level": state["confidence_level"],
+        }
+        # Best practices are trimmed first, then the analysis; the rest is required
+        return compile_prompt(REPORT_PROMPT_TEMPLATE, [
+            PromptSection("user_query", query_to_use, required=True),
+            PromptSection("player_data", state["player_data"], required=True),
+            PromptSection("prediction", state["ml_prediction"], required=True),
+            PromptSection("analysis", analysis_dict, priority=2),
+            PromptSection("industry_best_practices", state.get("industry_best_practices", []), priority=1),
+        ])
+
+    @classmethod
+    def _parse_report(cls, state: AgentState, content: str, personalized_strategies: list[str]) -> AgentState:
+        return cls._normalize_report(state, _safe_json_loads(content) or {}, personalized_strategies)
+
+    @staticmethod
+    def _normalize_report(state: AgentState, payload: Any, personalized_strategies: list[str]) -> AgentState:
+        if not isinstance(payload, dict) or "executive_summary" not in payload:
+            raise ValueError("LLM returned incomplete report payload")
+        payload = dict(payload)
+
+        payload["direct_answer_to_user"] = str(payload.get("direct_answer_to_user", ""))
+        payload["personalized_strategies"] = _string_list(
+            payload, "personalized_strategies", personalized_strategies
+        )
+        payload["industry_best_practices"] = _string_list(
+            payload, "industry_best_practices", state.get("industry_best_practices", [])
+        )
+        payload["key_risk_factors"] = _string_list(
+            payload, "key_risk_factors", state.get("key_risk_factors", [])
+        )
+        payload["engagement_analysis"] = str(
+            payload.get("engagement_analysis", state.get("engagement_analysis", ""))
+        )
+        payload["confidence_level"] = str(
+            payload.get("confidence_level", state.get("confidence_level", "medium"))
+        ).lower()
+        payload["sources"] = _get_sources()
+        payload["disclaimers"] = _get_disclaimers()
+
+        return {
+            "personalized_strategies": payload["personalized_strategies"],
+            "final_report": payload,
+        }
+
+    def _report_strategies(self, state: AgentState) -> list[str]:
+        return list(state["player_context"]["strategies"])
+
     def generate_report_node(self, state: AgentState) -> AgentState:
         logger.info("Agent step: generate_report")
-        personalized_strategies = _fallback_personalized_strategies(
-            state["player_data"],
-            state["ml_prediction"],
-            state.get("key_risk_factors", []),
-        )
+        personalized_strategies = self._report_strategies(state)
 
-        if self.llm is None:
-            return {
-                "personalized_strategies": personalized_strategies,
-                "final_report": _fallback_report(
-                    {
-                        **state,
-                        "personalized_strategies": personalized_strategies,
-                    }
-                ),
-            }
+        if not self._uses_llm(state):
+            return self._with_route(state, self._fallback_report_update(state, personalized_strategies))
 
         try:
-            query_to_use = state.get("user_query") or get_dynamic_query(
-                state.get("ml_prediction", {}).get("risk_level", "MEDIUM")
-            )
-            analysis_dict = {
-                "engagement_analysis": state["engagement_analysis"],
-                "key_risk_factors": state["key_risk_factors"],
-                "confidence_level": state["confidence_level"],
-            }
-            prompt_str = REPORT_PROMPT_TEMPLATE.format(
-                user_query=query_to_use,
-                player_data=json.dumps(state["player_data"], indent=2),
-                prediction=json.dumps(state["ml_prediction"], indent=2),
-                analysis=json.dumps(analysis_dict, indent=2),
-                industry_best_practices=json.dumps(state.get("industry_best_practices", []), indent=2),
-            )
-            response = self.llm.invoke(prompt_str)
-            payload = _safe_json_loads(getattr(response, "content", "")) or {}
-            if not isinstance(payload, dict) or "executive_summary" not in payload:
-                raise ValueError("LLM returned incomplete report payload")
-
-            payload["direct_answer_to_user"] = str(payload.get("direct_answer_to_user", ""))
-            payload["personalized_strategies"] = [
-                str(item) for item in payload.get("personalized_strategies", personalized_strategies)
-            ][:5]
-            payload["industry_best_practices"] = [
-                str(item) for item in payload.get(
-                    "industry_best_practices",
-                    state.get("industry_best_practices", []),
-                )
-            ][:5]
-            payload["key_risk_factors"] = [
-                str(item) for item in payload.get("key_risk_factors", state.get("key_risk_factors", []))
-            ][:5]
-            payload["engagement_analysis"] = str(
-                payload.get("engagement_analysis", state.get("engagement_analysis", ""))
-            )
-            payload["confidence_level"] = str(
-                payload.get("confidence_level", state.get("confidence_level", "medium"))
-            ).lower()
-            payload["sources"] = _get_sources()
-            payload["disclaimers"] = _get_disclaimers()
-
-            return {
-                "personalized_strategies": payload["personalized_strategies"],
-                "final_report": payload,
-            }
+            content = self._call_llm("generate_report", self._report_prompt(state))
+            return self._with_route(state, self._parse_report(state, content, personalized_strategies))
         except Exception as exc:  # pragma: no cover - exercised in integration runtime
             logger.warning("Final report generation failed: %s", exc)
-            warnings = list(state.get("warnings", []))
-            warnings.append("Final LLM report generation failed. Used fallback report.")
-            return {
-                "personalized_strategies": personalized_strategies,
-                "warnings": warnings,
-                "final_report": _fallback_report(
-                    {
-                        **state,
-                        "personalized_strategies": personalized_strategies,
-                    }
-                ),
+            return self._with_route(state, self._fallback_report_update(
+                state, personalized_strategies, "Final LLM report generation failed. Used fallback report."
+            ))
+
+    async def agenerate_report_node(self, state: AgentState) -> AgentState:
+        logger.info("Agent step: generate_report")
+        personalized_strategies = self._report_strategies(state)
+
+        if not self._uses_llm(state):
+            return self._with_route(state, self._fallback_report_update(state, personalized_strategies))
+
+        try:
+            content = await self._acall_llm("generate_report", self._report_prompt(state))
+            return self._with_route(state, self._parse_report(state, content, personalized_strategies))
+        except Exception as exc:  # pragma: no cover - exercised in integration runtime
+            logger.warning("Final report generation failed: %r", exc)
+            return self._with_route(state, self._fallback_report_update(
+                state, personalized_strategies, "Final LLM report generation failed. Used fallback report."
+            ))
+
+    # ------------------------------------------------------------------
+    # Cohort reports
+    # ------------------------------------------------------------------
+    def _cohort_states(
+        self,
+        players: list[dict[str, Any]],
+        predictions: list[dict[str, Any]] | None,
+        user_query: str | None,
+    ) -> list[AgentState]:
+        """Run the local (non-LLM) steps for every player in the cohort."""
+        states: list[AgentState] = []
+        for i, player_data in enumerate(players):
+            state = self._initial_state({
+                "player_data": player_data,
+                "user_query": user_query,
+                "ml_prediction": predictions[i] if predictions is not None else None,
+            })
+            state.update(self.predict_node(state))
+            analysis, factors, confidence = _fallback_analysis(state["ml_prediction"], state["player_context"])
+            state.update({
+                "engagement_analysis": analysis,
+                "key_risk_factors": factors,
+                "confidence_level": confidence,
+                "industry_best_practices": list(state["player_context"]["best_practices"]),
+            })
+            state["personalized_strategies"] = self._report_strategies(state)
+            states.append(state)
+        return states
+
+    def _cohort_prompt(self, states: list[AgentState], ids: list[int], user_query: str | None) -> CompiledPrompt:
+        entries = [
+            {
+                "id": player_id,
+                "player_data": state["player_data"],
+                "prediction": state["ml_prediction"],
+                "risk_factors": state["key_risk_factors"],
             }
+            for player_id, state in zip(ids, states)
+        ]
+        # Sized by chunk_size rather than trimmed: every player needs its entry
+        return compile_prompt(COHORT_REPORT_PROMPT_TEMPLATE, [
+            PromptSection("user_query", user_query or DEFAULT_COHORT_QUERY, required=True),
+            PromptSection("players", entries, required=True),
+        ])
+
+    def _merge_cohort_response(
+        self,
+        states: list[AgentState],
+        ids: list[int],
+        content: str,
+        failure_warning: str = "Cohort LLM report entry was malformed. Used fallback report.",
+    ) -> list[AgentState]:
+        """Split a JSON-array response into per-player results; bad entries fall back individually."""
+        by_id = {
+            str(entry["id"]): entry
+            for entry in _safe_json_array_loads(content) or []
+            if isinstance(entry, dict) and "id" in entry
+        }
+
+        results = []
+        for player_id, state in zip(ids, states):
+            strategies = state["personalized_strategies"]
+            try:
+                update = self._normalize_report(state, by_id.get(str(player_id)), strategies)
+            except (ValueError, TypeError):
+                update = self._fallback_report_update(state, strategies, failure_warning)
+            results.append({**state, **self._with_route(state, update)})
+        return results
+
+    def _split_cohort(self, states: list[AgentState]) -> tuple[list[AgentState | None], list[int]]:
+        """Resolve players routed away from the LLM; return their results and the LLM-bound indices."""
+        results: list[AgentState | None] = [None] * len(states)
+        llm_ids: list[int] = []
+        for i, state in enumerate(states):
+            if self._uses_llm(state):
+                llm_ids.append(i)
+            else:
+                update = self._fallback_report_update(state, state["personalized_strategies"])
+                results[i] = {**state, **self._with_route(state, update)}
+        return results, llm_ids
+
+    @staticmethod
+    def _cohort_chunks(states: list[AgentState], llm_ids: list[int], chunk_size: int | None):
+        size = max(1, chunk_size or COHORT_CHUNK_SIZE)
+        for start in range(0, len(llm_ids), size):
+            ids = llm_ids[start : start + size]
+            yield [states[i] for i in ids], ids
+
+    def generate_cohort_reports(
+        self,
+        players: list[dict[str, Any]],
+        user_query: str | None = None,
+        predictions: list[dict[str, Any]] | None = None,
+        chunk_size: int | None = None,
+    ) -> list[AgentState]:
+        """
+        Generate one report per player with one LLM call per chunk of players.
+
+        Returns results aligned with `players`, each shaped like an invoke()
+        result. Players missing or malformed in the LLM response fall back
+        individually to the local heuristic report.
+        """
+        states = self._cohort_states(players, predictions, user_query)
+        results, llm_ids = self._split_cohort(states)
+
+        for chunk, ids in self._cohort_chunks(states, llm_ids, chunk_size):
+            try:
+                content = self._call_llm("cohort_report", self._cohort_prompt(chunk, ids, user_query))
+                merged = self._merge_cohort_response(chunk, ids, content)
+            except Exception as exc:  # pragma: no cover - exercised in integration runtime
+                logger.warning("Cohort report generation failed: %s", exc)
+                merged = self._merge_cohort_response(
+                    chunk, ids, "", "Cohort LLM report generation failed. Used fallback report."
+                )
+            for i, result in zip(ids, merged):
+                results[i] = result
+        return results
+
+    async def agenerate_cohort_reports(
+        self,
+        players: list[dict[str, Any]],
+        user_query: str | None = None,
+        predictions: list[dict[str, Any]] | None = None,
+        chunk_size: int | None = None,
+        max_concurrency: int | None = None,
+    ) -> list[AgentState]:
+        """Async generate_cohort_reports; chunk prompts run concurrently, bounded by a semaphore."""
+        states = self._cohort_states(players, predictions, user_query)
+        results, llm_ids = self._split_cohort(states)
+        slots = asyncio.Semaphore(max(1, max_concurrency or COHORT_MAX_CONCURRENCY))
+
+        async def run_chunk(chunk: list[AgentState], ids: list[int]) -> list[AgentState]:
+            try:
+                async with slots:
+                    content = await self._acall_llm("cohort_report", self._cohort_prompt(chunk, ids, user_query))
+                return self._merge_cohort_response(chunk, ids, content)
+            except Exception as exc:  # pragma: no cover - exercised in integration runtime
+                logger.warning("Cohort report generation failed: %r", exc)
+                return self._merge_cohort_response(
+                    chunk, ids, "", "Cohort LLM report generation failed. Used fallback report."
+                )
+
+        chunks = list(self._cohort_chunks(states, llm_ids, chunk_size))
+        merged = await asyncio.gather(*(run_chunk(chunk, ids) for chunk, ids in chunks))
+        for (_, ids), chunk_results in zip(chunks, merged):
+            for i, result in zip(ids, chunk_results):
+                results[i] = result
+        return results
 
 
 def _build_llm_client():
@@ -554,6 +1014,8 @@ def _build_llm_client():
             model=model_name,
             temperature=0.2,
             api_key=api_key,
+            timeout=LLM_TIMEOUT_SECONDS,
+            max_retries=LLM_MAX_RETRIES,
         )
     except Exception as exc:  # pragma: no cover - runtime/environment dependent
         logger.warning("Unable to initialize Groq client: %s", exc)
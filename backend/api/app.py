@@ -12,7 +12,8 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from backend.ml.predict import predict_single, load_model
-from backend.ml.train import run_training_pipeline
+from backend.ml.preprocess import UnknownCategoryError
+from backend.ml.jobs import TrainingJobConflict, TrainingJobManager, reload_after_training
 
 app = Flask(__name__)
 CORS(app)  # Allow frontend to call API
@@ -61,18 +62,57 @@ def predict():
         result = predict_single(data)
         return jsonify(result)
 
+    except UnknownCategoryError as e:
+        return jsonify({
+            "error": str(e),
+            "field": e.column,
+            "value": e.value,
+            "allowed": e.allowed,
+        }), 422
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+training_jobs = TrainingJobManager(on_success=reload_after_training)
+
+
 @app.route("/api/train", methods=["POST"])
 def train():
-    """Trigger model retraining."""
+    """
+    Start model retraining in the background and return its job ID.
+    Jobs are tracked in this process's memory; run a single worker.
+    """
     try:
-        run_training_pipeline()
-        return jsonify({"status": "ok", "message": "Model retrained successfully"})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        job = training_jobs.submit()
+    except TrainingJobConflict as e:
+        return jsonify({"error": str(e), "job_id": e.active_job.id}), 409
+    body = job.to_dict()
+    body["status_url"] = f"/api/train/{job.id}"
+    return jsonify(body), 202
+
+
+@app.route("/api/train/<job_id>", methods=["GET"])
+def train_status(job_id):
+    """Get the status, stage and timings of a training job."""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown training job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/train/<job_id>/cancel", methods=["POST"])
+def train_cancel(job_id):
+    """
+    Cancel a queued or running training job. It stops at the next stage
+    boundary; a job already saving its artifacts answers 409.
+    """
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown training job: {job_id}"}), 404
+    if not training_jobs.cancel(job_id):
+        state = "saving artifacts" if job.status == "running" else job.status
+        return jsonify({"error": f"Training job {job_id} already {state}"}), 409
+    return jsonify(job.to_dict()), 202
 
 
 @app.route("/api/model/info", methods=["GET"])
@@ -3,17 +3,20 @@ FastAPI Backend for Player Churn Prediction System.
 Provides REST endpoints for the Next.js frontend.
 """
 
+import asyncio
+import json
 import logging
 import os
 import sys
 
-import joblib
 import numpy as np
 import pandas as pd
-from typing import Optional
-from fastapi import FastAPI, HTTPException
+from typing import Any, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
 # ---------------------------------------------------------------------------
 # Path setup — so we can import the existing ML modules
@@ -21,12 +24,51 @@ from pydantic import BaseModel, Field
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, BASE_DIR)
 
+from backend.agent.cache import SingleFlight, create_report_cache, make_cache_key
+from backend.agent.prompt_compiler import PROMPT_STATS
 from backend.agent.workflow import create_agent_workflow
 from backend.ml.feature_engineering import run_feature_engineering
-from backend.ml.preprocess import MODELS_DIR
+from backend.ml.bundle import ModelBundle
+from backend.ml.cohorts import CohortStore
+from backend.ml.jobs import TrainingJobConflict, TrainingJobManager, reload_after_training
+from backend.ml.microbatch import MicroBatcher
+from backend.ml.predict import (
+    INPUT_COLUMNS,
+    current_model_bundle,
+    get_model_bundle,
+    predict_batch,
+    reload_model_bundle,
+    risk_levels,
+    start_bundle_watcher,
+)
+from backend.ml.preprocess import UnknownCategoryError, encode_with_maps, load_data
+from backend.ml.rules import RULES, rule_columns, rule_row
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on rows accepted by a single POST /predict/batch call
+BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "100000"))
+
+# Optional micro-batching of POST /predict scoring: requests arriving within
+# the window (or until max rows) are scored in one vectorized call
+PREDICT_MICROBATCH = os.getenv("PREDICT_MICROBATCH", "0").lower() in ("1", "true", "yes")
+PREDICT_MICROBATCH_MAX_ROWS = int(os.getenv("PREDICT_MICROBATCH_MAX_ROWS", "64"))
+PREDICT_MICROBATCH_WINDOW_MS = float(os.getenv("PREDICT_MICROBATCH_WINDOW_MS", "2"))
+
+# Agent runs allowed in flight at once; excess requests wait on the event
+# loop instead of tying up threadpool workers needed by the scoring endpoints
+AGENT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "8"))
+_agent_slots = asyncio.Semaphore(AGENT_MAX_CONCURRENCY)
+
+# Upper bound on players in one POST /agent/cohort-report call
+COHORT_MAX_PLAYERS = int(os.getenv("AGENT_COHORT_MAX_PLAYERS", "500"))
+
+# Agent report cache (AGENT_CACHE_BACKEND=memory|sqlite|off)
+report_cache = create_report_cache()
+
+# Concurrent identical agent requests share one run
+agent_flights = SingleFlight()
+
 # ---------------------------------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------------------------------
@@ -46,17 +88,23 @@ app.add_middleware(
 )
 
 # ---------------------------------------------------------------------------
-# Load model artifacts once at startup
+# Model artifacts — loaded once at startup, hot-swappable afterwards
 # ---------------------------------------------------------------------------
-model = None
-scaler = None
-label_encoders = None
-feature_names = None
+# Poll interval for picking up a retrained bundle from disk (0 disables)
+MODEL_RELOAD_POLL_SECONDS = float(os.getenv("MODEL_RELOAD_POLL_SECONDS", "0"))
 
 
-def _ensure_model_loaded():
-    if model is None:
+def _ensure_model_loaded() -> ModelBundle:
+    """
+    Return a snapshot of the live model bundle for the current request.
+
+    Handlers use only this snapshot, so a hot reload mid-request never mixes
+    artifacts from two training runs.
+    """
+    bundle = current_model_bundle()
+    if bundle is None:
         raise HTTPException(status_code=503, detail="Model not loaded — run training first")
+    return bundle
 
 
 def _build_weight_rows(names, coefficients):
@@ -87,19 +135,28 @@ def apply_purchase_calibration(probability: float, data: dict) -> float:
     return min(1.0, adjusted)
 
 
+def apply_purchase_calibration_batch(probabilities: np.ndarray, purchases: np.ndarray) -> np.ndarray:
+    """Vectorized apply_purchase_calibration for a batch of players."""
+    adjusted = np.where(purchases == 1, np.maximum(0.0, probabilities - 0.05), probabilities)
+    return np.minimum(1.0, adjusted)
+
+
+_bundle_watcher = None
+
+
 @app.on_event("startup")
 def load_artifacts():
     """Load ML artifacts into memory when the server starts."""
-    global model, scaler, label_encoders, feature_names, agent
+    global agent, _bundle_watcher
     try:
-        model = joblib.load(os.path.join(MODELS_DIR, "churn_model.pkl"))
-        scaler = joblib.load(os.path.join(MODELS_DIR, "scaler.pkl"))
-        label_encoders = joblib.load(os.path.join(MODELS_DIR, "label_encoders.pkl"))
-        feature_names = joblib.load(os.path.join(MODELS_DIR, "feature_names.pkl"))
-        print(f"✅ Model loaded — {len(feature_names)} features")
+        bundle = get_model_bundle()
+        print(f"✅ Model loaded — {len(bundle.feature_names)} features (version {bundle.version})")
     except Exception as e:
         print(f"⚠️  Could not load model artifacts: {e}")
 
+    if MODEL_RELOAD_POLL_SECONDS > 0 and _bundle_watcher is None:
+        _bundle_watcher = start_bundle_watcher(MODEL_RELOAD_POLL_SECONDS)
+
     try:
         agent = create_agent_workflow()
         logger.info("✅ Agent workflow initialized")
@@ -142,6 +199,28 @@ class PredictionResponse(BaseModel):
     agent_query: str | None = None
     agent_answer: str | None = None
     agent_strategies: list[str] = []
+    agent_route: dict | None = None
+
+
+class BatchPredictionItem(BaseModel):
+    index: int
+    churn_probability: float
+    will_churn: bool
+    risk_level: str
+    recommendations: list[str] | None = None
+
+
+class BatchPredictionError(BaseModel):
+    index: int
+    errors: list[Any]
+
+
+class BatchPredictionResponse(BaseModel):
+    n_rows: int
+    n_scored: int
+    n_failed: int
+    results: list[BatchPredictionItem]
+    errors: list[BatchPredictionError]
 
 
 class PredictInput(PlayerInput):
@@ -156,50 +235,194 @@ class PredictInput(PlayerInput):
 # ---------------------------------------------------------------------------
 def get_recommendations(risk_level: str, data: dict) -> list[str]:
     """Return actionable recommendations based on risk level & player data."""
-    recs: list[str] = []
-
-    if risk_level == "HIGH":
-        recs.append("Send a personalised retention offer immediately")
-        recs.append("Offer exclusive in-game rewards or limited-time items")
-        recs.append("Assign to priority support for proactive outreach")
-        if data.get("SessionsPerWeek", 0) <= 2:
-            recs.append("Send re-engagement push notifications")
-        if data.get("InGamePurchases", 0) == 0:
-            recs.append("Offer a first-purchase discount or starter pack")
+    return RULES.evaluate("recommendations", rule_row(data, risk_level))
 
-    elif risk_level == "MEDIUM":
-        recs.append("Monitor engagement trends over the next 7 days")
-        recs.append("Introduce achievement-based challenges to boost activity")
-        recs.append("Suggest social features like guilds or team events")
-        if data.get("PlayerLevel", 0) < 20:
-            recs.append("Provide a guided progression quest to level 20")
 
-    else:  # LOW
-        recs.append("Player is healthy — maintain current experience")
-        recs.append("Recognise loyalty with a milestone reward")
-        recs.append("Invite to beta-test new content or features")
+def get_recommendations_batch(risk_levels: np.ndarray, df: pd.DataFrame) -> list[list[str]]:
+    """Vectorized get_recommendations for every row of df."""
+    columns = rule_columns(df, risk_levels, RULES.inputs(["recommendations"]))
+    return RULES.evaluate_batch("recommendations", columns, len(df))
 
-    return recs
 
+async def run_agent(state: dict, model_version: str | None = None) -> dict:
+    """
+    Run the agent asynchronously, bounded by AGENT_MAX_CONCURRENCY.
 
-def get_enhanced_recommendations(risk_level: str, data: dict) -> list[str]:
+    Results are cached by (player_data, normalized query, model version,
+    prompt version, ml_prediction, force_llm); runs that fell back because an LLM call
+    failed are not cached, so a transient outage does not pin degraded
+    reports. Identical requests that arrive while a run is in flight await
+    that run.
     """
-    Keep the /predict response shape stable while upgrading its recommendation
-    quality with the internal agent workflow when available.
+    key = make_cache_key(
+        state["player_data"], state.get("user_query"), model_version,
+        prediction=state.get("ml_prediction"), force_llm=state.get("force_llm", False),
+    )
+    if report_cache is not None:
+        cached = await report_cache.aget(key)
+        if cached is not None:
+            return cached
+
+    async def invoke() -> dict:
+        async with _agent_slots:
+            result = await agent.ainvoke(state)
+        if report_cache is not None and not result.get("degraded"):
+            await report_cache.aset(key, result)
+        return result
+
+    return await agent_flights.do(key, invoke)
+
+
+async def run_agent_report(
+    data: dict,
+    user_query: str | None,
+    ml_prediction: dict,
+    model_version: str | None = None,
+) -> dict | None:
+    """
+    Run the agent once for a scored player and return its final report.
+
+    The already-computed (calibrated) prediction is handed to the agent so it
+    does not score the player again. Returns None when the agent is
+    unavailable or fails.
     """
     if agent is None:
-        return get_recommendations(risk_level, data)
+        return None
 
     try:
-        result = agent.invoke({"player_data": data, "user_query": None})
-        report = result.get("final_report", {})
-        strategies = report.get("personalized_strategies", [])
-        if isinstance(strategies, list) and strategies:
-            return [str(item) for item in strategies][:5]
+        result = await run_agent(
+            {"player_data": data, "user_query": user_query, "ml_prediction": ml_prediction},
+            model_version,
+        )
+        return result.get("final_report") or None
     except Exception as exc:
-        logger.warning("Enhanced recommendation generation failed: %s", exc)
+        logger.warning("Agent report generation failed: %s", exc)
+        return None
+
+
+def _report_strategies(report: dict | None) -> list[str]:
+    strategies = (report or {}).get("personalized_strategies", [])
+    if not isinstance(strategies, list):
+        return []
+    return [str(item) for item in strategies][:5]
+
+
+def get_enhanced_recommendations(risk_level: str, data: dict, report: dict | None = None) -> list[str]:
+    """
+    Keep the /predict response shape stable while upgrading its recommendation
+    quality with the agent report for this player when available.
+    """
+    strategies = _report_strategies(report)
+    return strategies or get_recommendations(risk_level, data)
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+def _unknown_category_detail(exc: UnknownCategoryError, loc_prefix: tuple = ("body",)) -> dict:
+    """Describe an unseen category in the same shape as FastAPI validation errors."""
+    return {
+        "loc": [*loc_prefix, exc.column],
+        "msg": str(exc),
+        "type": "unknown_category",
+        "input": exc.value,
+        "ctx": {"allowed": exc.allowed},
+    }
+
+
+def _row_error_detail(exc: Exception, loc_prefix: tuple = ("body",)) -> dict:
+    """Describe why predict_batch could not score a row, in FastAPI validation-error shape."""
+    if isinstance(exc, UnknownCategoryError):
+        return _unknown_category_detail(exc, loc_prefix)
+    column = getattr(exc, "column", None)
+    return {
+        "loc": [*loc_prefix, column] if column is not None else list(loc_prefix),
+        "msg": str(exc),
+        "type": "value_error",
+        "input": getattr(exc, "value", None),
+    }
+
 
-    return get_recommendations(risk_level, data)
+def _score_player(data: dict, bundle: ModelBundle) -> tuple[int, float]:
+    """Return (prediction, raw churn probability) for one validated player."""
+    # Non-linear models have no kernel and use the pandas/sklearn path
+    if bundle.kernel is not None:
+        return bundle.kernel.score(data)
+
+    model, scaler, _, feature_names = bundle.as_artifacts()
+
+    # Encode categorical columns
+    df, errors = encode_with_maps(pd.DataFrame([data]), bundle.category_maps)
+    if errors[0] is not None:
+        raise errors[0]
+
+    # Apply feature engineering (adds EngagementScore, ProgressionRate, etc.)
+    df = run_feature_engineering(df)
+
+    # Select features in training order & scale
+    df = df[feature_names]
+    df_scaled = pd.DataFrame(scaler.transform(df), columns=feature_names)
+
+    prediction = int(model.predict(df_scaled)[0])
+    probability = float(model.predict_proba(df_scaled)[0][1])
+    return prediction, probability
+
+
+def _score_players(items: list[tuple[dict, ModelBundle]]) -> list:
+    """
+    Score (data, bundle) pairs in one vectorized pass per bundle.
+
+    Returns one (prediction, raw probability) per item, or the exception to
+    raise for that item's request.
+    """
+    results: list = [None] * len(items)
+    by_bundle: dict[int, list[int]] = {}
+    for i, (_, bundle) in enumerate(items):
+        by_bundle.setdefault(id(bundle), []).append(i)
+
+    for positions in by_bundle.values():
+        bundle = items[positions[0]][1]
+        df = pd.DataFrame([items[i][0] for i in positions], index=positions)
+        scored, errors = predict_batch(df, bundle=bundle, return_errors=True)
+        for i, churned, probability, error in zip(
+            positions, scored["churned"], scored["churn_probability"], errors
+        ):
+            results[i] = error if error is not None else (int(churned), float(probability))
+    return results
+
+
+async def _calibrated_prediction(data: dict, bundle: ModelBundle | None) -> dict | None:
+    """
+    The calibrated prediction /predict would return for `data`, so agent
+    reports built by every endpoint start from the same numbers. None when
+    no model is loaded or the (unvalidated) player cannot be scored; the
+    agent then scores the player itself.
+    """
+    if bundle is None:
+        return None
+    try:
+        if bundle.kernel is not None:
+            prediction, probability = _score_player(data, bundle)
+        else:
+            prediction, probability = await run_in_threadpool(_score_player, data, bundle)
+    except Exception:
+        return None
+    probability = apply_purchase_calibration(probability, data)
+    return {"churn_probability": probability, "churned": prediction, "risk_level": risk_levels([probability])[0]}
+
+
+prediction_batcher = (
+    MicroBatcher(_score_players, PREDICT_MICROBATCH_MAX_ROWS, PREDICT_MICROBATCH_WINDOW_MS)
+    if PREDICT_MICROBATCH
+    else None
+)
+
+
+@app.on_event("shutdown")
+async def drain_prediction_batcher():
+    """Finish queued and in-flight micro-batches before the server exits."""
+    if prediction_batcher is not None:
+        await prediction_batcher.close()
 
 
 # ---------------------------------------------------------------------------
@@ -210,7 +433,7 @@ def health_check():
     """Health check endpoint."""
     return {
         "status": "ok",
-        "model_loaded": model is not None,
+        "model_loaded": current_model_bundle() is not None,
         "message": "Player Churn Prediction API is running",
     }
 
@@ -218,7 +441,8 @@ def health_check():
 @app.get("/model/info")
 def model_info():
     """Return model metadata."""
-    _ensure_model_loaded()
+    bundle = _ensure_model_loaded()
+    model, _, label_encoders, feature_names = bundle.as_artifacts()
 
     # Get intercept if available (LogisticRegression has it, RandomForest does not)
     intercept = None
@@ -227,6 +451,8 @@ def model_info():
 
     return {
         "model_type": type(model).__name__,
+        "model_version": bundle.version,
+        "trained_at": bundle.manifest.get("created_at"),
         "n_features": len(feature_names),
         "features": feature_names,
         "intercept": intercept,
@@ -237,31 +463,22 @@ def model_info():
 
 
 @app.post("/predict", response_model=PredictionResponse)
-def predict(player: PredictInput):
+async def predict(player: PredictInput):
     """Predict churn risk for a single player."""
-    _ensure_model_loaded()
+    bundle = _ensure_model_loaded()
 
     try:
         payload = player.model_dump()
         user_query = payload.pop("query", None)
         data = payload
-        df = pd.DataFrame([data])
-
-        # Encode categorical columns
-        categorical_cols = ["Gender", "Location", "GameGenre", "GameDifficulty"]
-        for col in categorical_cols:
-            df[col] = label_encoders[col].transform(df[col])
 
-        # Apply feature engineering (adds EngagementScore, ProgressionRate, etc.)
-        df = run_feature_engineering(df)
-
-        # Select features in training order & scale
-        df = df[feature_names]
-        df_scaled = pd.DataFrame(scaler.transform(df), columns=feature_names)
-
-        # Predict
-        prediction = int(model.predict(df_scaled)[0])
-        probability = float(model.predict_proba(df_scaled)[0][1])
+        # Predict — the compiled kernel is cheap enough to run on the event loop
+        if prediction_batcher is not None:
+            prediction, probability = await prediction_batcher.submit((data, bundle))
+        elif bundle.kernel is not None:
+            prediction, probability = _score_player(data, bundle)
+        else:
+            prediction, probability = await run_in_threadpool(_score_player, data, bundle)
         probability = apply_purchase_calibration(probability, data)
 
         # Risk level
@@ -272,25 +489,25 @@ def predict(player: PredictInput):
         else:
             risk_level = "LOW"
 
-        recommendations = get_enhanced_recommendations(risk_level, data)
+        # One agent run serves both the recommendations and the query answer
+        report = await run_agent_report(
+            data,
+            user_query,
+            {"churn_probability": probability, "churned": prediction, "risk_level": risk_level},
+            bundle.version,
+        )
+        recommendations = get_enhanced_recommendations(risk_level, data, report)
 
         agent_answer = None
         agent_strategies: list[str] = []
-        if user_query and agent is not None:
-            try:
-                result = agent.invoke({"player_data": data, "user_query": user_query})
-                report = result.get("final_report", {})
-                answer_parts = [
-                    report.get("executive_summary", ""),
-                    report.get("engagement_analysis", ""),
-                ]
-                combined = " ".join(part.strip() for part in answer_parts if part)
-                agent_answer = combined or None
-                strategies = report.get("personalized_strategies", [])
-                if isinstance(strategies, list):
-                    agent_strategies = [str(item) for item in strategies][:5]
-            except Exception as exc:
-                logger.warning("Agent follow-up generation failed: %s", exc)
+        if user_query and report is not None:
+            answer_parts = [
+                report.get("executive_summary", ""),
+                report.get("engagement_analysis", ""),
+            ]
+            combined = " ".join(part.strip() for part in answer_parts if part)
+            agent_answer = combined or None
+            agent_strategies = _report_strategies(report)
 
         return PredictionResponse(
             churn_probability=round(probability, 4),
@@ -300,12 +517,126 @@ def predict(player: PredictInput):
             agent_query=user_query,
             agent_answer=agent_answer,
             agent_strategies=agent_strategies,
+            agent_route=report.get("route") if report is not None else None,
         )
 
+    except UnknownCategoryError as e:
+        raise HTTPException(status_code=422, detail=[_unknown_category_detail(e)])
     except Exception as e:
         raise HTTPException(status_code=422, detail=str(e))
 
 
+# ---------------------------------------------------------------------------
+# Batch prediction
+# ---------------------------------------------------------------------------
+class _MalformedLine:
+    """Placeholder for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, line: str, exc: json.JSONDecodeError):
+        self.error = {"type": "json_invalid", "loc": [], "msg": f"Invalid JSON: {exc}", "input": line}
+
+
+def _parse_ndjson_line(line: str):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        return _MalformedLine(line, exc)
+
+
+def _parse_batch_body(body: bytes, content_type: str) -> list:
+    """
+    Parse a JSON array (or {"players": [...]}) or an NDJSON body into records.
+    NDJSON lines are parsed one by one; a malformed line becomes a
+    _MalformedLine so it is reported per row instead of failing the batch.
+    """
+    text = body.decode("utf-8")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [_parse_ndjson_line(line) for line in text.splitlines() if line.strip()]
+
+    records = json.loads(text)
+    if isinstance(records, dict):
+        records = records.get("players")
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array of players or {\"players\": [...]}")
+    return records
+
+
+def _score_batch(records: list, bundle: ModelBundle, recommendations: bool = False) -> dict:
+    """Validate records row by row, then score the valid ones in one pass."""
+    errors: list[dict] = []
+    valid_rows: list[dict] = []
+    valid_index: list[int] = []
+    for i, record in enumerate(records):
+        if isinstance(record, _MalformedLine):
+            errors.append({"index": i, "errors": [record.error]})
+            continue
+        try:
+            valid_rows.append(PlayerInput.model_validate(record).model_dump())
+            valid_index.append(i)
+        except ValidationError as exc:
+            errors.append({"index": i, "errors": exc.errors(include_url=False, include_context=False)})
+
+    results: list[dict] = []
+    if valid_rows:
+        df = pd.DataFrame(valid_rows, index=valid_index)
+        scored, row_errors = predict_batch(df, bundle=bundle, return_errors=True)
+
+        failed = scored["error"].notna().to_numpy()
+        for i, exc in zip(scored.index, row_errors):
+            if exc is not None:
+                # Same shape as the pydantic errors above (loc relative to the row)
+                errors.append({"index": int(i), "errors": [_row_error_detail(exc, ())]})
+
+        ok = scored.loc[~failed]
+        probability = apply_purchase_calibration_batch(
+            ok["churn_probability"].to_numpy(dtype=np.float64),
+            df.loc[ok.index, "InGamePurchases"].to_numpy(),
+        )
+        levels = risk_levels(probability)
+        results = [
+            {"index": int(i), "churn_probability": round(float(p), 4),
+             "will_churn": bool(c), "risk_level": r}
+            for i, p, c, r in zip(ok.index, probability, ok["churned"].to_numpy(dtype=np.int64), levels)
+        ]
+        if recommendations:
+            for item, recs in zip(results, get_recommendations_batch(levels, df.loc[ok.index])):
+                item["recommendations"] = recs
+
+    errors.sort(key=lambda item: item["index"])
+    return {
+        "n_rows": len(records),
+        "n_scored": len(results),
+        "n_failed": len(errors),
+        "results": results,
+        "errors": errors,
+    }
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse, response_model_exclude_none=True)
+async def predict_batch_endpoint(request: Request, recommendations: bool = False):
+    """
+    Predict churn risk for many players at once.
+
+    Accepts a JSON array of PlayerInput records (or {"players": [...]}), or an
+    NDJSON body with Content-Type application/x-ndjson. Invalid rows are
+    reported in `errors` by their position and do not fail the batch.
+    With ?recommendations=true each result also carries its recommendations.
+    """
+    bundle = _ensure_model_loaded()
+
+    try:
+        records = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch body: {e}")
+
+    if len(records) > BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413, detail=f"Batch too large: {len(records)} rows (max {BATCH_MAX_ROWS})"
+        )
+
+    # Scoring is CPU-bound; keep it off the event loop
+    return await run_in_threadpool(_score_batch, records, bundle, recommendations)
+
 
 # ---------------------------------------------------------------------------
 # Agent / LLM Endpoint - Called separately when user clicks "Ask Agent"
@@ -319,13 +650,15 @@ class AgentQueryResponse(BaseModel):
     agent_answer: str
     agent_strategies: list[str]
     confidence_level: str
+    route: dict | None = None
 
 
 @app.post("/agent/ask", response_model=AgentQueryResponse)
-def ask_agent(query_input: AgentQueryInput):
+async def ask_agent(query_input: AgentQueryInput):
     """
     Dedicated endpoint for LLM agent queries.
-    This is called when user clicks 'Ask Agent' to ensure LLM is invoked.
+    This is called when user clicks 'Ask Agent', so the LLM is invoked even
+    for clear-cut LOW-risk players; only the automatic /predict path is routed.
     """
     if agent is None:
         raise HTTPException(
@@ -334,10 +667,12 @@ def ask_agent(query_input: AgentQueryInput):
         )
 
     try:
-        result = agent.invoke({
-            "player_data": query_input.player_data,
-            "user_query": query_input.query
-        })
+        bundle = current_model_bundle()
+        state = {"player_data": query_input.player_data, "user_query": query_input.query, "force_llm": True}
+        prediction = await _calibrated_prediction(query_input.player_data, bundle)
+        if prediction is not None:
+            state["ml_prediction"] = prediction
+        result = await run_agent(state, bundle.version if bundle is not None else None)
 
         report = result.get("final_report", {})
 
@@ -360,6 +695,7 @@ def ask_agent(query_input: AgentQueryInput):
             agent_answer=combined or "No analysis available.",
             agent_strategies=[str(item) for item in strategies][:5],
             confidence_level=report.get("confidence_level", "medium"),
+            route=report.get("route"),
         )
 
     except Exception as exc:
@@ -367,6 +703,325 @@ def ask_agent(query_input: AgentQueryInput):
         raise HTTPException(status_code=500, detail=f"Agent query failed: {exc}")
 
 
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _agent_event_stream(player_data: dict, user_query: str | None):
+    """
+    Server-Sent Events for one agent run: a `node` event as each workflow
+    step finishes (predict first, so the risk score arrives immediately),
+    `token` events while the LLM writes, then `done` with the final report.
+    Like /agent/ask, the LLM is always used (force_llm).
+    """
+    bundle = current_model_bundle()
+    model_version = bundle.version if bundle is not None else None
+    state = {"player_data": player_data, "user_query": user_query, "force_llm": True}
+    prediction = await _calibrated_prediction(player_data, bundle)
+    if prediction is not None:
+        state["ml_prediction"] = prediction
+    key = make_cache_key(player_data, user_query, model_version, prediction=prediction, force_llm=True)
+
+    cached = await report_cache.aget(key) if report_cache is not None else None
+    if cached is not None:
+        yield _sse("node", {"node": "predict", "update": {
+            "ml_prediction": cached.get("ml_prediction"), "route": cached.get("route"),
+        }})
+        yield _sse("done", {"report": cached.get("final_report"), "cached": True})
+        return
+
+    async with _agent_slots:
+        async for event in agent.astream(state):
+            kind = event["event"]
+            if kind == "done":
+                result = event["state"]
+                if report_cache is not None and not result.get("degraded"):
+                    await report_cache.aset(key, result)
+                yield _sse("done", {"report": result.get("final_report"), "cached": False})
+            elif kind == "error":
+                logger.error("Agent stream failed: %s", event["error"])
+                yield _sse("error", {"detail": f"Agent query failed: {event['error']}"})
+            else:
+                yield _sse(kind, {key_: value for key_, value in event.items() if key_ != "event"})
+
+
+def _stream_response(player_data: dict, user_query: str | None) -> StreamingResponse:
+    if agent is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Agent workflow not initialized. Check GROQ_API_KEY and dependencies."
+        )
+    return StreamingResponse(
+        _agent_event_stream(player_data, user_query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/agent/ask/stream")
+async def ask_agent_stream(query_input: AgentQueryInput):
+    """Stream the agent's progress and answer as Server-Sent Events."""
+    return _stream_response(query_input.player_data, query_input.query)
+
+
+@app.get("/agent/ask/stream")
+async def ask_agent_stream_get(player_data: str, query: Optional[str] = None):
+    """
+    EventSource-friendly variant of POST /agent/ask/stream; `player_data` is
+    the player as a JSON-encoded query parameter.
+    """
+    try:
+        data = json.loads(player_data)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=422, detail=f"player_data is not valid JSON: {exc}")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="player_data must be a JSON object")
+    return _stream_response(data, query)
+
+
+class CohortReportInput(BaseModel):
+    players: list[PlayerInput]
+    query: Optional[str] = Field(default=None)
+
+
+class CohortReportItem(BaseModel):
+    index: int
+    churn_probability: float
+    risk_level: str
+    report: dict
+    fallback: bool
+    routed: bool
+
+
+class CohortReportResponse(BaseModel):
+    n_players: int
+    n_fallback: int
+    n_routed: int
+    reports: list[CohortReportItem]
+
+
+@app.post("/agent/cohort-report", response_model=CohortReportResponse)
+async def cohort_report(cohort: CohortReportInput):
+    """
+    Generate agent reports for a cohort of players.
+
+    Players are scored in one vectorized pass, then packed several per LLM
+    prompt (AGENT_COHORT_CHUNK_SIZE) with prompts running concurrently.
+    If any player cannot be scored the whole request is rejected with a 422
+    listing every failing index, so no report is built from a missing score.
+
+    Two counts describe reports built locally rather than by the LLM:
+    - n_fallback: the LLM was unavailable, failed, or returned a malformed
+      entry for the player
+    - n_routed: route_request deliberately skipped the LLM (clear low risk)
+    """
+    if agent is None:
+        raise HTTPException(status_code=503, detail="Agent workflow not initialized.")
+    if len(cohort.players) > COHORT_MAX_PLAYERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Cohort too large: {len(cohort.players)} players (max {COHORT_MAX_PLAYERS})",
+        )
+
+    bundle = _ensure_model_loaded()
+    players = [player.model_dump() for player in cohort.players]
+    if not players:
+        return {"n_players": 0, "n_fallback": 0, "n_routed": 0, "reports": []}
+
+    scored, errors = await run_in_threadpool(predict_batch, pd.DataFrame(players), bundle, return_errors=True)
+    detail = [
+        _row_error_detail(exc, ("body", "players", i)) for i, exc in enumerate(errors) if exc is not None
+    ]
+    if detail:
+        raise HTTPException(status_code=422, detail=detail)
+
+    probability = apply_purchase_calibration_batch(
+        scored["churn_probability"].to_numpy(dtype=np.float64),
+        np.array([player["InGamePurchases"] for player in players]),
+    )
+    predictions = [
+        {"churn_probability": float(p), "churned": int(c), "risk_level": r}
+        for p, c, r in zip(probability, scored["churned"].to_numpy(dtype=np.int64), risk_levels(probability))
+    ]
+
+    async with _agent_slots:
+        results = await agent.agenerate_cohort_reports(players, cohort.query, predictions)
+
+    reports = [
+        {
+            "index": i,
+            "churn_probability": round(predictions[i]["churn_probability"], 4),
+            "risk_level": predictions[i]["risk_level"],
+            "report": result["final_report"],
+            "fallback": agent.llm is None or bool(result.get("degraded")),
+            "routed": agent.llm is not None and not result.get("route", {}).get("use_llm", True),
+        }
+        for i, result in enumerate(results)
+    ]
+    return {
+        "n_players": len(reports),
+        "n_fallback": sum(item["fallback"] for item in reports),
+        "n_routed": sum(item["routed"] for item in reports),
+        "reports": reports,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cohort analytics over the full player table
+# ---------------------------------------------------------------------------
+class NumericRange(BaseModel):
+    min: float | None = None
+    max: float | None = None
+
+
+class CohortSummaryInput(BaseModel):
+    filters: dict[str, list[str]] = Field(
+        default={}, description="Allowed values per categorical column, e.g. {\"GameGenre\": [\"RPG\"]}"
+    )
+    ranges: dict[str, NumericRange] = Field(
+        default={}, description="Inclusive bounds per numeric, engineered or churn_probability column"
+    )
+    group_by: list[str] = Field(default=[], description="Categorical columns to group by")
+    bins: int = Field(default=10, ge=1, le=100, description="Churn-probability histogram buckets")
+
+
+# Scored player table; rebuilt on first use after the live model changes
+_cohort_store: CohortStore | None = None
+_cohort_store_lock = asyncio.Lock()
+
+
+def _build_cohort_store(bundle: ModelBundle) -> CohortStore:
+    """Score the whole dataset once with the given bundle, calibrated like /predict."""
+    df = load_data()
+    scored = predict_batch(df[INPUT_COLUMNS], bundle=bundle)
+    ok = scored["error"].isna().to_numpy()
+    df = df.loc[ok]
+    probability = apply_purchase_calibration_batch(
+        scored.loc[ok, "churn_probability"].to_numpy(dtype=np.float64),
+        df["InGamePurchases"].to_numpy(),
+    )
+    return CohortStore(df, probability, risk_levels(probability), model_version=bundle.version)
+
+
+async def get_cohort_store(bundle: ModelBundle) -> CohortStore:
+    global _cohort_store
+    store = _cohort_store
+    if store is not None and store.model_version == bundle.version:
+        return store
+    async with _cohort_store_lock:
+        if _cohort_store is None or _cohort_store.model_version != bundle.version:
+            _cohort_store = await run_in_threadpool(_build_cohort_store, bundle)
+        return _cohort_store
+
+
+@app.post("/cohorts/summary")
+async def cohorts_summary(query: CohortSummaryInput):
+    """
+    Risk-level counts and shares, mean churn probability, a probability
+    histogram and engineered-feature means for a filtered slice of the
+    player table, optionally grouped by categorical columns.
+    """
+    bundle = _ensure_model_loaded()
+    try:
+        store = await get_cohort_store(bundle)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Player dataset not available: {e}")
+
+    ranges = {col: (bounds.min, bounds.max) for col, bounds in query.ranges.items()}
+    try:
+        return store.summary(query.filters, ranges, query.group_by, query.bins)
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=e.args[0])
+
+
+@app.get("/metrics")
+def metrics():
+    """Runtime counters for the agent cache, coalescing, prompt costs and micro-batching."""
+    return {
+        "agent_cache": report_cache.info() if report_cache is not None else {"backend": "off"},
+        "agent_coalescing": agent_flights.info(),
+        "agent_prompts": PROMPT_STATS.snapshot(),
+        "predict_microbatch": (
+            prediction_batcher.info() if prediction_batcher is not None else {"enabled": False}
+        ),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Hot model reload
+# ---------------------------------------------------------------------------
+@app.post("/model/reload")
+async def model_reload():
+    """
+    Load the bundle currently on disk, validate it on a canary batch and swap
+    it in. In-flight requests finish on the old model; the live model is
+    left untouched if the new bundle fails to load or validate.
+    """
+    try:
+        new, old = await run_in_threadpool(reload_model_bundle)
+    except Exception as exc:
+        logger.warning("Model reload rejected: %s", exc)
+        raise HTTPException(status_code=409, detail=f"Model reload rejected: {exc}")
+
+    return {
+        "status": "reloaded",
+        "model_version": new.version,
+        "previous_version": old.version if old is not None else None,
+        "trained_at": new.manifest.get("created_at"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Background retraining
+# ---------------------------------------------------------------------------
+training_jobs = TrainingJobManager(on_success=reload_after_training)
+
+
+def _get_training_job(job_id: str):
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job: {job_id}")
+    return job
+
+
+@app.post("/train", status_code=202)
+def train():
+    """
+    Start retraining on the background worker and return immediately.
+    Poll GET /train/{job_id} for stage, progress and per-stage timings.
+
+    Jobs run in this API process and are tracked in its memory, so serve the
+    API with a single worker; other workers answer 404 for the job ID.
+    """
+    try:
+        job = training_jobs.submit()
+    except TrainingJobConflict as exc:
+        raise HTTPException(
+            status_code=409, detail={"msg": str(exc), "job_id": exc.active_job.id}
+        )
+    return {**job.to_dict(), "status_url": f"/train/{job.id}"}
+
+
+@app.get("/train/{job_id}")
+def train_status(job_id: str):
+    """Return the status of a training job started by this (single) API worker."""
+    return _get_training_job(job_id).to_dict()
+
+
+@app.post("/train/{job_id}/cancel", status_code=202)
+def train_cancel(job_id: str):
+    """
+    Cancel a queued or running training job before it writes artifacts.
+    A running stage finishes first: cancellation takes effect at the next
+    stage boundary, and a job already in its save stage answers 409.
+    """
+    job = _get_training_job(job_id)
+    if not training_jobs.cancel(job_id):
+        state = "saving artifacts" if job.status == "running" else job.status
+        raise HTTPException(status_code=409, detail=f"Training job {job_id} already {state}")
+    return job.to_dict()
+
+
 # ---------------------------------------------------------------------------
 # Model comparison & feature importance helpers
 # ---------------------------------------------------------------------------
@@ -405,7 +1060,8 @@ def model_compare():
 @app.get("/model/feature-importance")
 def feature_importance():
     """Return feature importances sorted by importance."""
-    _ensure_model_loaded()
+    bundle = _ensure_model_loaded()
+    model, feature_names = bundle.model, bundle.feature_names
 
     # RandomForest uses feature_importances_, LogisticRegression uses coef_
     if hasattr(model, "feature_importances_"):
@@ -422,7 +1078,8 @@ def feature_importance():
 @app.get("/model/weights")
 def model_weights():
     """Return model weights/feature importances."""
-    _ensure_model_loaded()
+    bundle = _ensure_model_loaded()
+    model, feature_names = bundle.model, bundle.feature_names
 
     # Get intercept if available (LogisticRegression has it, RandomForest does not)
     intercept = None
@@ -0,0 +1,186 @@
+"""
+Versioned single-file model bundle for Player Churn Prediction.
+
+A bundle packs everything one training run produced (model, scaler,
+encoders, category lookup tables, feature names, metrics) into one
+uncompressed joblib file with a manifest and a content hash. Numeric
+arrays are stored raw, so joblib.load(mmap_mode="r") memory-maps them
+instead of copying them into every worker process.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import sklearn
+
+from backend.ml.preprocess import MODELS_DIR, build_category_maps, load_category_maps
+from backend.ml.scoring import ScoringKernel
+
+BUNDLE_FILE = "churn_bundle.joblib"
+BUNDLE_FORMAT_VERSION = 1
+
+
+class BundleIntegrityError(ValueError):
+    """Raised when a bundle's content does not match its manifest hash."""
+
+
+def _numeric_arrays(model, scaler):
+    """Collect the arrays that define the model's numeric behaviour."""
+    arrays = {}
+    if hasattr(model, "coef_"):
+        arrays["coef"] = np.ascontiguousarray(model.coef_, dtype=np.float64)
+        arrays["intercept"] = np.ascontiguousarray(model.intercept_, dtype=np.float64)
+    elif hasattr(model, "feature_importances_"):
+        arrays["feature_importances"] = np.ascontiguousarray(model.feature_importances_, dtype=np.float64)
+    if getattr(scaler, "mean_", None) is not None:
+        arrays["scaler_mean"] = np.ascontiguousarray(scaler.mean_, dtype=np.float64)
+    if getattr(scaler, "scale_", None) is not None:
+        arrays["scaler_scale"] = np.ascontiguousarray(scaler.scale_, dtype=np.float64)
+    return arrays
+
+
+def compute_content_hash(model_type, feature_names, category_maps, arrays):
+    """SHA-256 over everything that determines a bundle's predictions."""
+    digest = hashlib.sha256()
+    digest.update(model_type.encode("utf-8"))
+    digest.update(json.dumps(list(feature_names)).encode("utf-8"))
+    digest.update(json.dumps(category_maps, sort_keys=True).encode("utf-8"))
+    for name in sorted(arrays):
+        array = np.asarray(arrays[name], dtype=np.float64)
+        digest.update(name.encode("utf-8"))
+        digest.update(str(array.shape).encode("utf-8"))
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+class ModelBundle:
+    """All artifacts of one training run, loaded as a single consistent unit."""
+
+    def __init__(self, model, scaler, label_encoders, feature_names, category_maps,
+                 manifest, arrays):
+        self.model = model
+        self.scaler = scaler
+        self.label_encoders = label_encoders
+        self.feature_names = list(feature_names)
+        self.category_maps = category_maps
+        self.manifest = manifest
+        self.arrays = arrays
+        self._kernel = None
+
+    @property
+    def content_hash(self):
+        return self.manifest["content_hash"]
+
+    @property
+    def version(self):
+        """Short, human-readable model version derived from the content hash."""
+        return self.content_hash[:12]
+
+    def as_artifacts(self):
+        """Return the legacy (model, scaler, label_encoders, feature_names) tuple."""
+        return self.model, self.scaler, self.label_encoders, self.feature_names
+
+    @property
+    def kernel(self):
+        """Compiled ScoringKernel built from the bundle arrays, or None for non-linear models."""
+        if self._kernel is None:
+            if "coef" in self.arrays and self.arrays["coef"].shape[0] == 1:
+                self._kernel = ScoringKernel.from_arrays(
+                    self.feature_names, self.arrays["coef"][0], self.arrays["intercept"][0],
+                    self.arrays.get("scaler_mean"), self.arrays.get("scaler_scale"),
+                    self.category_maps, self.model.classes_,
+                )
+            else:
+                self._kernel = False
+        return self._kernel or None
+
+    def verify(self):
+        """Recompute the content hash and raise BundleIntegrityError on mismatch."""
+        # Check both the raw arrays (kernel path) and the sklearn objects (pipeline path)
+        for arrays in (self.arrays, _numeric_arrays(self.model, self.scaler)):
+            actual = compute_content_hash(
+                self.manifest["model_type"], self.feature_names, self.category_maps, arrays
+            )
+            if actual != self.content_hash:
+                raise BundleIntegrityError(
+                    f"Bundle content hash mismatch: manifest {self.content_hash[:12]}, actual {actual[:12]}"
+                )
+        return self
+
+
+def build_bundle(model, scaler, label_encoders, feature_names, category_maps=None, metrics=None):
+    """Assemble a ModelBundle (with manifest and content hash) from training outputs."""
+    if category_maps is None:
+        category_maps = build_category_maps(label_encoders)
+    arrays = _numeric_arrays(model, scaler)
+    model_type = type(model).__name__
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model_type": model_type,
+        "sklearn_version": sklearn.__version__,
+        "n_features": len(feature_names),
+        "feature_names": list(feature_names),
+        "metrics": {key: float(value) for key, value in (metrics or {}).items()},
+        "arrays": {name: {"shape": list(a.shape), "dtype": str(a.dtype)} for name, a in arrays.items()},
+        "content_hash": compute_content_hash(model_type, feature_names, category_maps, arrays),
+    }
+    return ModelBundle(model, scaler, label_encoders, feature_names, category_maps, manifest, arrays)
+
+
+def save_bundle(bundle, models_dir=MODELS_DIR):
+    """
+    Write the bundle atomically: readers never observe a half-written file,
+    and processes that already memory-mapped the old bundle keep their copy.
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    path = os.path.join(models_dir, BUNDLE_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    payload = {
+        "manifest": bundle.manifest,
+        "arrays": bundle.arrays,
+        "model": bundle.model,
+        "scaler": bundle.scaler,
+        "label_encoders": bundle.label_encoders,
+        "feature_names": bundle.feature_names,
+        "category_maps": bundle.category_maps,
+    }
+    joblib.dump(payload, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_bundle(models_dir=MODELS_DIR, mmap_mode="r", verify=True):
+    """
+    Load the model bundle from models_dir.
+
+    Falls back to the four legacy .pkl artifacts when no bundle exists, in
+    which case the manifest is synthesized and carries no metrics.
+    """
+    path = os.path.join(models_dir, BUNDLE_FILE)
+    if not os.path.exists(path):
+        return _load_legacy_artifacts(models_dir)
+
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    manifest = payload["manifest"]
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise BundleIntegrityError(f"Unsupported bundle format {manifest.get('format_version')!r}")
+
+    bundle = ModelBundle(
+        payload["model"], payload["scaler"], payload["label_encoders"],
+        payload["feature_names"], payload["category_maps"], manifest, payload["arrays"],
+    )
+    return bundle.verify() if verify else bundle
+
+
+def _load_legacy_artifacts(models_dir):
+    model = joblib.load(os.path.join(models_dir, "churn_model.pkl"))
+    scaler = joblib.load(os.path.join(models_dir, "scaler.pkl"))
+    label_encoders = joblib.load(os.path.join(models_dir, "label_encoders.pkl"))
+    feature_names = joblib.load(os.path.join(models_dir, "feature_names.pkl"))
+    category_maps = load_category_maps(label_encoders, models_dir=models_dir)
+    return build_bundle(model, scaler, label_encoders, feature_names, category_maps)
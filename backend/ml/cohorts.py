@@ -0,0 +1,134 @@
+"""
+Columnar in-memory store of scored players for cohort analytics.
+
+The player table is scored once and kept as flat NumPy columns:
+categoricals as integer codes, numerics and engineered features as
+float64, plus churn probability and risk-level codes. Summaries filter
+with boolean masks and aggregate with bincount over a combined group key,
+so a query over the whole table costs a few vector passes.
+"""
+
+import numpy as np
+
+from backend.ml.feature_engineering import FEATURE_PLAN
+from backend.ml.predict import INPUT_COLUMNS
+from backend.ml.preprocess import CATEGORICAL_COLS
+
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+NUMERIC_COLS = [col for col in INPUT_COLUMNS if col not in CATEGORICAL_COLS]
+
+
+class CohortStore:
+    """
+    Scored players as columns.
+
+    Args:
+        df: raw player rows with INPUT_COLUMNS.
+        probabilities: churn probability per row of df.
+        levels: risk level ("LOW"/"MEDIUM"/"HIGH") per row of df.
+        model_version: version of the bundle that produced the scores.
+    """
+
+    def __init__(self, df, probabilities, levels, model_version=None):
+        self.model_version = model_version
+        self.n_rows = len(df)
+        self.categories = {}
+        self.codes = {}
+        for col in CATEGORICAL_COLS:
+            codes, uniques = df[col].astype(str).factorize(sort=True)
+            self.categories[col] = list(uniques)
+            self.codes[col] = codes.astype(np.int64)
+
+        self.numeric = {col: df[col].to_numpy(dtype=np.float64) for col in NUMERIC_COLS}
+        engineered = FEATURE_PLAN.vectorized({name: self.numeric[name] for name in FEATURE_PLAN.inputs})
+        self.features = {name: np.asarray(values, dtype=np.float64) for name, values in engineered.items()}
+        self.numeric.update(self.features)
+        self.numeric["churn_probability"] = np.asarray(probabilities, dtype=np.float64)
+
+        level_codes = {level: i for i, level in enumerate(RISK_LEVELS)}
+        self.risk_codes = np.array([level_codes[level] for level in levels], dtype=np.int64)
+
+    def info(self):
+        return {
+            "n_players": self.n_rows,
+            "model_version": self.model_version,
+            "categories": self.categories,
+            "numeric_columns": list(self.numeric),
+        }
+
+    def mask(self, filters=None, ranges=None):
+        """
+        Boolean row mask. `filters` maps a categorical column to its allowed
+        values; `ranges` maps a numeric column to an inclusive (min, max)
+        pair where either bound may be None.
+        """
+        mask = np.ones(self.n_rows, dtype=bool)
+        for col, values in (filters or {}).items():
+            if col not in self.codes:
+                raise KeyError(f"Unknown categorical column {col!r}; expected one of {list(self.codes)}")
+            allowed = [i for i, category in enumerate(self.categories[col]) if category in set(values)]
+            mask &= np.isin(self.codes[col], allowed)
+        for col, (low, high) in (ranges or {}).items():
+            if col not in self.numeric:
+                raise KeyError(f"Unknown numeric column {col!r}; expected one of {list(self.numeric)}")
+            if low is not None:
+                mask &= self.numeric[col] >= low
+            if high is not None:
+                mask &= self.numeric[col] <= high
+        return mask
+
+    def summary(self, filters=None, ranges=None, group_by=None, bins=10):
+        """
+        Aggregate the filtered players, optionally per combination of
+        `group_by` categorical columns: player count, risk-level counts and
+        shares, mean churn probability, a churn-probability histogram over
+        `bins` equal-width buckets of [0, 1], and engineered-feature means.
+        Groups without players are omitted.
+        """
+        group_by = list(group_by or [])
+        for col in group_by:
+            if col not in self.codes:
+                raise KeyError(f"Unknown group_by column {col!r}; expected one of {list(self.codes)}")
+
+        rows = np.flatnonzero(self.mask(filters, ranges))
+        shape = tuple(len(self.categories[col]) for col in group_by)
+        n_groups = int(np.prod(shape)) if group_by else 1
+        if group_by:
+            key = np.ravel_multi_index(tuple(self.codes[col][rows] for col in group_by), shape)
+        else:
+            key = np.zeros(len(rows), dtype=np.int64)
+
+        probability = self.numeric["churn_probability"][rows]
+        counts = np.bincount(key, minlength=n_groups)
+        risk = np.bincount(key * len(RISK_LEVELS) + self.risk_codes[rows], minlength=n_groups * len(RISK_LEVELS))
+        risk = risk.reshape(n_groups, len(RISK_LEVELS))
+        bucket = np.minimum((probability * bins).astype(np.int64), bins - 1)
+        histogram = np.bincount(key * bins + bucket, minlength=n_groups * bins).reshape(n_groups, bins)
+        probability_sum = np.bincount(key, weights=probability, minlength=n_groups)
+        feature_sums = {
+            name: np.bincount(key, weights=values[rows], minlength=n_groups)
+            for name, values in self.features.items()
+        }
+
+        groups = []
+        for g in np.flatnonzero(counts):
+            n = int(counts[g])
+            group_codes = np.unravel_index(g, shape) if group_by else ()
+            groups.append({
+                "group": {col: self.categories[col][int(code)] for col, code in zip(group_by, group_codes)},
+                "n_players": n,
+                "risk_levels": {level: int(risk[g, i]) for i, level in enumerate(RISK_LEVELS)},
+                "risk_share": {level: round(float(risk[g, i]) / n, 4) for i, level in enumerate(RISK_LEVELS)},
+                "mean_churn_probability": round(float(probability_sum[g]) / n, 4),
+                "probability_histogram": histogram[g].tolist(),
+                "feature_means": {name: round(float(sums[g]) / n, 4) for name, sums in feature_sums.items()},
+            })
+
+        return {
+            "n_players": int(len(rows)),
+            "n_total": self.n_rows,
+            "model_version": self.model_version,
+            "group_by": group_by,
+            "histogram_edges": np.round(np.linspace(0.0, 1.0, bins + 1), 4).tolist(),
+            "groups": groups,
+        }
@@ -1,64 +1,137 @@
 """
 Feature Engineering module for Player Churn Prediction.
 Creates derived features that improve model performance.
+
+Every derived feature is declared once in FEATURES; the batch, single-row
+and per-feature helpers below all run the compiled FEATURE_PLAN.
 """
 
 import pandas as pd
 import numpy as np
 
+from backend.ml.feature_registry import DerivedFeature, compile_feature_plan
+
+
+FEATURES = [
+    DerivedFeature(
+        "EngagementScore",
+        "SessionsPerWeek * AvgSessionDurationMinutes",
+        description="Players who play more often and longer.",
+    ),
+    DerivedFeature(
+        "ProgressionRate",
+        "PlayerLevel / (PlayTimeHours + 1)",
+        description="How fast the player levels up relative to time spent.",
+    ),
+    DerivedFeature(
+        "PurchaseFrequency",
+        "InGamePurchases / (PlayTimeHours + 1)",
+        description="Approximate purchase intent relative to time spent.",
+    ),
+    DerivedFeature(
+        "IsInactive",
+        "SessionsPerWeek <= 2",
+        dtype=int,
+        description="Flag players with very low session count as inactive.",
+    ),
+    DerivedFeature(
+        "SessionConsistency",
+        "SessionsPerWeek > 3",
+        dtype=int,
+        description="Flag players with consistent session activity.",
+    ),
+]
 
-def add_engagement_score(df):
-    """Players who play more often and longer."""
+FEATURE_PLAN = compile_feature_plan(FEATURES)
+
+ENGINEERED_FEATURES = FEATURE_PLAN.names
+
+
+_DEPENDENCIES = {feature.name: feature.dependencies for feature in FEATURE_PLAN.features}
+
+
+def wide_values(series):
+    """series as a NumPy array, with integers as int64 and floats as float64."""
+    if pd.api.types.is_integer_dtype(series):
+        return series.to_numpy(dtype=np.int64)
+    if pd.api.types.is_float_dtype(series):
+        return series.to_numpy(dtype=np.float64)
+    return series.to_numpy()
+
+
+def feature_inputs(df, name=None):
+    """
+    Input arrays for one engineered feature (or the whole plan) from df.
+
+    Integer columns are widened to int64 and float columns to float64, so
+    narrow storage dtypes (see ingest.SCHEMA) cannot overflow a product or
+    change float precision.
+    """
+    names = FEATURE_PLAN.inputs if name is None else _DEPENDENCIES[name]
+    return {col: wide_values(df[col]) for col in names}
+
+
+def _add_feature(df, name):
     df = df.copy()
-    df["EngagementScore"] = df["SessionsPerWeek"] * df["AvgSessionDurationMinutes"]
+    df[name] = FEATURE_PLAN.evaluate(name, feature_inputs(df, name))
     return df
 
 
+def add_engagement_score(df):
+    """Players who play more often and longer."""
+    return _add_feature(df, "EngagementScore")
+
+
 def add_progression_rate(df):
     """How fast the player levels up relative to time spent."""
-    df = df.copy()
-    df["ProgressionRate"] = df["PlayerLevel"] / (df["PlayTimeHours"] + 1)
-    return df
+    return _add_feature(df, "ProgressionRate")
 
 
 def add_purchase_frequency(df):
     """Approximate purchase intent relative to time spent."""
-    df = df.copy()
-    df["PurchaseFrequency"] = df["InGamePurchases"] / (df["PlayTimeHours"] + 1)
-    return df
+    return _add_feature(df, "PurchaseFrequency")
 
 
 def add_inactivity_flag(df):
     """Flag players with very low session count as inactive."""
-    df = df.copy()
-    df["IsInactive"] = (df["SessionsPerWeek"] <= 2).astype(int)
-    return df
+    return _add_feature(df, "IsInactive")
 
 
 def add_session_consistency(df):
     """Flag players with consistent session activity."""
-    df = df.copy()
-    df["SessionConsistency"] = (df["SessionsPerWeek"] > 3).astype(int)
-    return df
+    return _add_feature(df, "SessionConsistency")
+
+
+def compute_engineered_features(df):
+    """
+    Compute every engineered feature in one pass over the input columns.
 
+    Returns a dict of NumPy arrays keyed by feature name, in
+    ENGINEERED_FEATURES order, without touching df. Inputs are widened as
+    in feature_inputs.
+    """
+    return FEATURE_PLAN.vectorized(feature_inputs(df))
 
-def run_feature_engineering(df):
-    """Apply all feature engineering steps."""
-    df = add_engagement_score(df)
-    df = add_progression_rate(df)
-    df = add_purchase_frequency(df)
-    df = add_inactivity_flag(df)
-    df = add_session_consistency(df)
+
+def run_feature_engineering(df, inplace=False):
+    """
+    Apply all feature engineering steps.
+
+    Produces the same columns as chaining the add_* functions, but computes
+    them in a single fused pass. With inplace=True the columns are written
+    into df itself, which avoids copying frames the caller already owns.
+    """
+    features = compute_engineered_features(df)
+    if not inplace:
+        return df.assign(**features)
+    for name, values in features.items():
+        df[name] = values
     return df
 
 
-ENGINEERED_FEATURES = [
-    "EngagementScore",
-    "ProgressionRate",
-    "PurchaseFrequency",
-    "IsInactive",
-    "SessionConsistency",
-]
+def engineer_features_row(row):
+    """Apply all feature engineering steps to a single player dict."""
+    return {**row, **FEATURE_PLAN.scalar(row)}
 
 
 if __name__ == "__main__":
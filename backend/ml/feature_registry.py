@@ -0,0 +1,140 @@
+"""
+Declarative registry for engineered features.
+
+Each derived feature is declared once as an arithmetic/comparison
+expression over input columns (or other derived features). A set of
+declarations compiles into a FeaturePlan holding:
+- a dependency-ordered execution plan
+- a vectorized function over NumPy arrays (batches)
+- a scalar function over plain Python values (single rows)
+"""
+
+import ast
+import keyword
+
+import numpy as np
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+# Names the compiled plan functions bind themselves
+_RESERVED_NAMES = {"np", "columns"}
+
+
+class DerivedFeature:
+    """A single engineered feature declared as an expression over columns."""
+
+    def __init__(self, name, expression, dtype=None, description=""):
+        # Names are spliced into the compiled source, so they must be plain identifiers
+        valid = isinstance(name, str) and name.isidentifier() and not keyword.iskeyword(name)
+        if not valid or name in _RESERVED_NAMES:
+            raise ValueError(f"Invalid feature name {name!r}")
+        self.name = name
+        self.expression = expression
+        self.dtype = dtype
+        self.description = description
+        self.dependencies = _referenced_names(expression)
+
+    def __repr__(self):
+        return f"DerivedFeature({self.name!r}, {self.expression!r})"
+
+
+def _referenced_names(expression):
+    """Validate an expression and return the column names it references, in order."""
+    tree = ast.parse(expression, mode="eval")
+    names = []
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax {type(node).__name__} in {expression!r}")
+        if isinstance(node, ast.Name) and node.id not in names:
+            names.append(node.id)
+    return names
+
+
+def _dependency_order(features):
+    """Topologically sort features so each runs after the features it uses."""
+    by_name = {feature.name: feature for feature in features}
+    ordered, visiting, done = [], set(), set()
+
+    def visit(feature):
+        if feature.name in done:
+            return
+        if feature.name in visiting:
+            raise ValueError(f"Circular feature dependency at {feature.name!r}")
+        visiting.add(feature.name)
+        for dep in feature.dependencies:
+            if dep in by_name:
+                visit(by_name[dep])
+        visiting.discard(feature.name)
+        done.add(feature.name)
+        ordered.append(feature)
+
+    for feature in features:
+        visit(feature)
+    return ordered
+
+
+def _compile_function(fn_name, source_lines):
+    source = "\n".join(source_lines)
+    namespace = {"np": np}
+    exec(compile(source, f"<feature_plan:{fn_name}>", "exec"), namespace)
+    fn = namespace[fn_name]
+    fn.__source__ = source
+    return fn
+
+
+class FeaturePlan:
+    """Compiled, dependency-ordered execution plan for a set of derived features."""
+
+    def __init__(self, features):
+        names = [feature.name for feature in features]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate feature declarations: {duplicates}")
+
+        self.features = _dependency_order(list(features))
+        self.names = [feature.name for feature in self.features]
+        self.inputs = []
+        for feature in self.features:
+            for dep in feature.dependencies:
+                if dep not in self.names and dep not in self.inputs:
+                    self.inputs.append(dep)
+
+        self.vectorized = self._compile(vectorized=True)
+        self.scalar = self._compile(vectorized=False)
+        self._single = {feature.name: self._compile_single(feature) for feature in self.features}
+
+    def _cast(self, feature, expression, vectorized):
+        if feature.dtype is None:
+            return expression
+        if vectorized:
+            return f"({expression}).astype({feature.dtype.__name__})"
+        return f"{feature.dtype.__name__}({expression})"
+
+    def _compile(self, vectorized):
+        fn_name = "vectorized" if vectorized else "scalar"
+        lines = [f"def {fn_name}(columns):"]
+        lines += [f"    {name} = columns[{name!r}]" for name in self.inputs]
+        for feature in self.features:
+            lines.append(f"    {feature.name} = {self._cast(feature, feature.expression, vectorized)}")
+        lines.append("    return {" + ", ".join(f"{n!r}: {n}" for n in self.names) + "}")
+        return _compile_function(fn_name, lines)
+
+    def _compile_single(self, feature):
+        lines = ["def single(columns):"]
+        lines += [f"    {name} = columns[{name!r}]" for name in feature.dependencies]
+        lines.append(f"    return {self._cast(feature, feature.expression, vectorized=True)}")
+        return _compile_function("single", lines)
+
+    def evaluate(self, name, columns):
+        """Vectorized evaluation of one feature from columns that already hold its inputs."""
+        return self._single[name](columns)
+
+
+def compile_feature_plan(features):
+    """Compile DerivedFeature declarations into a FeaturePlan."""
+    return FeaturePlan(features)
@@ -0,0 +1,161 @@
+"""
+Typed ingestion of player datasets.
+
+CSV exports are parsed against an explicit schema: narrow integer and
+float32 numerics and pandas categoricals for the string columns. The
+typed frame is cached as a Feather file under DATA_CACHE_DIR (outside the
+repository by default) and reused while the CSV's size and mtime (or, if
+only the mtime moved, its content hash) are unchanged. Caching needs
+pyarrow; without it every load parses the CSV.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = {
+    "PlayerID": "int32",
+    "Age": "int8",
+    "Gender": "category",
+    "Location": "category",
+    "GameGenre": "category",
+    "PlayTimeHours": "float32",
+    "InGamePurchases": "int8",
+    "GameDifficulty": "category",
+    "SessionsPerWeek": "int8",
+    "AvgSessionDurationMinutes": "int16",
+    "PlayerLevel": "int8",
+    "AchievementsUnlocked": "int8",
+    "EngagementLevel": "category",
+}
+
+# Bump when SCHEMA or the cache layout changes so old snapshots are rebuilt
+SCHEMA_VERSION = 1
+
+DATA_CACHE = os.getenv("DATA_CACHE", "1").lower() in ("1", "true", "yes")
+DATA_CACHE_DIR = os.getenv(
+    "DATA_CACHE_DIR",
+    os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser(os.path.join("~", ".cache"))), "player-churn"),
+)
+
+
+def _narrow(series, dtype):
+    """Cast to dtype, keeping the smallest wider integer type if values do not fit."""
+    if np.issubdtype(np.dtype(dtype), np.integer) and len(series):
+        if not pd.api.types.is_integer_dtype(series) and not (series % 1 == 0).all():
+            logger.warning("%s has fractional values; loading as float64 instead of %s", series.name, dtype)
+            return series.astype(np.float64)
+        low, high = series.min(), series.max()
+        for candidate in (dtype, "int16", "int32", "int64"):
+            info = np.iinfo(candidate)
+            if np.dtype(candidate).itemsize >= np.dtype(dtype).itemsize and info.min <= low and high <= info.max:
+                if candidate != dtype:
+                    logger.warning("%s values [%s, %s] exceed %s; loading as %s",
+                                   series.name, low, high, dtype, candidate)
+                return series.astype(candidate)
+    return series.astype(dtype)
+
+
+def read_csv_typed(path):
+    """Parse a player CSV and apply SCHEMA to the columns it contains."""
+    categorical = {col: "category" for col, dtype in SCHEMA.items() if dtype == "category"}
+    df = pd.read_csv(path, dtype=categorical)
+    for col, dtype in SCHEMA.items():
+        if col in df.columns and dtype != "category":
+            if df[col].isna().any():
+                continue  # keep pandas' float dtype so missing values survive
+            df[col] = _narrow(df[col], dtype)
+    return df
+
+
+def _cache_paths(path, cache_dir=None):
+    cache_dir = cache_dir or DATA_CACHE_DIR
+    # Same-named CSVs in different directories get separate snapshots
+    source = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    stem = f"{os.path.splitext(os.path.basename(path))[0]}-{source}"
+    return os.path.join(cache_dir, f"{stem}.feather"), os.path.join(cache_dir, f"{stem}.json")
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def load_typed(path, use_cache=None, cache_dir=None):
+    """
+    Load a player CSV with SCHEMA dtypes, through the Feather cache in
+    cache_dir (default DATA_CACHE_DIR) when enabled (DATA_CACHE, default
+    on) and pyarrow is installed.
+    """
+    use_cache = DATA_CACHE if use_cache is None else use_cache
+    if not use_cache:
+        return read_csv_typed(path)
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return read_csv_typed(path)
+
+    snapshot_path, meta_path = _cache_paths(path, cache_dir)
+    stat = os.stat(path)
+    meta = _read_meta(meta_path)
+    fresh = (
+        meta is not None
+        and meta.get("schema_version") == SCHEMA_VERSION
+        and meta.get("size") == stat.st_size
+        and os.path.exists(snapshot_path)
+    )
+    if fresh and meta.get("mtime_ns") != stat.st_mtime_ns:
+        # Touched or copied but possibly unchanged: compare content before reparsing
+        fresh = meta.get("sha256") == _file_hash(path)
+        if fresh:
+            meta["mtime_ns"] = stat.st_mtime_ns
+            _write_atomic(meta_path, lambda tmp: _dump_meta(tmp, meta))
+    if fresh:
+        try:
+            return feather.read_feather(snapshot_path)
+        except Exception as exc:  # corrupt or partial snapshot: rebuild it
+            logger.warning("Ignoring unreadable data cache %s: %s", snapshot_path, exc)
+
+    df = read_csv_typed(path)
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        _write_atomic(snapshot_path, lambda tmp: feather.write_feather(df, tmp))
+        meta = {
+            "source": os.path.abspath(path),
+            "schema_version": SCHEMA_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _file_hash(path),
+        }
+        _write_atomic(meta_path, lambda tmp: _dump_meta(tmp, meta))
+    except OSError as exc:  # unwritable cache directory: serve uncached
+        logger.warning("Could not write data cache %s: %s", snapshot_path, exc)
+    return df
+
+
+def _dump_meta(path, meta):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
@@ -0,0 +1,202 @@
+"""
+Background training jobs for Player Churn Prediction.
+
+Retraining runs on a single background worker so API handlers return
+immediately with a job ID. Jobs report their current stage, progress and
+per-stage timings, can be cancelled between stages, and never overlap:
+only one job is active (and writing artifacts) at a time.
+
+Job records live in this process's memory, so the API must run as a single
+worker for job IDs to resolve on every request.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from backend.ml.predict import reload_model_bundle
+from backend.ml.train import TRAINING_STAGES, run_training_pipeline
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+# Training finished and its artifacts are on disk, but the live reload failed;
+# the next reload or restart serves the new model, so there is no need to retrain
+RELOAD_FAILED = "reload_failed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class TrainingCancelled(Exception):
+    """Raised inside a training run when its job has been cancelled."""
+
+
+class TrainingJobConflict(RuntimeError):
+    """Raised when a job is submitted while another one is still active."""
+
+    def __init__(self, active_job):
+        self.active_job = active_job
+        super().__init__(f"Training job {active_job.id} is already {active_job.status}")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def reload_after_training():
+    """Swap the freshly trained bundle in without a restart (an on_success hook)."""
+    bundle, _ = reload_model_bundle()
+    return {"model_version": bundle.version}
+
+
+class TrainingJob:
+    """Status record for one training run."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = QUEUED
+        self.stage = None
+        self.stage_timings = {}
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self._cancel_event = threading.Event()
+        # Guards the cancel check against the switch into "save", so a cancel
+        # either lands before artifacts are written or is refused
+        self._stage_lock = threading.Lock()
+        self._stage_started = None
+
+    @property
+    def progress(self):
+        if self.status == SUCCEEDED:
+            return 1.0
+        return round(len(self.stage_timings) / len(TRAINING_STAGES), 2)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "stage_timings": dict(self.stage_timings),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+    def _close_stage(self):
+        if self.stage is not None and self._stage_started is not None:
+            self.stage_timings[self.stage] = round(time.perf_counter() - self._stage_started, 3)
+            self._stage_started = None
+
+    def _enter_stage(self, name):
+        self._close_stage()
+        with self._stage_lock:
+            if self._cancel_event.is_set():
+                raise TrainingCancelled(f"Cancelled before stage {name!r}")
+            self.stage = name
+        self._stage_started = time.perf_counter()
+
+    def _request_cancel(self):
+        with self._stage_lock:
+            if self.stage == "save":
+                return False
+            self._cancel_event.set()
+            return True
+
+
+class TrainingJobManager:
+    """
+    Runs training jobs one at a time on a background thread.
+
+    Args:
+        run_pipeline: callable accepting on_stage=..., defaults to
+            run_training_pipeline.
+        on_success: optional callable run after a successful pipeline (e.g.
+            a hot model reload); its return value becomes the job result.
+            If it raises, the job ends as RELOAD_FAILED rather than FAILED.
+        max_history: number of finished jobs kept for status polling.
+    """
+
+    def __init__(self, run_pipeline=run_training_pipeline, on_success=None, max_history=50):
+        self._run_pipeline = run_pipeline
+        self._on_success = on_success
+        self._max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="training")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self):
+        """Queue a new training job; raises TrainingJobConflict if one is active."""
+        with self._lock:
+            active = self.active_job()
+            if active is not None:
+                raise TrainingJobConflict(active)
+            job = TrainingJob()
+            self._jobs[job.id] = job
+            self._trim_history()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def active_job(self):
+        return next((job for job in self._jobs.values() if job.status in ACTIVE_STATUSES), None)
+
+    def list(self):
+        return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """
+        Request cancellation. Queued jobs never start; running jobs finish
+        their current stage and stop at the next stage boundary, before
+        anything is written. Returns False if the
+        job is unknown, already finished, or already saving its artifacts.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return False
+        return job._request_cancel()
+
+    def _trim_history(self):
+        finished = [job for job in self._jobs.values() if job.status not in ACTIVE_STATUSES]
+        for job in finished[: max(0, len(finished) - self._max_history)]:
+            del self._jobs[job.id]
+
+    def _run(self, job):
+        if job._cancel_event.is_set():
+            job.status = CANCELLED
+            job.finished_at = _now()
+            return
+
+        job.status = RUNNING
+        job.started_at = _now()
+        try:
+            self._run_pipeline(on_stage=job._enter_stage)
+            job._close_stage()
+            if self._on_success is not None:
+                try:
+                    job.result = self._on_success()
+                except Exception as exc:
+                    job.status = RELOAD_FAILED
+                    job.error = f"Trained; new artifacts are on disk but reload failed: {exc}"
+                    return
+            job.status = SUCCEEDED
+        except TrainingCancelled as exc:
+            job._close_stage()
+            job.status = CANCELLED
+            job.error = str(exc)
+        except Exception as exc:
+            job._close_stage()
+            job.status = FAILED
+            job.error = str(exc)
+        finally:
+            job.finished_at = _now()
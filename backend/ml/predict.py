@@ -3,57 +3,170 @@ Prediction module for Player Churn Prediction.
 Loads trained model and makes predictions on new data.
 """
 
+import argparse
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-import joblib
 import os
 
+from backend.ml.bundle import BUNDLE_FILE, load_bundle
 from backend.ml.feature_engineering import run_feature_engineering
-from backend.ml.preprocess import MODELS_DIR
+from backend.ml.ingest import DATA_CACHE_DIR
+from backend.ml.preprocess import CATEGORICAL_COLS, MODELS_DIR, InvalidNumericError, encode_with_maps
+from backend.ml.score_store import ScoreStore, row_hashes
+
+logger = logging.getLogger(__name__)
+
+INPUT_COLUMNS = [
+    "Age", "Gender", "Location", "GameGenre", "PlayTimeHours",
+    "InGamePurchases", "GameDifficulty", "SessionsPerWeek",
+    "AvgSessionDurationMinutes", "PlayerLevel", "AchievementsUnlocked",
+]
+DEFAULT_CHUNKSIZE = 50_000
+
+# Module-level cache so model artifacts are loaded once, not on every call.
+# Hot reloads replace this reference in one assignment; callers take one
+# snapshot per request so a swap never mixes artifacts from two bundles.
+_cached_bundle = None
+_reload_lock = threading.Lock()
+
+# Fixed players every candidate bundle must score sanely before going live
+CANARY_PLAYERS = [
+    {"Age": 25, "Gender": "Male", "Location": "USA", "GameGenre": "Action",
+     "PlayTimeHours": 10.5, "InGamePurchases": 1, "GameDifficulty": "Medium",
+     "SessionsPerWeek": 5, "AvgSessionDurationMinutes": 90, "PlayerLevel": 30,
+     "AchievementsUnlocked": 15},
+    {"Age": 45, "Gender": "Female", "Location": "Other", "GameGenre": "Strategy",
+     "PlayTimeHours": 0.0, "InGamePurchases": 0, "GameDifficulty": "Easy",
+     "SessionsPerWeek": 0, "AvgSessionDurationMinutes": 10, "PlayerLevel": 1,
+     "AchievementsUnlocked": 0},
+    {"Age": 22, "Gender": "Female", "Location": "Europe", "GameGenre": "RPG",
+     "PlayTimeHours": 24.0, "InGamePurchases": 1, "GameDifficulty": "Hard",
+     "SessionsPerWeek": 20, "AvgSessionDurationMinutes": 180, "PlayerLevel": 100,
+     "AchievementsUnlocked": 50},
+]
 
-# Module-level cache so model artifacts are loaded once, not on every call
-_cached_artifacts = None
+
+def get_model_bundle():
+    """Load the model bundle (cached after first call)."""
+    global _cached_bundle
+    if _cached_bundle is None:
+        with _reload_lock:
+            if _cached_bundle is None:
+                _cached_bundle = load_bundle()
+    return _cached_bundle
+
+
+def current_model_bundle():
+    """Return the live bundle without triggering a load (None if not loaded yet)."""
+    return _cached_bundle
 
 
 def load_model():
     """Load the trained model and artifacts (cached after first call)."""
-    global _cached_artifacts
-    if _cached_artifacts is not None:
-        return _cached_artifacts
-    model = joblib.load(os.path.join(MODELS_DIR, "churn_model.pkl"))
-    scaler = joblib.load(os.path.join(MODELS_DIR, "scaler.pkl"))
-    label_encoders = joblib.load(os.path.join(MODELS_DIR, "label_encoders.pkl"))
-    feature_names = joblib.load(os.path.join(MODELS_DIR, "feature_names.pkl"))
-    _cached_artifacts = (model, scaler, label_encoders, feature_names)
-    return _cached_artifacts
+    return get_model_bundle().as_artifacts()
 
 
-def predict_single(player_data: dict) -> dict:
+def get_category_maps():
+    """Return the exported {column: {category: code}} lookup tables."""
+    return get_model_bundle().category_maps
+
+
+def get_scoring_kernel():
+    """Return the compiled scoring kernel, or None for non-linear models."""
+    return get_model_bundle().kernel
+
+
+def validate_bundle(bundle, canary=None):
     """
-    Predict churn for a single player.
+    Score a canary batch with a candidate bundle before it goes live.
+
+    Raises ValueError if any probability is not a finite value in [0, 1]
+    or the compiled kernel disagrees with the sklearn pipeline.
+    """
+    canary = pd.DataFrame(canary if canary is not None else CANARY_PLAYERS)
+    scored = predict_batch(canary[INPUT_COLUMNS], bundle=bundle)
+    if scored["error"].notna().any():
+        raise ValueError(f"Canary batch failed: {scored['error'].dropna().tolist()}")
+
+    probability = scored["churn_probability"].to_numpy(dtype=np.float64)
+    if not np.all(np.isfinite(probability)) or probability.min() < 0 or probability.max() > 1:
+        raise ValueError(f"Canary probabilities out of range: {probability.tolist()}")
+
+    if bundle.kernel is not None:
+        kernel_probability = [bundle.kernel.score(row)[1] for row in canary.to_dict(orient="records")]
+        if not np.allclose(kernel_probability, probability, atol=1e-6):
+            raise ValueError("Scoring kernel disagrees with the sklearn pipeline on the canary batch")
+    return bundle
 
-    Args:
-        player_data: dict with keys matching dataset columns, e.g.:
-            {
-                "Age": 25, "Gender": "Male", "Location": "USA",
-                "GameGenre": "Action", "PlayTimeHours": 10.5,
-                "InGamePurchases": 1, "GameDifficulty": "Medium",
-                "SessionsPerWeek": 5, "AvgSessionDurationMinutes": 90,
-                "PlayerLevel": 30, "AchievementsUnlocked": 15
-            }
+
+def reload_model_bundle(models_dir=MODELS_DIR, canary=None):
+    """
+    Load, validate and atomically swap in the bundle currently on disk.
+
+    In-flight requests keep the snapshot they already hold; later calls to
+    get_model_bundle() see the new one. If loading or validation fails the
+    live bundle is left untouched and the error propagates.
 
     Returns:
-        dict with prediction, probability, and risk level.
+        (new_bundle, previous_bundle)
     """
-    model, scaler, label_encoders, feature_names = load_model()
+    global _cached_bundle
+    with _reload_lock:
+        candidate = validate_bundle(load_bundle(models_dir), canary)
+        previous = _cached_bundle
+        _cached_bundle = candidate
+    return candidate, previous
+
+
+def start_bundle_watcher(interval_seconds, models_dir=MODELS_DIR):
+    """
+    Poll the bundle file and hot-reload it in a daemon thread when it changes.
+    Failed reloads are logged and retried on the next change.
+    """
+    path = os.path.join(models_dir, BUNDLE_FILE)
+
+    def _mtime():
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
 
-    df = pd.DataFrame([player_data])
+    def _watch():
+        last_seen = _mtime()
+        while True:
+            time.sleep(interval_seconds)
+            current = _mtime()
+            if current is None or current == last_seen:
+                continue
+            last_seen = current
+            try:
+                new, old = reload_model_bundle(models_dir)
+                logger.info("Hot-reloaded model bundle %s -> %s",
+                            old.version if old else None, new.version)
+            except Exception as exc:
+                logger.warning("Model bundle reload failed, keeping current model: %s", exc)
+
+    thread = threading.Thread(target=_watch, name="bundle-watcher", daemon=True)
+    thread.start()
+    return thread
+
+
+def _predict_with_pipeline(player_data, bundle=None):
+    """Score one player through the pandas/sklearn pipeline."""
+    bundle = bundle or get_model_bundle()
+    model, scaler, label_encoders, feature_names = bundle.as_artifacts()
 
     # Encode categoricals
-    categorical_cols = ["Gender", "Location", "GameGenre", "GameDifficulty"]
-    for col in categorical_cols:
-        if col in df.columns:
-            df[col] = label_encoders[col].transform(df[col])
+    df, errors = encode_with_maps(pd.DataFrame([player_data]), bundle.category_maps)
+    if errors[0] is not None:
+        raise errors[0]
 
     # Feature engineering
     df = run_feature_engineering(df)
@@ -67,6 +180,31 @@ def predict_single(player_data: dict) -> dict:
     # Predict
     prediction = model.predict(df_scaled)[0]
     probability = model.predict_proba(df_scaled)[0][1]
+    return prediction, probability
+
+
+def predict_single(player_data: dict) -> dict:
+    """
+    Predict churn for a single player.
+
+    Args:
+        player_data: dict with keys matching dataset columns, e.g.:
+            {
+                "Age": 25, "Gender": "Male", "Location": "USA",
+                "GameGenre": "Action", "PlayTimeHours": 10.5,
+                "InGamePurchases": 1, "GameDifficulty": "Medium",
+                "SessionsPerWeek": 5, "AvgSessionDurationMinutes": 90,
+                "PlayerLevel": 30, "AchievementsUnlocked": 15
+            }
+
+    Returns:
+        dict with prediction, probability, and risk level.
+    """
+    bundle = get_model_bundle()
+    if bundle.kernel is not None:
+        prediction, probability = bundle.kernel.score(player_data)
+    else:
+        prediction, probability = _predict_with_pipeline(player_data, bundle)
 
     # Risk level (UPPERCASE to match workflow.py convention)
     if probability >= 0.7:
@@ -83,7 +221,323 @@ def predict_single(player_data: dict) -> dict:
     }
 
 
-if __name__ == "__main__":
+def risk_levels(probabilities):
+    """Vectorized risk bucketing matching predict_single."""
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return np.select(
+        [probabilities >= 0.7, probabilities >= 0.4], ["HIGH", "MEDIUM"], default="LOW"
+    ).astype(object)
+
+
+def predict_batch(df, bundle=None, return_errors=False):
+    """
+    Predict churn for many players in one vectorized pass.
+
+    Args:
+        df: DataFrame of raw player rows (same columns as predict_single input).
+        bundle: ModelBundle to score with (defaults to the live bundle).
+        return_errors: also return the per-row exceptions.
+
+    Returns:
+        DataFrame aligned with df's index with columns churned,
+        churn_probability (unrounded), risk_level and error. Rows with a
+        category unseen during training or a missing or non-numeric numeric
+        input are not scored; error explains why. With return_errors, a
+        (DataFrame, errors) pair where errors holds the UnknownCategoryError
+        or InvalidNumericError of each unscored row and None otherwise.
+    """
+    bundle = bundle or get_model_bundle()
+    model, scaler, label_encoders, feature_names = bundle.as_artifacts()
+
+    result = pd.DataFrame(
+        {
+            "churned": pd.array([pd.NA] * len(df), dtype="Int64"),
+            "churn_probability": np.nan,
+            "risk_level": None,
+            "error": None,
+        },
+        index=df.index,
+    )
+
+    # Reject unseen categories per row instead of failing the whole batch
+    encoded, errors = encode_with_maps(df, bundle.category_maps)
+    for col in INPUT_COLUMNS:
+        if col in CATEGORICAL_COLS or col not in encoded.columns:
+            continue
+        values = pd.to_numeric(encoded[col], errors="coerce")
+        for pos in np.flatnonzero(values.isna().to_numpy()):
+            if errors[pos] is None:
+                errors[pos] = InvalidNumericError(col, df[col].iloc[pos])
+        encoded[col] = values
+    valid = np.array([err is None for err in errors], dtype=bool)
+    if not valid.all():
+        result.loc[~valid, "error"] = [str(err) for err in errors if err is not None]
+    if not valid.any():
+        return (result, errors) if return_errors else result
+
+    X = encoded.loc[valid]
+    X = run_feature_engineering(X, inplace=True)[feature_names]
+    X_scaled = pd.DataFrame(scaler.transform(X), columns=feature_names, index=X.index)
+
+    proba = model.predict_proba(X_scaled)
+    probability = proba[:, 1]
+    result.loc[valid, "churned"] = model.classes_[np.argmax(proba, axis=1)]
+    result.loc[valid, "churn_probability"] = probability
+    result.loc[valid, "risk_level"] = risk_levels(probability)
+    return (result, errors) if return_errors else result
+
+
+# ---------------------------------------------------------------------------
+# Offline file scoring
+# ---------------------------------------------------------------------------
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:  # pragma: no cover - optional dependency at runtime
+        raise ImportError("Parquet input/output requires pyarrow: pip install pyarrow") from exc
+    return pyarrow
+
+
+def iter_input_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of at most chunksize rows from a CSV or Parquet file."""
+    if _is_parquet(path):
+        pa = _require_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def score_chunk(chunk):
+    """Score one chunk of raw player rows into the offline output layout."""
+    missing = [col for col in INPUT_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    scored = predict_batch(chunk[INPUT_COLUMNS])
+    out = pd.DataFrame(index=chunk.index)
+    if "PlayerID" in chunk.columns:
+        out["PlayerID"] = chunk["PlayerID"]
+    out["churned"] = scored["churned"]
+    out["churn_probability"] = scored["churn_probability"].round(4)
+    out["risk_level"] = scored["risk_level"].astype("string")
+    out["error"] = scored["error"].astype("string")
+    return out.reset_index(drop=True)
+
+
+class ScoreWriter:
+    """Append scored chunks to a CSV or Parquet file without holding them in memory."""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._schema = None
+        self._wrote_header = False
+
+    def write(self, frame):
+        if _is_parquet(self.path):
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._schema = table.schema
+                self._parquet_writer = pa.parquet.ParquetWriter(self.path, self._schema)
+            self._parquet_writer.write_table(table.cast(self._schema))
+        else:
+            frame.to_csv(self.path, mode="a" if self._wrote_header else "w",
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def score_file(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Score a CSV/Parquet player export chunk by chunk.
+
+    Only one chunk is in memory at a time, so memory stays bounded by
+    chunksize regardless of the input size.
+
+    Returns:
+        dict with rows, failed and seconds.
+    """
+    start = time.perf_counter()
+    rows = failed = 0
+    with ScoreWriter(output_path) as writer:
+        for chunk in iter_input_chunks(input_path, chunksize):
+            out = score_chunk(chunk)
+            writer.write(out)
+            rows += len(out)
+            failed += int(out["error"].notna().sum())
+    return {"rows": rows, "failed": failed, "seconds": round(time.perf_counter() - start, 3)}
+
+
+DELTA_COLUMNS = {
+    "PlayerID": "string",
+    "previous_risk_level": "string",
+    "risk_level": "string",
+    "previous_churn_probability": "float64",
+    "churn_probability": "float64",
+    "transition": "string",
+}
+
+
+def rescore_file(input_path, store_path, delta_path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Incrementally rescore a CSV/Parquet player export against a score store.
+
+    Each player's input row is hashed and compared with the score store;
+    only new players, changed rows and rows scored by a different model
+    version are scored. Their scores are written back to the store, and
+    every player whose risk level changed (or who is new) is written to
+    delta_path with a transition such as LOW->HIGH or NEW->MEDIUM.
+
+    Returns:
+        dict with rows, unchanged, new, changed, failed, transitions and seconds.
+    """
+    start = time.perf_counter()
+    bundle = get_model_bundle()
+    stats = {"rows": 0, "unchanged": 0, "new": 0, "changed": 0, "failed": 0, "transitions": 0}
+
+    with ScoreStore(store_path) as store, ScoreWriter(delta_path) as writer:
+        wrote_delta = False
+        for chunk in iter_input_chunks(input_path, chunksize):
+            missing = [col for col in ["PlayerID", *INPUT_COLUMNS] if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing columns: {missing}")
+            chunk = chunk.drop_duplicates("PlayerID", keep="last")
+            ids = chunk["PlayerID"].astype(str).to_numpy()
+            hashes = row_hashes(chunk[INPUT_COLUMNS])
+
+            previous = store.lookup(ids).reindex(ids)
+            known = previous["row_hash"].notna().to_numpy()
+            same = known & (previous["row_hash"].to_numpy(dtype=np.int64, na_value=0) == hashes)
+            same &= (previous["model_version"] == bundle.version).to_numpy()
+            stale = ~same
+            stats["rows"] += len(chunk)
+            stats["unchanged"] += int(same.sum())
+            if not stale.any():
+                continue
+
+            scored = predict_batch(chunk.loc[stale, INPUT_COLUMNS], bundle=bundle)
+            ok = scored["error"].isna().to_numpy()
+            stats["failed"] += int((~ok).sum())
+            rows = np.flatnonzero(stale)[ok]
+            stats["new"] += int((~known[rows]).sum())
+            stats["changed"] += int(known[rows].sum())
+
+            scored = scored.loc[ok]
+            probability = scored["churn_probability"].to_numpy(dtype=np.float64).round(4)
+            levels = scored["risk_level"].to_numpy()
+            store.upsert(ids[rows], hashes[rows], scored["churned"].to_numpy(dtype=np.int64),
+                         probability, levels, bundle.version)
+
+            previous_levels = previous["risk_level"].to_numpy()[rows]
+            moved = pd.isna(previous_levels) | (previous_levels != levels)
+            if moved.any():
+                prior = np.where(pd.isna(previous_levels[moved]), "NEW", previous_levels[moved]).astype(object)
+                delta = pd.DataFrame({
+                    "PlayerID": ids[rows][moved],
+                    "previous_risk_level": previous_levels[moved],
+                    "risk_level": levels[moved],
+                    "previous_churn_probability": previous["churn_probability"].to_numpy()[rows][moved],
+                    "churn_probability": probability[moved],
+                    "transition": prior + "->" + levels[moved],
+                }).astype(DELTA_COLUMNS)
+                writer.write(delta)
+                wrote_delta = True
+                stats["transitions"] += len(delta)
+
+        if not wrote_delta:
+            writer.write(pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in DELTA_COLUMNS.items()}))
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def _init_worker():
+    """Load artifacts once per worker (a no-op when inherited through fork)."""
+    load_model()
+
+
+def _score_chunk_task(chunk):
+    start = time.perf_counter()
+    out = score_chunk(chunk)
+    return os.getpid(), time.perf_counter() - start, out
+
+
+def score_file_parallel(input_path, output_path, workers=2, chunksize=DEFAULT_CHUNKSIZE,
+                        max_pending=None):
+    """
+    Score a CSV/Parquet player export across a pool of worker processes.
+
+    Chunks are read in the parent and dispatched to workers; results are
+    written back strictly in input order. At most max_pending chunks
+    (default 2 * workers) are in flight, so memory stays bounded. Model
+    artifacts are loaded in the parent before the pool starts so forked
+    workers inherit them instead of receiving a pickled copy per task.
+
+    Returns:
+        dict with rows, failed, seconds and per-worker throughput.
+    """
+    max_pending = max_pending or 2 * workers
+    load_model()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+    start = time.perf_counter()
+    rows = failed = 0
+    per_worker = {}
+
+    def _drain_one(pending, writer):
+        nonlocal rows, failed
+        pid, busy, out = pending.popleft().result()
+        writer.write(out)
+        rows += len(out)
+        failed += int(out["error"].notna().sum())
+        stats = per_worker.setdefault(pid, {"chunks": 0, "rows": 0, "seconds": 0.0})
+        stats["chunks"] += 1
+        stats["rows"] += len(out)
+        stats["seconds"] += busy
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker) as pool, \
+            ScoreWriter(output_path) as writer:
+        pending = deque()
+        for chunk in iter_input_chunks(input_path, chunksize):
+            pending.append(pool.submit(_score_chunk_task, chunk))
+            if len(pending) >= max_pending:
+                _drain_one(pending, writer)
+        while pending:
+            _drain_one(pending, writer)
+
+    for stats in per_worker.values():
+        stats["seconds"] = round(stats["seconds"], 3)
+        stats["rows_per_sec"] = round(stats["rows"] / stats["seconds"], 1) if stats["seconds"] else None
+
+    return {
+        "rows": rows,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - start, 3),
+        "workers": per_worker,
+    }
+
+
+def _run_sample():
     sample = {
         "Age": 25,
         "Gender": "Male",
@@ -101,3 +555,55 @@ if __name__ == "__main__":
     print(f"Prediction: {'Churned' if result['churned'] else 'Active'}")
     print(f"Churn Probability: {result['churn_probability']:.2%}")
     print(f"Risk Level: {result['risk_level']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m backend.ml.predict",
+                                     description="Player churn prediction")
+    subparsers = parser.add_subparsers(dest="command")
+
+    score = subparsers.add_parser("score", help="Score a CSV/Parquet player export")
+    score.add_argument("--input", required=True, help="Input .csv or .parquet file")
+    score.add_argument("--output", required=True, help="Output .csv or .parquet file")
+    score.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                       help=f"Rows per chunk (default {DEFAULT_CHUNKSIZE})")
+    score.add_argument("--workers", type=int, default=1,
+                       help="Worker processes; 1 scores in-process (default 1)")
+
+    rescore = subparsers.add_parser(
+        "rescore", help="Rescore only new or changed players against a persisted score store"
+    )
+    rescore.add_argument("--input", required=True, help="Input .csv or .parquet export with PlayerID")
+    rescore.add_argument("--store", default=os.path.join(DATA_CACHE_DIR, "player_scores.sqlite3"),
+                         help="SQLite score store (created if missing; default under DATA_CACHE_DIR)")
+    rescore.add_argument("--delta", required=True,
+                         help="Output .csv or .parquet file of risk-level transitions")
+    rescore.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                         help=f"Rows per chunk (default {DEFAULT_CHUNKSIZE})")
+
+    args = parser.parse_args(argv)
+    if args.command == "rescore":
+        stats = rescore_file(args.input, args.store, args.delta, chunksize=args.chunksize)
+        print(f"Checked {stats['rows']} players in {stats['seconds']}s — "
+              f"{stats['unchanged']} unchanged, {stats['new']} new, {stats['changed']} rescored, "
+              f"{stats['failed']} failed")
+        print(f"{stats['transitions']} risk-level transitions written to {args.delta}")
+    elif args.command == "score":
+        if args.workers > 1:
+            stats = score_file_parallel(args.input, args.output, workers=args.workers,
+                                        chunksize=args.chunksize)
+        else:
+            stats = score_file(args.input, args.output, chunksize=args.chunksize)
+        rate = stats["rows"] / stats["seconds"] if stats["seconds"] else float("inf")
+        print(f"Scored {stats['rows']} rows ({stats['failed']} failed) "
+              f"in {stats['seconds']}s — {rate:,.0f} rows/sec")
+        for pid, worker in sorted(stats.get("workers", {}).items()):
+            print(f"  worker {pid}: {worker['rows']} rows in {worker['chunks']} chunks, "
+                  f"{worker['rows_per_sec'] or 0:,.0f} rows/sec")
+        print(f"Results written to {args.output}")
+    else:
+        _run_sample()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,18 +8,45 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import joblib
+import json
 import os
 
+from backend.ml.ingest import load_typed
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DATA_PATH = os.path.join(BASE_DIR, "data", "online_gaming_behavior_dataset.csv")
 MODELS_DIR = os.path.join(BASE_DIR, "backend", "models")
+CATEGORY_MAPS_FILE = "category_maps.json"
 
+CATEGORICAL_COLS = ["Gender", "Location", "GameGenre", "GameDifficulty"]
+
+
+class UnknownCategoryError(ValueError):
+    """Raised when a categorical value was not seen during training."""
+
+    def __init__(self, column, value, allowed):
+        self.column = column
+        self.value = value
+        self.allowed = list(allowed)
+        super().__init__(f"Unknown {column} value {value!r}; expected one of {self.allowed}")
 
-def load_data(path=DATA_PATH):
-    """Load the raw CSV dataset."""
-    df = pd.read_csv(path)
-    return df
+
+class InvalidNumericError(ValueError):
+    """Raised when a numeric input is missing or not a number."""
+
+    def __init__(self, column, value):
+        self.column = column
+        self.value = value
+        super().__init__(f"Missing or non-numeric {column} value {value!r}")
+
+
+def load_data(path=DATA_PATH, use_cache=None, cache_dir=None):
+    """
+    Load the raw CSV dataset with typed columns (see backend.ml.ingest):
+    narrow numerics, categoricals for string columns, and a Feather
+    snapshot reused until the CSV changes.
+    """
+    return load_typed(path, use_cache=use_cache, cache_dir=cache_dir)
 
 
 def create_target(df):
@@ -29,32 +56,92 @@ def create_target(df):
     return df
 
 
-def encode_categoricals(df, fit=True, label_encoders=None):
+def encode_categoricals(df, fit=True, label_encoders=None, save=True):
     """
     Encode categorical columns using LabelEncoder.
-    If fit=True, fit new encoders and save them.
+    If fit=True, fit new encoders and save them (unless save=False).
     If fit=False, use provided label_encoders to transform.
     """
     df = df.copy()
-    categorical_cols = ["Gender", "Location", "GameGenre", "GameDifficulty"]
 
     if fit:
         label_encoders = {}
-        for col in categorical_cols:
+        for col in CATEGORICAL_COLS:
             le = LabelEncoder()
             df[col] = le.fit_transform(df[col])
             label_encoders[col] = le
-        os.makedirs(MODELS_DIR, exist_ok=True)
-        joblib.dump(label_encoders, os.path.join(MODELS_DIR, "label_encoders.pkl"))
+        if save:
+            save_label_encoders(label_encoders)
     else:
         if label_encoders is None:
             label_encoders = joblib.load(os.path.join(MODELS_DIR, "label_encoders.pkl"))
-        for col in categorical_cols:
+        for col in CATEGORICAL_COLS:
             df[col] = label_encoders[col].transform(df[col])
 
     return df, label_encoders
 
 
+def save_label_encoders(label_encoders, models_dir=MODELS_DIR):
+    """Persist fitted encoders and their category lookup tables."""
+    os.makedirs(models_dir, exist_ok=True)
+    joblib.dump(label_encoders, os.path.join(models_dir, "label_encoders.pkl"))
+    save_category_maps(build_category_maps(label_encoders), models_dir=models_dir)
+
+
+def build_category_maps(label_encoders):
+    """Turn fitted LabelEncoders into plain {column: {category: code}} dicts."""
+    return {
+        col: {str(label): code for code, label in enumerate(le.classes_)}
+        for col, le in label_encoders.items()
+    }
+
+
+def save_category_maps(category_maps, models_dir=MODELS_DIR):
+    """Persist the category lookup tables next to the other model artifacts."""
+    os.makedirs(models_dir, exist_ok=True)
+    with open(os.path.join(models_dir, CATEGORY_MAPS_FILE), "w", encoding="utf-8") as f:
+        json.dump(category_maps, f, indent=2)
+
+
+def load_category_maps(label_encoders=None, models_dir=MODELS_DIR):
+    """
+    Load the exported category lookup tables.
+    Falls back to deriving them from label_encoders for models trained
+    before the tables were exported.
+    """
+    path = os.path.join(models_dir, CATEGORY_MAPS_FILE)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if label_encoders is None:
+        label_encoders = joblib.load(os.path.join(models_dir, "label_encoders.pkl"))
+    return build_category_maps(label_encoders)
+
+
+def encode_with_maps(df, category_maps):
+    """
+    Vectorized categorical encoding with precomputed lookup tables.
+
+    Returns (encoded copy of df, errors) where errors is a list aligned with
+    df's rows holding an UnknownCategoryError for rows with an unseen value
+    (those rows keep NaN codes) and None otherwise.
+    """
+    df = df.copy()
+    errors = [None] * len(df)
+    for col in CATEGORICAL_COLS:
+        if col not in df.columns:
+            continue
+        mapping = category_maps[col]
+        codes = df[col].map(mapping)
+        unknown = codes.isna().to_numpy()
+        if unknown.any():
+            for pos in np.flatnonzero(unknown):
+                if errors[pos] is None:
+                    errors[pos] = UnknownCategoryError(col, df[col].iloc[pos], mapping)
+        df[col] = codes
+    return df, errors
+
+
 def split_data(df, test_size=0.2, random_state=42):
     """Split into train/test sets."""
     X = df.drop(columns=["PlayerID", "EngagementLevel", "Churned"])
@@ -62,10 +149,10 @@ def split_data(df, test_size=0.2, random_state=42):
     return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
 
 
-def scale_features(X_train, X_test, fit=True, scaler=None):
+def scale_features(X_train, X_test, fit=True, scaler=None, save=True):
     """
     Scale features using StandardScaler.
-    If fit=True, fit new scaler and save it.
+    If fit=True, fit new scaler and save it (unless save=False).
     If fit=False, use provided scaler to transform.
     """
     if fit:
@@ -76,8 +163,9 @@ def scale_features(X_train, X_test, fit=True, scaler=None):
         X_test_scaled = pd.DataFrame(
             scaler.transform(X_test), columns=X_test.columns, index=X_test.index
         )
-        os.makedirs(MODELS_DIR, exist_ok=True)
-        joblib.dump(scaler, os.path.join(MODELS_DIR, "scaler.pkl"))
+        if save:
+            os.makedirs(MODELS_DIR, exist_ok=True)
+            joblib.dump(scaler, os.path.join(MODELS_DIR, "scaler.pkl"))
     else:
         if scaler is None:
             scaler = joblib.load(os.path.join(MODELS_DIR, "scaler.pkl"))
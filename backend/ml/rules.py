@@ -0,0 +1,233 @@
+"""
+Data-driven rule engine for recommendations and heuristic risk signals.
+
+rules.json declares named conditions (comparison expressions over player
+columns) and ordered rule sets that map conditions to text. The table is
+compiled once into a RuleBook that evaluates:
+- every condition as a boolean NumPy mask over a batch, and each rule set
+  as a (rules x rows) mask matrix turned into per-row text lists
+- the same conditions and rule sets over plain Python values (single rows)
+
+Rules fire in order. A rule with a `group` is skipped once an earlier rule
+of that group fired (an if/elif chain), and an `otherwise` rule fires only
+when no earlier rule of its set fired. `limit` caps the texts per row.
+"""
+
+import ast
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.ml.feature_engineering import FEATURE_PLAN, feature_inputs, wide_values
+
+RULES_PATH = os.getenv("RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json"))
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub,
+    ast.BitAnd, ast.BitOr,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+
+class Condition:
+    """A named boolean expression over player columns."""
+
+    def __init__(self, name, expression):
+        self.name = name
+        self.expression = expression
+        tree = ast.parse(expression, mode="eval")
+        self.inputs = []
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"Unsupported syntax {type(node).__name__} in condition {name!r}")
+            if isinstance(node, ast.Name) and node.id not in self.inputs:
+                self.inputs.append(node.id)
+        self._code = compile(tree, f"<condition:{name}>", "eval")
+
+    def __call__(self, values):
+        return eval(self._code, {"__builtins__": {}}, values)
+
+    def __repr__(self):
+        return f"Condition({self.name!r}, {self.expression!r})"
+
+
+class Rule:
+    """One ordered entry of a rule set: emit `text` when every `when` condition holds."""
+
+    def __init__(self, text, when=(), group=None, otherwise=False):
+        self.text = text
+        self.when = list(when)
+        self.group = group
+        self.otherwise = bool(otherwise)
+
+
+class RuleSet:
+    """Ordered rules evaluated against precomputed condition values."""
+
+    def __init__(self, name, rules, limit=None):
+        self.name = name
+        self.rules = list(rules)
+        self.limit = limit
+        self.conditions = []
+        for rule in self.rules:
+            for condition in rule.when:
+                if condition not in self.conditions:
+                    self.conditions.append(condition)
+
+    def apply(self, signals):
+        """Texts fired for one row, given its condition values."""
+        texts, fired_groups = [], set()
+        for rule in self.rules:
+            if rule.otherwise and texts:
+                continue
+            if rule.group is not None and rule.group in fired_groups:
+                continue
+            if all(signals[condition] for condition in rule.when):
+                texts.append(rule.text)
+                if rule.group is not None:
+                    fired_groups.add(rule.group)
+        return texts if self.limit is None else texts[: self.limit]
+
+    def masks(self, signal_masks, n_rows):
+        """(rules x rows) boolean matrix of the rules that fire for each row."""
+        fired = np.zeros((len(self.rules), n_rows), dtype=bool)
+        any_fired = np.zeros(n_rows, dtype=bool)
+        group_fired = {}
+        for i, rule in enumerate(self.rules):
+            mask = np.ones(n_rows, dtype=bool)
+            for condition in rule.when:
+                mask &= signal_masks[condition]
+            if rule.otherwise:
+                mask &= ~any_fired
+            if rule.group is not None:
+                taken = group_fired.setdefault(rule.group, np.zeros(n_rows, dtype=bool))
+                mask &= ~taken
+                taken |= mask
+            fired[i] = mask
+            any_fired |= mask
+        if self.limit is not None:
+            fired &= np.cumsum(fired, axis=0) <= self.limit
+        return fired
+
+    def apply_batch(self, signal_masks, n_rows):
+        """
+        Texts fired for every row. Rows with the same firing pattern share one
+        list object, so copy a row's list before mutating it.
+        """
+        if n_rows == 0:
+            return []
+        fired = self.masks(signal_masks, n_rows)
+        if len(self.rules) <= 63:
+            codes = (np.uint64(1) << np.arange(len(self.rules), dtype=np.uint64)) @ fired.astype(np.uint64)
+            patterns, inverse = np.unique(codes, return_inverse=True)
+            fired_rules = [[bool(code >> np.uint64(i) & np.uint64(1)) for i in range(len(self.rules))] for code in patterns]
+        else:
+            patterns, inverse = np.unique(np.packbits(fired.T, axis=1), axis=0, return_inverse=True)
+            fired_rules = np.unpackbits(patterns, axis=1, count=len(self.rules)).astype(bool).tolist()
+        texts = [[rule.text for rule, on in zip(self.rules, row) if on] for row in fired_rules]
+        return [texts[k] for k in inverse.ravel().tolist()]
+
+
+class RuleBook:
+    """Compiled conditions and rule sets loaded from a rule table."""
+
+    def __init__(self, conditions, rule_sets):
+        self.conditions = {name: Condition(name, expression) for name, expression in conditions.items()}
+        self.rule_sets = {}
+        for name, spec in rule_sets.items():
+            rules = [Rule(**rule) for rule in spec["rules"]]
+            for rule in rules:
+                unknown = [c for c in rule.when if c not in self.conditions]
+                if unknown:
+                    raise ValueError(f"Rule set {name!r} references unknown conditions {unknown}")
+            self.rule_sets[name] = RuleSet(name, rules, spec.get("limit"))
+
+    @classmethod
+    def from_dict(cls, table):
+        return cls(table.get("conditions", {}), table.get("rule_sets", {}))
+
+    def __getitem__(self, name):
+        return self.rule_sets[name]
+
+    def _conditions_for(self, rule_sets):
+        if rule_sets is None:
+            return list(self.conditions)
+        names = []
+        for rule_set in rule_sets:
+            for condition in self.rule_sets[rule_set].conditions:
+                if condition not in names:
+                    names.append(condition)
+        return names
+
+    def inputs(self, rule_sets=None):
+        """Columns referenced by the conditions of the given rule sets (default: all)."""
+        names = []
+        for condition in self._conditions_for(rule_sets):
+            for name in self.conditions[condition].inputs:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def signals(self, row, rule_sets=None):
+        """Evaluate conditions for one row; missing columns count as 0."""
+        conditions = self._conditions_for(rule_sets)
+        values = {name: row.get(name, 0) for name in self.inputs(rule_sets)}
+        return {name: bool(self.conditions[name](values)) for name in conditions}
+
+    def signal_masks(self, columns, n_rows, rule_sets=None):
+        """Evaluate conditions as boolean masks over column arrays of length n_rows."""
+        conditions = self._conditions_for(rule_sets)
+        return {
+            name: np.broadcast_to(np.asarray(self.conditions[name](columns), dtype=bool), (n_rows,))
+            for name in conditions
+        }
+
+    def evaluate(self, rule_set, row):
+        """Texts of one rule set for one row."""
+        return self.rule_sets[rule_set].apply(self.signals(row, [rule_set]))
+
+    def evaluate_batch(self, rule_set, columns, n_rows):
+        """Texts of one rule set for every row of a column batch."""
+        return self.rule_sets[rule_set].apply_batch(self.signal_masks(columns, n_rows, [rule_set]), n_rows)
+
+
+def load_rules(path=RULES_PATH):
+    """Load and compile a rule table from JSON."""
+    with open(path, encoding="utf-8") as f:
+        return RuleBook.from_dict(json.load(f))
+
+
+def rule_row(player_data, risk_level, features=None):
+    """Flatten a raw player dict, its engineered features and risk level into rule inputs."""
+    row = {**player_data, **(features or {})}
+    row["genre"] = str(player_data.get("GameGenre", "game")).lower()
+    row["risk_level"] = risk_level
+    return row
+
+
+def rule_columns(df, risk_levels, inputs):
+    """
+    Column arrays for batch evaluation: raw columns of df, engineered
+    features computed when not present, lower-cased genre and risk level.
+    Numeric columns are widened to int64/float64; missing columns count as 0.
+    """
+    columns = {"risk_level": np.asarray(risk_levels)}
+    for name in inputs:
+        if name in columns:
+            continue
+        if name == "genre":
+            genre = df["GameGenre"].astype(str) if "GameGenre" in df else pd.Series("game", index=df.index)
+            columns[name] = genre.str.lower().to_numpy()
+        elif name in df:
+            columns[name] = wide_values(df[name])
+        elif name in FEATURE_PLAN.names:
+            columns[name] = np.asarray(FEATURE_PLAN.evaluate(name, feature_inputs(df, name)))
+        else:
+            columns[name] = np.zeros(len(df))
+    return columns
+
+
+RULES = load_rules()
@@ -0,0 +1,100 @@
+"""
+Persisted score store for incremental offline rescoring.
+
+Holds the latest score of every player keyed by PlayerID, together with a
+hash of the input row it was computed from and the model version that
+produced it. A rescoring run only needs to score players whose row hash
+or model version differs from what is stored.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from backend.ml.preprocess import CATEGORICAL_COLS
+
+# Max bound parameters per lookup query (SQLite's default limit is 999)
+_LOOKUP_BATCH = 900
+
+
+def row_hashes(df):
+    """
+    64-bit hash of each row's values (as int64). Numerics are hashed at
+    float32 precision (the ingestion schema's) and categoricals as strings,
+    so CSV and Parquet exports of the same data hash identically even when
+    a text round trip perturbs the last bits of a float.
+    """
+    normalized = pd.DataFrame(
+        {
+            col: (
+                df[col].astype(str) if col in CATEGORICAL_COLS
+                else pd.to_numeric(df[col], errors="coerce").astype(np.float32)
+            )
+            for col in df.columns
+        },
+        index=df.index,
+    )
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy().view(np.int64)
+
+
+class ScoreStore:
+    """SQLite table of the latest score per player."""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS player_scores ("
+            " player_id TEXT PRIMARY KEY, row_hash INTEGER NOT NULL,"
+            " churned INTEGER NOT NULL, churn_probability REAL NOT NULL, risk_level TEXT NOT NULL,"
+            " model_version TEXT, scored_at TEXT NOT NULL)"
+        )
+
+    def lookup(self, player_ids):
+        """Stored scores for the given players, indexed by player_id (unknown players are absent)."""
+        player_ids = [str(player_id) for player_id in player_ids]
+        frames = []
+        for i in range(0, len(player_ids), _LOOKUP_BATCH):
+            batch = player_ids[i : i + _LOOKUP_BATCH]
+            frames.append(pd.read_sql_query(
+                "SELECT player_id, row_hash, churn_probability, risk_level, model_version"
+                f" FROM player_scores WHERE player_id IN ({','.join('?' * len(batch))})",
+                self._conn,
+                params=batch,
+            ))
+        columns = ["player_id", "row_hash", "churn_probability", "risk_level", "model_version"]
+        found = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        return found.astype({"row_hash": "Int64"}).set_index("player_id")
+
+    def upsert(self, player_ids, hashes, churned, probabilities, levels, model_version):
+        """Insert or replace the scores of the given players in one transaction."""
+        scored_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = [
+            (str(player_id), int(row_hash), int(c), float(p), str(level), model_version, scored_at)
+            for player_id, row_hash, c, p, level in zip(player_ids, hashes, churned, probabilities, levels)
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO player_scores"
+                " (player_id, row_hash, churned, churn_probability, risk_level, model_version, scored_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM player_scores").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
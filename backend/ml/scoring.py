@@ -0,0 +1,92 @@
+"""
+Compiled scoring kernel for Player Churn Prediction.
+Folds the saved encoders, feature engineering, scaler and logistic
+coefficients into dict lookups and a single dot product, so one-player
+inference does not pay for DataFrame construction.
+"""
+
+import math
+
+import numpy as np
+
+from backend.ml.feature_engineering import engineer_features_row
+from backend.ml.preprocess import CATEGORICAL_COLS, UnknownCategoryError, build_category_maps
+
+
+def _sigmoid(z):
+    """Numerically stable logistic function on a plain float."""
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class ScoringKernel:
+    """
+    Single-row scorer for a fitted binary linear model.
+
+    The StandardScaler is folded into the coefficients:
+        w' = coef / scale
+        b' = intercept - sum(coef * mean / scale)
+    so the decision function is b' + sum(w' * x) on raw feature values.
+    """
+
+    def __init__(self, feature_names, weights, bias, category_maps, classes):
+        self.feature_names = list(feature_names)
+        self.weights = [float(w) for w in weights]
+        self.bias = float(bias)
+        self.category_maps = {col: dict(mapping) for col, mapping in category_maps.items()}
+        self.classes = [int(c) for c in classes]
+        self._terms = list(zip(self.feature_names, self.weights))
+
+    @classmethod
+    def from_artifacts(cls, model, scaler, label_encoders, feature_names, category_maps=None):
+        """Build a kernel from the artifacts saved by the training pipeline."""
+        coef = getattr(model, "coef_", None)
+        if coef is None or coef.shape[0] != 1:
+            raise TypeError(f"{type(model).__name__} is not a binary linear model")
+        if category_maps is None:
+            category_maps = build_category_maps(label_encoders)
+        return cls.from_arrays(
+            feature_names, coef[0], model.intercept_[0],
+            getattr(scaler, "mean_", None), getattr(scaler, "scale_", None),
+            category_maps, model.classes_,
+        )
+
+    @classmethod
+    def from_arrays(cls, feature_names, coef, intercept, mean, scale, category_maps, classes):
+        """Fold raw coefficient and scaler arrays into a kernel."""
+        coef = np.asarray(coef, dtype=np.float64)
+        mean = np.zeros_like(coef) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones_like(coef) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        weights = coef / scale
+        bias = float(intercept) - float(np.dot(coef, mean / scale))
+        return cls(feature_names, weights, bias, category_maps, classes)
+
+    def encode(self, player_data):
+        """Return a copy of player_data with categorical values replaced by codes."""
+        row = dict(player_data)
+        for col in CATEGORICAL_COLS:
+            if col not in row:
+                continue
+            mapping = self.category_maps[col]
+            value = row[col]
+            try:
+                row[col] = mapping[value]
+            except (KeyError, TypeError):
+                raise UnknownCategoryError(col, value, mapping) from None
+        return row
+
+    def decision_function(self, player_data):
+        """Linear score (log-odds of churn) for one raw player dict."""
+        row = engineer_features_row(self.encode(player_data))
+        z = self.bias
+        for name, weight in self._terms:
+            z += weight * row[name]
+        return z
+
+    def score(self, player_data):
+        """Return (predicted class, churn probability) for one raw player dict."""
+        z = self.decision_function(player_data)
+        return self.classes[int(z > 0)], _sigmoid(z)
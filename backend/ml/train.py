@@ -10,13 +10,22 @@ from sklearn.metrics import (
     roc_auc_score,
 )
 import joblib
+import contextlib
 import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 from backend.ml.preprocess import (
     load_data, create_target, encode_categoricals,
-    split_data, scale_features, MODELS_DIR
+    split_data, scale_features, save_label_encoders, MODELS_DIR
 )
 from backend.ml.feature_engineering import run_feature_engineering
+from backend.ml.bundle import build_bundle, save_bundle
 
 
 def train_model(X_train, y_train):
@@ -90,40 +99,97 @@ def save_feature_weights(model, feature_names):
     print(f"Feature weights saved to {weights_path}")
 
 
-def run_training_pipeline():
-    """Run the full training pipeline."""
+TRAINING_STAGES = ["load", "encode", "feature_engineering", "fit", "evaluate", "save"]
+
+ARTIFACT_LOCK_FILE = ".training.lock"
+_artifact_thread_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def artifact_write_lock(models_dir=MODELS_DIR):
+    """
+    Serialize artifact writes so concurrent training runs never interleave
+    files: a thread lock within this process plus an exclusive lock on
+    models_dir/ARTIFACT_LOCK_FILE shared with other processes (API workers,
+    CLI runs). Blocks until both are held.
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    with _artifact_thread_lock, open(os.path.join(models_dir, ARTIFACT_LOCK_FILE), "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def run_training_pipeline(on_stage=None):
+    """
+    Run the full training pipeline.
+
+    Args:
+        on_stage: optional callback invoked with each TRAINING_STAGES name
+            just before that stage starts. It may raise to abort the run;
+            nothing is written to MODELS_DIR before the "save" stage.
+    """
+    def stage(name):
+        if on_stage is not None:
+            on_stage(name)
+
     print("=" * 60)
     print("PLAYER CHURN PREDICTION — TRAINING PIPELINE")
     print("=" * 60)
 
     # Preprocessing
+    stage("load")
     df = load_data()
     df = create_target(df)
-    df, _ = encode_categoricals(df, fit=True)
 
-    # Feature engineering
-    df = run_feature_engineering(df)
+    stage("encode")
+    df, label_encoders = encode_categoricals(df, fit=True, save=False)
+
+    # Feature engineering (df is owned here, so skip the defensive copy)
+    stage("feature_engineering")
+    df = run_feature_engineering(df, inplace=True)
 
     # Split & scale
+    stage("fit")
     X_train, X_test, y_train, y_test = split_data(df)
-    X_train_scaled, X_test_scaled, _ = scale_features(X_train, X_test, fit=True)
+    X_train_scaled, X_test_scaled, scaler = scale_features(X_train, X_test, fit=True, save=False)
 
     # Train
     print("\nTraining Logistic Regression model...")
     model = train_model(X_train_scaled, y_train)
 
     # Evaluate
+    stage("evaluate")
     metrics, _, _ = evaluate_model(model, X_test_scaled, y_test)
 
-    # Save
-    save_model(model)
-    save_results(metrics)
-
-    # Save feature names for prediction
+    # Save — every artifact is written here, under one lock
+    stage("save")
     feature_names = list(X_train_scaled.columns)
-    joblib.dump(feature_names, os.path.join(MODELS_DIR, "feature_names.pkl"))
-    save_feature_weights(model, feature_names)
-    print(f"Feature names saved ({len(feature_names)} features)")
+    with artifact_write_lock():
+        save_label_encoders(label_encoders)
+        joblib.dump(scaler, os.path.join(MODELS_DIR, "scaler.pkl"))
+        save_model(model)
+        save_results(metrics)
+
+        # Save feature names for prediction
+        joblib.dump(feature_names, os.path.join(MODELS_DIR, "feature_names.pkl"))
+        save_feature_weights(model, feature_names)
+        print(f"Feature names saved ({len(feature_names)} features)")
+
+        # Single consistent bundle of everything this run produced
+        bundle = build_bundle(model, scaler, label_encoders, feature_names, metrics=metrics)
+        bundle_path = save_bundle(bundle)
+        print(f"Model bundle saved to {bundle_path} (version {bundle.version})")
 
     print("\nTraining pipeline complete!")
     return model
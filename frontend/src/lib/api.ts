@@ -8,10 +8,13 @@ import type {
   FeatureImportanceResponse,
   ModelWeightsResponse,
   AgentAskResponse,
+  AgentStreamHandlers,
 } from "./types";
 
+const BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
 const API = axios.create({
-  baseURL: process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000",
+  baseURL: BASE_URL,
   headers: { "Content-Type": "application/json" },
   timeout: 30000,  // Increased timeout for LLM calls
 });
@@ -34,6 +37,61 @@ export async function askAgent(
   return res.data;
 }
 
+/**
+ * Ask the AI agent and receive its progress as Server-Sent Events.
+ * The risk score arrives with the first "predict" node event; LLM text
+ * streams through onToken; the final report arrives with onDone.
+ * Resolves when the stream ends; abort it with the optional signal.
+ */
+export async function streamAgentAnswer(
+  playerData: PlayerInput,
+  query: string,
+  handlers: AgentStreamHandlers,
+  signal?: AbortSignal
+): Promise<void> {
+  const res = await fetch(`${BASE_URL}/agent/ask/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify({ player_data: playerData, query }),
+    signal,
+  });
+  if (!res.ok || !res.body) {
+    handlers.onError?.(`Agent stream failed with status ${res.status}`);
+    return;
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  const dispatch = (frame: string) => {
+    let event = "message";
+    let data = "";
+    for (const line of frame.split("\n")) {
+      if (line.startsWith("event: ")) event = line.slice(7);
+      else if (line.startsWith("data: ")) data += line.slice(6);
+    }
+    if (!data) return;
+    const payload = JSON.parse(data);
+    if (event === "node") handlers.onNode?.(payload);
+    else if (event === "token") handlers.onToken?.(payload);
+    else if (event === "done") handlers.onDone?.(payload);
+    else if (event === "error") handlers.onError?.(payload.detail);
+  };
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary: number;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      dispatch(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+    }
+  }
+  if (buffer.trim()) dispatch(buffer);
+}
+
 /** Check if the API is alive */
 export async function checkHealth(): Promise<HealthResponse> {
   const res = await API.get<HealthResponse>("/health");
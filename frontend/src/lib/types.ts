@@ -24,10 +24,51 @@ export interface PredictionResponse {
   agent_strategies?: string[];
 }
 
+export interface AgentRoute {
+  use_llm: boolean;
+  reason: string;
+}
+
 export interface AgentAskResponse {
   agent_answer: string;
   agent_strategies: string[];
   confidence_level: string;
+  route?: AgentRoute | null;
+}
+
+/* ─── Streaming agent (Server-Sent Events) ─── */
+
+export interface AgentReport {
+  direct_answer_to_user?: string;
+  executive_summary: string;
+  engagement_analysis: string;
+  key_risk_factors: string[];
+  personalized_strategies: string[];
+  industry_best_practices: string[];
+  confidence_level: string;
+  route?: AgentRoute | null;
+}
+
+export interface AgentStreamNodeEvent {
+  node: "predict" | "analyze" | "research" | "generate_report";
+  update: Record<string, unknown>;
+}
+
+export interface AgentStreamTokenEvent {
+  node: string;
+  text: string;
+}
+
+export interface AgentStreamDoneEvent {
+  report: AgentReport;
+  cached: boolean;
+}
+
+export interface AgentStreamHandlers {
+  onNode?: (event: AgentStreamNodeEvent) => void;
+  onToken?: (event: AgentStreamTokenEvent) => void;
+  onDone?: (event: AgentStreamDoneEvent) => void;
+  onError?: (detail: string) => void;
 }
 
 export interface HealthResponse {
@@ -5,6 +5,7 @@ but exposes ready-to-use train/test splits at module level.
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -13,9 +14,13 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 # ── Paths ──────────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "data", "online_gaming_behavior_dataset.csv")
+sys.path.insert(0, BASE_DIR)
+
+from backend.ml.feature_engineering import run_feature_engineering
+from backend.ml.preprocess import load_data
 
 # ── Load & prepare ─────────────────────────────────────────────
-df = pd.read_csv(DATA_PATH)
+df = load_data(DATA_PATH)
 
 # Target variable
 df["Churned"] = (df["EngagementLevel"] == "Low").astype(int)
@@ -28,11 +33,8 @@ for col in categorical_cols:
     df[col] = le.fit_transform(df[col])
     label_encoders[col] = le
 
-# Feature engineering (same as backend/ml/feature_engineering.py)
-df["EngagementScore"] = df["SessionsPerWeek"] * df["AvgSessionDurationMinutes"]
-df["ProgressionRate"] = df["PlayerLevel"] / (df["PlayTimeHours"] + 1)
-df["IsInactive"] = (df["SessionsPerWeek"] <= 2).astype(int)
-df["SessionConsistency"] = (df["SessionsPerWeek"] > 3).astype(int)
+# Feature engineering (shared registry in backend/ml/feature_engineering.py)
+df = run_feature_engineering(df, inplace=True)
 
 # Split
 X = df.drop(columns=["PlayerID", "EngagementLevel", "Churned"])
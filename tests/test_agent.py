@@ -3,7 +3,9 @@ Tests for the internal agent workflow and the optional Ask Agent behavior
 supported by the main /predict endpoint.
 """
 
-from backend.agent.workflow import create_agent_workflow
+import asyncio
+
+from backend.agent.workflow import ChurnAgent, create_agent_workflow
 from backend.main import PredictInput, load_artifacts, predict
 
 
@@ -52,7 +54,7 @@ def test_agent_workflow_uses_fallbacks_when_llm_is_unavailable():
 
 def test_predict_without_query_keeps_agent_fields_empty():
     load_artifacts()
-    response = predict(PredictInput(**VALID_PLAYER))
+    response = asyncio.run(predict(PredictInput(**VALID_PLAYER)))
     payload = response.model_dump()
 
     assert payload["agent_query"] is None
@@ -62,12 +64,14 @@ def test_predict_without_query_keeps_agent_fields_empty():
 
 def test_predict_with_query_returns_agent_follow_up_fields():
     load_artifacts()
-    response = predict(
-        PredictInput(
-            **{
-                **VALID_PLAYER,
-                "query": "Why is this player likely to churn and what should we do next?",
-            }
+    response = asyncio.run(
+        predict(
+            PredictInput(
+                **{
+                    **VALID_PLAYER,
+                    "query": "Why is this player likely to churn and what should we do next?",
+                }
+            )
         )
     )
     payload = response.model_dump()
@@ -75,3 +79,338 @@ def test_predict_with_query_returns_agent_follow_up_fields():
     assert payload["agent_query"]
     assert isinstance(payload["agent_strategies"], list)
     assert "recommendations" in payload
+
+
+def test_agent_reuses_precomputed_prediction(monkeypatch):
+    import backend.agent.workflow as workflow_module
+
+    def fail_predict(*args, **kwargs):
+        raise AssertionError("predict_single should not be called")
+
+    monkeypatch.setattr(workflow_module, "predict_single", fail_predict)
+    agent = create_agent_workflow()
+    result = agent.invoke(
+        {
+            "player_data": VALID_PLAYER,
+            "ml_prediction": {"churn_probability": 0.81, "churned": 1, "risk_level": "HIGH"},
+        }
+    )
+
+    assert result["ml_prediction"] == {"churn_probability": 0.81, "will_churn": True, "risk_level": "HIGH"}
+    assert "EngagementScore" in result["feature_snapshot"]
+
+
+def test_fallback_heuristics_run_once_per_request(monkeypatch):
+    import backend.agent.workflow as workflow_module
+
+    calls = {"snapshot": 0, "context": 0}
+
+    def counting(name, fn):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(workflow_module, "_build_feature_snapshot", counting("snapshot", workflow_module._build_feature_snapshot))
+    monkeypatch.setattr(workflow_module, "build_player_context", counting("context", workflow_module.build_player_context))
+
+    agent = ChurnAgent(llm=None)
+    result = agent.invoke(
+        {
+            "player_data": VALID_PLAYER,
+            "user_query": "What are the biggest risk factors and how do we retain this player?",
+            "ml_prediction": {"churn_probability": 0.81, "churned": 1, "risk_level": "HIGH"},
+        }
+    )
+
+    assert calls == {"snapshot": 1, "context": 1}
+    context = result["player_context"]
+    assert result["key_risk_factors"] == context["risk_factors"]
+    assert result["personalized_strategies"] == context["strategies"]
+    assert result["industry_best_practices"] == context["best_practices"]
+
+
+def test_predict_with_query_runs_agent_once(monkeypatch):
+    import backend.main as main_module
+
+    load_artifacts()
+    calls = []
+    original_ainvoke = main_module.agent.ainvoke
+
+    async def counting_ainvoke(state):
+        calls.append(state)
+        return await original_ainvoke(state)
+
+    monkeypatch.setattr(main_module.agent, "ainvoke", counting_ainvoke)
+    response = asyncio.run(
+        predict(PredictInput(**{**VALID_PLAYER, "query": "How do we keep this player?"}))
+    )
+
+    assert len(calls) == 1
+    assert round(calls[0]["ml_prediction"]["churn_probability"], 4) == response.churn_probability
+    assert response.recommendations == response.agent_strategies
+
+
+class _SlowLLM:
+    """Async LLM stub that never answers within the agent's timeout."""
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(5)
+
+
+def test_async_agent_falls_back_when_llm_times_out():
+    agent = ChurnAgent(llm=_SlowLLM(), llm_timeout=0.01)
+
+    result = asyncio.run(agent.ainvoke({"player_data": VALID_PLAYER}))
+
+    assert "LLM analysis failed. Used fallback explanation." in result["warnings"]
+    assert "Final LLM report generation failed. Used fallback report." in result["warnings"]
+    assert result["final_report"]["personalized_strategies"]
+
+
+def test_sync_agent_falls_back_when_llm_times_out():
+    import time
+
+    class HungLLM:
+        def invoke(self, prompt):
+            time.sleep(1)
+
+    agent = ChurnAgent(llm=HungLLM(), llm_timeout=0.01)
+    started = time.perf_counter()
+
+    result = agent.invoke({"player_data": VALID_PLAYER})
+
+    assert time.perf_counter() - started < 1
+    assert "LLM analysis failed. Used fallback explanation." in result["warnings"]
+    assert "Final LLM report generation failed. Used fallback report." in result["warnings"]
+
+
+class _CohortLLM:
+    """LLM stub answering cohort prompts: drops id 1 and malforms id 2."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def _respond(self, prompt):
+        import json
+        import re
+
+        self.prompts.append(prompt)
+        ids = [int(i) for i in re.findall(r'"id":(\d+)', prompt)]
+        entries = []
+        for player_id in ids:
+            if player_id == 1:
+                continue
+            if player_id == 2:
+                entries.append({"id": player_id, "engagement_analysis": "missing summary"})
+                continue
+            entries.append({
+                "id": player_id,
+                "executive_summary": f"LLM summary {player_id}",
+                "engagement_analysis": "ok",
+                "key_risk_factors": ["a"],
+                "personalized_strategies": ["b"],
+                "confidence_level": "HIGH",
+            })
+
+        class Response:
+            content = "Here you go:\n" + json.dumps(entries)
+
+        return Response()
+
+    def invoke(self, prompt):
+        return self._respond(prompt)
+
+    async def ainvoke(self, prompt):
+        return self._respond(prompt)
+
+
+def test_cohort_reports_pack_players_and_fall_back_per_player():
+    llm = _CohortLLM()
+    agent = ChurnAgent(llm=llm)
+    players = [{**VALID_PLAYER, "SessionsPerWeek": n} for n in range(5)]
+
+    results = agent.generate_cohort_reports(players, chunk_size=3)
+
+    assert len(llm.prompts) == 2
+    assert [r["final_report"]["executive_summary"].startswith("LLM summary") for r in results] == [
+        True, False, False, True, True
+    ]
+    assert [bool(r.get("degraded")) for r in results] == [False, True, True, False, False]
+    assert results[0]["final_report"]["confidence_level"] == "high"
+
+
+def test_cohort_entry_with_string_list_field_falls_back():
+    class StringFieldLLM(_CohortLLM):
+        def _respond(self, prompt):
+            import json
+
+            response = super()._respond(prompt)
+            entries = json.loads(response.content.split("\n", 1)[1])
+            entries[0]["personalized_strategies"] = "Call them"
+            response.content = json.dumps(entries)
+            return response
+
+    players = [{**VALID_PLAYER, "SessionsPerWeek": n} for n in range(5)]
+
+    results = ChurnAgent(llm=StringFieldLLM()).generate_cohort_reports(players, chunk_size=5)
+
+    assert [bool(r.get("degraded")) for r in results] == [True, True, True, False, False]
+    assert "C" not in results[0]["final_report"]["personalized_strategies"]
+    assert results[3]["final_report"]["personalized_strategies"] == ["b"]
+
+
+def test_async_cohort_reports_match_sync():
+    players = [{**VALID_PLAYER, "SessionsPerWeek": n} for n in range(5)]
+
+    sync_results = ChurnAgent(llm=_CohortLLM()).generate_cohort_reports(players, chunk_size=2)
+    async_results = asyncio.run(
+        ChurnAgent(llm=_CohortLLM()).agenerate_cohort_reports(players, chunk_size=2, max_concurrency=2)
+    )
+
+    assert [r["final_report"] for r in async_results] == [r["final_report"] for r in sync_results]
+
+
+class _CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+
+        class Response:
+            content = "{}"
+
+        return Response()
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+def test_clear_low_risk_without_query_skips_llm():
+    llm = _CountingLLM()
+    agent = ChurnAgent(llm=llm)
+    low = {"churn_probability": 0.12, "churned": 0, "risk_level": "LOW"}
+
+    result = agent.invoke({"player_data": VALID_PLAYER, "ml_prediction": low})
+
+    assert llm.calls == 0
+    assert result["final_report"]["route"] == {"use_llm": False, "reason": "clear_low_risk"}
+    assert result["final_report"]["personalized_strategies"]
+    assert not result.get("degraded")
+
+
+def test_query_or_borderline_risk_keeps_llm():
+    from backend.agent.workflow import route_request
+
+    low = {"churn_probability": 0.12, "risk_level": "LOW"}
+    assert route_request(low, "Why?")["reason"] == "user_query"
+    assert route_request({"churn_probability": 0.35, "risk_level": "LOW"}, None)["reason"] == "borderline_low_risk"
+    assert route_request({"churn_probability": 0.8, "risk_level": "HIGH"}, None)["use_llm"] is True
+    assert route_request(low, None, llm_available=False)["reason"] == "llm_unavailable"
+
+    llm = _CountingLLM()
+    ChurnAgent(llm=llm).invoke({"player_data": VALID_PLAYER, "ml_prediction": low, "user_query": "Why?"})
+    assert llm.calls == 2
+
+
+def test_ask_agent_endpoint_always_uses_llm(monkeypatch):
+    import backend.main as main_module
+    from backend.main import AgentQueryInput, ask_agent
+
+    load_artifacts()
+    llm = _CountingLLM()
+    low = {"churn_probability": 0.12, "churned": 0, "risk_level": "LOW"}
+
+    async def low_prediction(player_data, bundle):
+        return low
+
+    monkeypatch.setattr(main_module, "agent", ChurnAgent(llm=llm))
+    monkeypatch.setattr(main_module, "report_cache", None)
+    monkeypatch.setattr(main_module, "_calibrated_prediction", low_prediction)
+    response = asyncio.run(ask_agent(AgentQueryInput(player_data=VALID_PLAYER)))
+
+    assert llm.calls == 2
+    assert response.route == {"use_llm": True, "reason": "requested"}
+
+
+def test_astream_forwards_llm_tokens_and_node_updates():
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    llm = FakeListChatModel(responses=[
+        '{"engagement_analysis": "ok", "key_risk_factors": ["a"], "confidence_level": "high"}',
+        '{"executive_summary": "streamed", "personalized_strategies": ["s"]}',
+    ])
+
+    async def collect():
+        return [event async for event in ChurnAgent(llm=llm).astream(
+            {"player_data": VALID_PLAYER, "user_query": "Why?"}
+        )]
+
+    events = asyncio.run(collect())
+
+    tokens = "".join(e["text"] for e in events if e["event"] == "token" and e["node"] == "generate_report")
+    assert '"executive_summary": "streamed"' in tokens
+    nodes = [e["node"] for e in events if e["event"] == "node"]
+    assert nodes[0] == "predict" and nodes[-1] == "generate_report"
+    assert sorted(nodes[1:3]) == ["analyze", "research"]
+    assert events[-1]["event"] == "done"
+    assert events[-1]["state"]["final_report"]["executive_summary"] == "streamed"
+
+
+class _SlowNodesAgent(ChurnAgent):
+    """Agent whose analyze and research steps each take ~0.2 s."""
+
+    def analyze_node(self, state):
+        import time
+        time.sleep(0.2)
+        return super().analyze_node(state)
+
+    def research_node(self, state):
+        import time
+        time.sleep(0.2)
+        return super().research_node(state)
+
+    async def aanalyze_node(self, state):
+        await asyncio.sleep(0.2)
+        return await super().aanalyze_node(state)
+
+    async def aresearch_node(self, state):
+        await asyncio.sleep(0.2)
+        return ChurnAgent.research_node(self, state)
+
+
+def _assert_parallel(result, elapsed):
+    timings = result["node_timings"]
+    assert set(timings) == {"predict", "analyze", "research", "generate_report"}
+    assert timings["analyze"] >= 190 and timings["research"] >= 190
+    assert elapsed < 0.35
+
+
+def test_analyze_and_research_run_concurrently():
+    import time
+
+    agent = _SlowNodesAgent()
+    for run in (lambda: agent.invoke({"player_data": VALID_PLAYER}),
+                lambda: asyncio.run(agent.ainvoke({"player_data": VALID_PLAYER}))):
+        started = time.perf_counter()
+        result = run()
+        _assert_parallel(result, time.perf_counter() - started)
+        assert "executive_summary" in result["final_report"]
+
+
+def test_sequential_fallback_runs_independent_steps_concurrently(monkeypatch):
+    import time
+
+    import backend.agent.workflow as workflow_module
+
+    monkeypatch.setattr(workflow_module, "StateGraph", None)
+    agent = _SlowNodesAgent()
+    assert isinstance(agent.app, workflow_module.SequentialWorkflow)
+
+    for run in (lambda: agent.invoke({"player_data": VALID_PLAYER}),
+                lambda: asyncio.run(agent.ainvoke({"player_data": VALID_PLAYER}))):
+        started = time.perf_counter()
+        result = run()
+        _assert_parallel(result, time.perf_counter() - started)
+        assert result["industry_best_practices"]
@@ -0,0 +1,156 @@
+"""
+Tests for the agent report cache.
+Covers key canonicalization, LRU eviction, TTL expiry, both backends and
+single-flight request coalescing.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.agent.cache import MemoryCache, SingleFlight, SQLiteCache, make_cache_key
+
+
+PLAYER = {"Age": 25, "Gender": "Male", "SessionsPerWeek": 5}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+        return MemoryCache(**kwargs)
+    return factory
+
+
+# ─── Keys ────────────────────────────────────────────────────────────────
+
+def test_key_ignores_dict_order_and_query_formatting():
+    reordered = dict(reversed(list(PLAYER.items())))
+    assert make_cache_key(PLAYER, "Why  will they CHURN?", "v1") == make_cache_key(
+        reordered, " why will they churn? ", "v1"
+    )
+
+
+def test_key_changes_with_model_and_prompt_version():
+    base = make_cache_key(PLAYER, None, "v1")
+    assert make_cache_key(PLAYER, None, "v2") != base
+    assert make_cache_key(PLAYER, None, "v1", prompt_version="other") != base
+
+
+def test_key_changes_with_prediction():
+    low = {"risk_level": "LOW", "churn_probability": 0.36664}
+    base = make_cache_key(PLAYER, None, "v1", prediction=low)
+    assert make_cache_key(PLAYER, None, "v1", prediction={**low, "churn_probability": 0.36661}) == base
+    assert make_cache_key(PLAYER, None, "v1", prediction={"risk_level": "MEDIUM", "churn_probability": 0.4166}) != base
+    assert make_cache_key(PLAYER, None, "v1") != base
+
+
+# ─── Backends ────────────────────────────────────────────────────────────
+
+def test_hit_and_miss_are_counted(make_cache):
+    cache = make_cache()
+    assert cache.get("k") is None
+    cache.set("k", {"final_report": {"confidence_level": "high"}})
+    assert cache.get("k") == {"final_report": {"confidence_level": "high"}}
+    info = cache.info()
+    assert (info["hits"], info["misses"], info["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_least_recently_used_entry_is_evicted(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.001)
+    cache.set("b", 2)
+    time.sleep(0.001)
+    cache.get("a")
+    time.sleep(0.001)
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.info()["evictions"] == 1
+
+
+def test_expired_entries_are_not_served(make_cache):
+    cache = make_cache(ttl=0.0)
+    cache.set("k", 1)
+    assert cache.get("k") is None
+    assert cache.info()["expirations"] == 1
+
+
+def test_sqlite_async_access_runs_off_the_event_loop(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    threads = []
+    get = cache.get
+    monkeypatch.setattr(cache, "get", lambda key: threads.append(threading.get_ident()) or get(key))
+
+    async def main():
+        await cache.aset("k", {"risk": "HIGH"})
+        return await cache.aget("k"), threading.get_ident()
+
+    value, loop_thread = asyncio.run(main())
+    assert value == {"risk": "HIGH"}
+    assert threads and loop_thread not in threads
+
+
+def test_sqlite_len_and_info_wait_for_the_connection_lock(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("k", {"risk": "HIGH"})
+    results = []
+
+    with cache._lock:
+        reader = threading.Thread(target=lambda: results.append((len(cache), cache.info()["entries"])))
+        reader.start()
+        reader.join(timeout=0.2)
+        assert reader.is_alive() and not results
+    reader.join(timeout=5)
+    assert results == [(1, 1)]
+
+
+def test_sqlite_cache_defaults_outside_the_source_tree(tmp_path, monkeypatch):
+    import backend.agent.cache as cache_module
+
+    monkeypatch.setenv("AGENT_CACHE_BACKEND", "sqlite")
+    monkeypatch.delenv("AGENT_CACHE_PATH", raising=False)
+    monkeypatch.setattr(cache_module, "DATA_CACHE_DIR", str(tmp_path))
+    cache = cache_module.create_report_cache()
+    assert cache.path == str(tmp_path / "agent_cache.sqlite3")
+
+
+# ─── Single flight ───────────────────────────────────────────────────────
+
+def test_concurrent_identical_calls_share_one_run():
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": 42}
+
+    async def main():
+        return await asyncio.gather(*(flights.do("same", work) for _ in range(5)), flights.do("other", work))
+
+    results = asyncio.run(main())
+
+    assert len(runs) == 2
+    assert results[:5] == [{"answer": 42}] * 5
+    assert flights.info() == {"calls": 2, "coalesced": 4, "in_flight": 0}
+
+
+def test_failure_is_shared_and_not_retained():
+    flights = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0)
+        raise RuntimeError("llm down")
+
+    async def main():
+        return await asyncio.gather(flights.do("k", boom), flights.do("k", boom), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flights.info()["in_flight"] == 0
@@ -5,7 +5,7 @@ Covers /health, /model/info, /predict with valid, invalid, and edge-case inputs.
 
 import pytest
 from fastapi.testclient import TestClient
-from backend.main import app
+from backend.main import app, get_recommendations
 
 
 @pytest.fixture(scope="module")
@@ -212,6 +212,14 @@ class TestPredictInvalid:
         res = client.post("/predict", json=payload)
         assert res.status_code == 422
 
+    def test_unknown_category_has_structured_detail(self, client):
+        payload = {**VALID_PLAYER, "Location": "Mars"}
+        detail = client.post("/predict", json=payload).json()["detail"]
+        assert detail[0]["type"] == "unknown_category"
+        assert detail[0]["loc"] == ["body", "Location"]
+        assert detail[0]["input"] == "Mars"
+        assert "Europe" in detail[0]["ctx"]["allowed"]
+
     def test_age_below_min_returns_422(self, client):
         payload = {**VALID_PLAYER, "Age": 5}
         res = client.post("/predict", json=payload)
@@ -290,3 +298,282 @@ class TestPredictBoundary:
     def test_max_achievements(self, client):
         payload = {**VALID_PLAYER, "AchievementsUnlocked": 50}
         assert client.post("/predict", json=payload).status_code == 200
+
+
+# ════════════════════════════════════════════
+#  Batch Predict Endpoint
+# ════════════════════════════════════════════
+
+class TestPredictBatch:
+    def test_batch_returns_one_result_per_row(self, client):
+        res = client.post("/predict/batch", json=[VALID_PLAYER, LOW_RISK_PLAYER, HIGH_RISK_PLAYER])
+        assert res.status_code == 200
+        data = res.json()
+        assert data["n_rows"] == 3
+        assert data["n_scored"] == 3
+        assert [item["index"] for item in data["results"]] == [0, 1, 2]
+
+    def test_batch_matches_single_predict(self, client):
+        batch = client.post("/predict/batch", json=[VALID_PLAYER, LOW_RISK_PLAYER]).json()
+        for item, player in zip(batch["results"], [VALID_PLAYER, LOW_RISK_PLAYER]):
+            single = client.post("/predict", json=player).json()
+            assert item["churn_probability"] == single["churn_probability"]
+            assert item["risk_level"] == single["risk_level"]
+            assert item["will_churn"] == single["will_churn"]
+
+    def test_invalid_rows_do_not_fail_batch(self, client):
+        payload = [VALID_PLAYER, {**VALID_PLAYER, "Age": 5}, {**VALID_PLAYER, "Gender": "Other"}]
+        data = client.post("/predict/batch", json=payload).json()
+        assert data["n_scored"] == 1
+        assert data["n_failed"] == 2
+        assert [err["index"] for err in data["errors"]] == [1, 2]
+
+    def test_unknown_category_error_matches_predict_shape(self, client):
+        player = {**VALID_PLAYER, "Gender": "Other"}
+        (row_error,) = client.post("/predict/batch", json=[player]).json()["errors"][0]["errors"]
+        (single_error,) = client.post("/predict", json=player).json()["detail"]
+        assert row_error["type"] == single_error["type"] == "unknown_category"
+        assert row_error["loc"] == ["Gender"]
+        assert {k: v for k, v in row_error.items() if k != "loc"} == {
+            k: v for k, v in single_error.items() if k != "loc"
+        }
+
+    def test_ndjson_body(self, client):
+        import json
+        body = "\n".join(json.dumps(p) for p in [VALID_PLAYER, HIGH_RISK_PLAYER])
+        res = client.post(
+            "/predict/batch", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert res.status_code == 200
+        assert res.json()["n_scored"] == 2
+
+    def test_malformed_ndjson_line_fails_only_that_row(self, client):
+        import json
+        lines = [json.dumps(VALID_PLAYER), '{"Age": 25, oops', json.dumps(HIGH_RISK_PLAYER)]
+        res = client.post(
+            "/predict/batch", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert res.status_code == 200
+        data = res.json()
+        assert [item["index"] for item in data["results"]] == [0, 2]
+        assert data["n_failed"] == 1
+        (error,) = data["errors"]
+        assert error["index"] == 1
+        assert error["errors"][0]["type"] == "json_invalid"
+
+    def test_non_array_body_returns_422(self, client):
+        res = client.post("/predict/batch", json={"Age": 25})
+        assert res.status_code == 422
+
+    def test_recommendations_are_opt_in(self, client):
+        plain = client.post("/predict/batch", json=[HIGH_RISK_PLAYER]).json()
+        assert "recommendations" not in plain["results"][0]
+
+        players = [VALID_PLAYER, LOW_RISK_PLAYER, HIGH_RISK_PLAYER]
+        batch = client.post("/predict/batch?recommendations=true", json=players).json()
+        for item, player in zip(batch["results"], players):
+            assert item["recommendations"] == get_recommendations(item["risk_level"], player)
+
+
+# ════════════════════════════════════════════
+#  Hot Model Reload
+# ════════════════════════════════════════════
+
+class TestModelReload:
+    def test_reload_swaps_in_current_bundle(self, client):
+        before = client.get("/model/info").json()["model_version"]
+        res = client.post("/model/reload")
+        assert res.status_code == 200
+        assert res.json()["model_version"] == before
+        assert client.post("/predict", json=VALID_PLAYER).status_code == 200
+
+    def test_failed_reload_keeps_live_model(self, client, monkeypatch):
+        import backend.ml.predict as predict_module
+
+        def broken_load(*args, **kwargs):
+            raise ValueError("corrupt bundle")
+
+        before = client.get("/model/info").json()["model_version"]
+        monkeypatch.setattr(predict_module, "load_bundle", broken_load)
+        res = client.post("/model/reload")
+        assert res.status_code == 409
+        assert client.get("/model/info").json()["model_version"] == before
+        assert client.post("/predict", json=VALID_PLAYER).status_code == 200
+
+
+# ════════════════════════════════════════════
+#  Background Training Jobs
+# ════════════════════════════════════════════
+
+class TestTrainingJobs:
+    def test_train_returns_202_and_job_is_pollable(self, client, monkeypatch):
+        import backend.main as main_module
+        from backend.ml.jobs import TrainingJobManager
+
+        manager = TrainingJobManager(run_pipeline=lambda on_stage: on_stage("load"))
+        monkeypatch.setattr(main_module, "training_jobs", manager)
+        res = client.post("/train")
+        assert res.status_code == 202
+        job_id = res.json()["job_id"]
+        assert res.json()["status_url"] == f"/train/{job_id}"
+        manager._executor.submit(lambda: None).result(timeout=5)
+        status = client.get(f"/train/{job_id}").json()
+        assert status["status"] == "succeeded"
+        assert "load" in status["stage_timings"]
+
+    def test_unknown_job_returns_404(self, client):
+        assert client.get("/train/missing").status_code == 404
+        assert client.post("/train/missing/cancel").status_code == 404
+
+
+# ════════════════════════════════════════════
+#  Agent Report Cache
+# ════════════════════════════════════════════
+
+class TestAgentCache:
+    def test_repeated_agent_question_is_served_from_cache(self, client):
+        body = {"player_data": VALID_PLAYER, "query": "Cache check: what should we do?"}
+        before = client.get("/metrics").json()["agent_cache"]
+        first = client.post("/agent/ask", json=body)
+        second = client.post("/agent/ask", json={**body, "query": "  cache CHECK: what should we do?"})
+        after = client.get("/metrics").json()["agent_cache"]
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert after["hits"] == before["hits"] + 1
+        assert after["misses"] == before["misses"] + 1
+
+    def test_agent_ask_and_predict_share_the_calibrated_prediction(self, client):
+        # Paying player whose raw score is MEDIUM but calibrates to LOW
+        player = {
+            "Age": 21, "Gender": "Male", "Location": "Europe", "GameGenre": "Sports",
+            "PlayTimeHours": 19.78, "InGamePurchases": 1, "GameDifficulty": "Medium",
+            "SessionsPerWeek": 3, "AvgSessionDurationMinutes": 107, "PlayerLevel": 97,
+            "AchievementsUnlocked": 21,
+        }
+        query = "Calibration check: why is this player at risk?"
+        asked = client.post("/agent/ask", json={"player_data": player, "query": query}).json()
+        predicted = client.post("/predict", json={**player, "query": query}).json()
+
+        percent = f"{predicted['churn_probability'] * 100:.1f}%"
+        assert percent in asked["agent_answer"]
+        assert percent in predicted["agent_answer"]
+        assert predicted["risk_level"].lower() in predicted["agent_answer"].lower()
+
+
+# ════════════════════════════════════════════
+#  Cohort Reports
+# ════════════════════════════════════════════
+
+class TestCohortReport:
+    def test_cohort_report_returns_one_report_per_player(self, client):
+        players = [{**VALID_PLAYER, "SessionsPerWeek": n} for n in (1, 5, 12)]
+        res = client.post("/agent/cohort-report", json={"players": players})
+        assert res.status_code == 200
+        payload = res.json()
+        assert payload["n_players"] == 3
+        assert [item["index"] for item in payload["reports"]] == [0, 1, 2]
+        assert all("executive_summary" in item["report"] for item in payload["reports"])
+
+    def test_unknown_category_reports_player_index(self, client):
+        players = [VALID_PLAYER, {**VALID_PLAYER, "Gender": "Other"}]
+        res = client.post("/agent/cohort-report", json={"players": players})
+        assert res.status_code == 422
+        assert res.json()["detail"][0]["loc"] == ["body", "players", 1, "Gender"]
+
+    def test_every_unscorable_player_is_listed(self, client):
+        players = [{**VALID_PLAYER, "Gender": "Other"}, VALID_PLAYER, {**VALID_PLAYER, "Location": "Mars"}]
+        res = client.post("/agent/cohort-report", json={"players": players})
+        assert res.status_code == 422
+        assert [d["loc"] for d in res.json()["detail"]] == [
+            ["body", "players", 0, "Gender"],
+            ["body", "players", 2, "Location"],
+        ]
+
+    def test_routed_players_are_counted_apart_from_fallbacks(self, client, monkeypatch):
+        import backend.main as main_module
+        from backend.agent.workflow import ChurnAgent
+
+        class BrokenLLM:
+            async def ainvoke(self, prompt):
+                raise RuntimeError("LLM down")
+
+        monkeypatch.setattr(main_module, "agent", ChurnAgent(llm=BrokenLLM()))
+        res = client.post("/agent/cohort-report", json={"players": [LOW_RISK_PLAYER, HIGH_RISK_PLAYER]})
+        assert res.status_code == 200
+        payload = res.json()
+        assert [(item["routed"], item["fallback"]) for item in payload["reports"]] == [(True, False), (False, True)]
+        assert (payload["n_routed"], payload["n_fallback"]) == (1, 1)
+
+
+# ════════════════════════════════════════════
+#  Streaming Agent Answers
+# ════════════════════════════════════════════
+
+def _parse_sse(text):
+    import json
+
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestAgentStream:
+    def test_post_stream_emits_nodes_then_done(self, client):
+        body = {"player_data": {**VALID_PLAYER, "Age": 33}, "query": "Stream check"}
+        with client.stream("POST", "/agent/ask/stream", json=body) as res:
+            assert res.status_code == 200
+            assert res.headers["content-type"].startswith("text/event-stream")
+            events = _parse_sse(res.read().decode())
+
+        nodes = [data["node"] for kind, data in events if kind == "node"]
+        assert nodes[0] == "predict" and nodes[-1] == "generate_report"
+        assert sorted(nodes[1:3]) == ["analyze", "research"]
+        assert events[0][1]["update"]["ml_prediction"]["risk_level"] in ("LOW", "MEDIUM", "HIGH")
+        kind, data = events[-1]
+        assert kind == "done"
+        assert "executive_summary" in data["report"]
+
+    def test_get_stream_accepts_json_player_param(self, client):
+        import json
+
+        res = client.get(
+            "/agent/ask/stream",
+            params={"player_data": json.dumps({**VALID_PLAYER, "Age": 34}), "query": "Stream check"},
+        )
+        assert res.status_code == 200
+        assert _parse_sse(res.text)[-1][0] == "done"
+
+    def test_get_stream_rejects_invalid_json(self, client):
+        res = client.get("/agent/ask/stream", params={"player_data": "{not json"})
+        assert res.status_code == 422
+
+
+# ════════════════════════════════════════════
+#  Cohort Summary
+# ════════════════════════════════════════════
+
+class TestCohortSummary:
+    def test_filtered_share_of_high_risk(self, client):
+        res = client.post("/cohorts/summary", json={"filters": {"GameGenre": ["RPG"], "Location": ["Europe"]}})
+        assert res.status_code == 200
+        data = res.json()
+        assert 0 < data["n_players"] < data["n_total"]
+        (group,) = data["groups"]
+        assert sum(group["risk_levels"].values()) == data["n_players"]
+        assert 0.0 <= group["risk_share"]["HIGH"] <= 1.0
+
+    def test_group_by_and_ranges(self, client):
+        payload = {"group_by": ["GameGenre"], "ranges": {"PlayerLevel": {"min": 50}}, "bins": 4}
+        data = client.post("/cohorts/summary", json=payload).json()
+        assert {group["group"]["GameGenre"] for group in data["groups"]} == {
+            "Action", "RPG", "Simulation", "Sports", "Strategy"
+        }
+        assert sum(group["n_players"] for group in data["groups"]) == data["n_players"]
+        assert all(len(group["probability_histogram"]) == 4 for group in data["groups"])
+
+    def test_unknown_column_returns_422(self, client):
+        res = client.post("/cohorts/summary", json={"group_by": ["Age"]})
+        assert res.status_code == 422
@@ -0,0 +1,70 @@
+"""
+Tests for the single-file model bundle.
+Covers save/load round trips, memory mapping and integrity checks.
+"""
+
+import joblib
+import numpy as np
+import pytest
+
+from backend.ml.bundle import (
+    BUNDLE_FILE,
+    BundleIntegrityError,
+    build_bundle,
+    load_bundle,
+    save_bundle,
+)
+from backend.ml.predict import load_model
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    model, scaler, label_encoders, feature_names = load_model()
+    return build_bundle(model, scaler, label_encoders, feature_names, metrics={"Accuracy": 0.9})
+
+
+def test_round_trip_preserves_manifest(bundle, tmp_path):
+    save_bundle(bundle, models_dir=str(tmp_path))
+    loaded = load_bundle(models_dir=str(tmp_path))
+    assert loaded.content_hash == bundle.content_hash
+    assert loaded.feature_names == bundle.feature_names
+    assert loaded.manifest["metrics"] == {"Accuracy": 0.9}
+
+
+def test_arrays_are_memory_mapped(bundle, tmp_path):
+    save_bundle(bundle, models_dir=str(tmp_path))
+    loaded = load_bundle(models_dir=str(tmp_path))
+    assert isinstance(loaded.arrays["coef"], np.memmap)
+    np.testing.assert_array_equal(loaded.arrays["coef"], bundle.arrays["coef"])
+
+
+def test_kernel_from_bundle_matches_model(bundle, tmp_path):
+    save_bundle(bundle, models_dir=str(tmp_path))
+    loaded = load_bundle(models_dir=str(tmp_path))
+    player = {
+        "Age": 25, "Gender": "Male", "Location": "USA", "GameGenre": "Action",
+        "PlayTimeHours": 10.5, "InGamePurchases": 1, "GameDifficulty": "Medium",
+        "SessionsPerWeek": 5, "AvgSessionDurationMinutes": 90,
+        "PlayerLevel": 30, "AchievementsUnlocked": 15,
+    }
+    assert loaded.kernel.score(player) == pytest.approx(bundle.kernel.score(player), abs=1e-12)
+
+
+def test_tampered_bundle_is_rejected(bundle, tmp_path):
+    path = save_bundle(bundle, models_dir=str(tmp_path))
+    payload = joblib.load(path)
+    payload["arrays"]["coef"] = payload["arrays"]["coef"] * 2
+    joblib.dump(payload, path)
+    with pytest.raises(BundleIntegrityError):
+        load_bundle(models_dir=str(tmp_path))
+
+
+def test_legacy_artifacts_fallback(tmp_path):
+    model, scaler, label_encoders, feature_names = load_model()
+    for name, obj in [("churn_model.pkl", model), ("scaler.pkl", scaler),
+                      ("label_encoders.pkl", label_encoders), ("feature_names.pkl", feature_names)]:
+        joblib.dump(obj, tmp_path / name)
+    assert not (tmp_path / BUNDLE_FILE).exists()
+    loaded = load_bundle(models_dir=str(tmp_path))
+    assert loaded.feature_names == feature_names
+    assert loaded.kernel is not None
@@ -0,0 +1,101 @@
+"""
+Tests for the columnar cohort store.
+Checks filters, ranges and group-by aggregates against pandas.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.ml.cohorts import RISK_LEVELS, CohortStore
+from backend.ml.predict import risk_levels
+
+
+@pytest.fixture(scope="module")
+def players():
+    rng = np.random.default_rng(7)
+    n = 5000
+    df = pd.DataFrame({
+        "Age": rng.integers(15, 50, n),
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Location": rng.choice(["USA", "Europe", "Asia", "Other"], n),
+        "GameGenre": rng.choice(["Action", "RPG", "Strategy", "Sports", "Simulation"], n),
+        "PlayTimeHours": rng.uniform(0, 24, n),
+        "InGamePurchases": rng.integers(0, 2, n),
+        "GameDifficulty": rng.choice(["Easy", "Medium", "Hard"], n),
+        "SessionsPerWeek": rng.integers(0, 20, n),
+        "AvgSessionDurationMinutes": rng.integers(10, 180, n),
+        "PlayerLevel": rng.integers(1, 100, n),
+        "AchievementsUnlocked": rng.integers(0, 50, n),
+    })
+    df["churn_probability"] = rng.uniform(0, 1, n)
+    df["risk_level"] = risk_levels(df["churn_probability"])
+    return df
+
+
+@pytest.fixture(scope="module")
+def store(players):
+    return CohortStore(players, players["churn_probability"], players["risk_level"], model_version="test")
+
+
+# ─── Filters ─────────────────────────────────────────────────────────────
+
+def test_unfiltered_summary_covers_everyone(store, players):
+    summary = store.summary()
+    assert summary["n_players"] == summary["n_total"] == len(players)
+    (group,) = summary["groups"]
+    assert group["group"] == {}
+    assert sum(group["risk_levels"].values()) == len(players)
+    assert sum(group["probability_histogram"]) == len(players)
+
+
+def test_filters_and_ranges_match_pandas(store, players):
+    summary = store.summary(
+        filters={"GameGenre": ["RPG"], "Location": ["Europe", "Asia"]},
+        ranges={"PlayerLevel": (20, None), "churn_probability": (None, 0.9)},
+    )
+    expected = players[
+        (players["GameGenre"] == "RPG")
+        & players["Location"].isin(["Europe", "Asia"])
+        & (players["PlayerLevel"] >= 20)
+        & (players["churn_probability"] <= 0.9)
+    ]
+    assert summary["n_players"] == len(expected)
+    group = summary["groups"][0]
+    share = (expected["risk_level"] == "HIGH").mean()
+    assert group["risk_share"]["HIGH"] == pytest.approx(share, abs=1e-4)
+    assert group["mean_churn_probability"] == pytest.approx(expected["churn_probability"].mean(), abs=1e-4)
+
+
+def test_unknown_values_match_nobody(store):
+    summary = store.summary(filters={"GameGenre": ["Puzzle"]})
+    assert summary["n_players"] == 0
+    assert summary["groups"] == []
+
+
+def test_unknown_columns_raise(store):
+    with pytest.raises(KeyError):
+        store.summary(filters={"Age": ["25"]})
+    with pytest.raises(KeyError):
+        store.summary(ranges={"Nope": (0, 1)})
+    with pytest.raises(KeyError):
+        store.summary(group_by=["PlayerLevel"])
+
+
+# ─── Group-by ────────────────────────────────────────────────────────────
+
+def test_group_by_matches_pandas(store, players):
+    summary = store.summary(group_by=["GameGenre", "Gender"], bins=5)
+    assert summary["histogram_edges"] == [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+    grouped = players.groupby(["GameGenre", "Gender"])
+    assert len(summary["groups"]) == grouped.ngroups
+    for group in summary["groups"]:
+        rows = grouped.get_group((group["group"]["GameGenre"], group["group"]["Gender"]))
+        assert group["n_players"] == len(rows)
+        for level in RISK_LEVELS:
+            assert group["risk_levels"][level] == int((rows["risk_level"] == level).sum())
+        histogram = np.histogram(rows["churn_probability"], bins=5, range=(0, 1))[0]
+        assert group["probability_histogram"] == histogram.tolist()
+        engagement = (rows["SessionsPerWeek"] * rows["AvgSessionDurationMinutes"]).mean()
+        assert group["feature_means"]["EngagementScore"] == pytest.approx(engagement, abs=1e-3)
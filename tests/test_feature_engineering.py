@@ -12,6 +12,7 @@ from backend.ml.feature_engineering import (
     add_progression_rate,
     add_inactivity_flag,
     add_session_consistency,
+    add_purchase_frequency,
     ENGINEERED_FEATURES,
 )
 
@@ -190,3 +191,76 @@ def test_multiple_rows():
     assert len(result) == 2
     assert result["EngagementScore"].iloc[0] == 300
     assert result["EngagementScore"].iloc[1] == 15
+
+
+# ─── Fused / In-place Pipeline ───
+
+def test_fused_pipeline_matches_stepwise(inactive_player, sample_player):
+    df = pd.concat([sample_player, inactive_player], ignore_index=True)
+    stepwise = add_session_consistency(
+        add_inactivity_flag(add_purchase_frequency(add_progression_rate(add_engagement_score(df))))
+    )
+    pd.testing.assert_frame_equal(run_feature_engineering(df), stepwise)
+
+
+def test_narrow_input_dtypes_do_not_overflow(sample_player):
+    df = pd.concat([sample_player] * 2, ignore_index=True)
+    df["SessionsPerWeek"] = np.array([100, 5], dtype=np.int8)
+    df["AvgSessionDurationMinutes"] = np.array([400, 90], dtype=np.int16)
+    df["PlayTimeHours"] = np.array([3.7, 10.0], dtype=np.float32)
+    result = run_feature_engineering(df)
+    assert result["EngagementScore"].tolist() == [40000, 450]
+    assert result["ProgressionRate"].dtype == np.float64
+
+
+def test_inplace_mutates_and_returns_same_frame(sample_player):
+    result = run_feature_engineering(sample_player, inplace=True)
+    assert result is sample_player
+    for feat in ENGINEERED_FEATURES:
+        assert feat in sample_player.columns
+
+
+# ─── Feature Registry ───
+
+def test_scalar_plan_matches_vectorized(sample_player, inactive_player):
+    from backend.ml.feature_engineering import engineer_features_row
+
+    for frame in (sample_player, inactive_player):
+        batch = run_feature_engineering(frame).iloc[0]
+        row = engineer_features_row(frame.iloc[0].to_dict())
+        for feat in ENGINEERED_FEATURES:
+            assert abs(row[feat] - batch[feat]) < 1e-12
+
+
+def test_plan_orders_dependent_features():
+    from backend.ml.feature_registry import DerivedFeature, compile_feature_plan
+
+    plan = compile_feature_plan([
+        DerivedFeature("Doubled", "Base * 2"),
+        DerivedFeature("Base", "SessionsPerWeek + 1"),
+    ])
+    assert plan.names == ["Base", "Doubled"]
+    assert plan.inputs == ["SessionsPerWeek"]
+    assert plan.scalar({"SessionsPerWeek": 3}) == {"Base": 4, "Doubled": 8}
+
+
+def test_plan_rejects_unsupported_syntax():
+    from backend.ml.feature_registry import DerivedFeature
+
+    with pytest.raises(ValueError):
+        DerivedFeature("Bad", "__import__('os')")
+
+
+@pytest.mark.parametrize("name", ["Bad Name", "x=1\nimport os", "class", "columns", "2fast", ""])
+def test_plan_rejects_invalid_feature_names(name):
+    from backend.ml.feature_registry import DerivedFeature
+
+    with pytest.raises(ValueError, match="Invalid feature name"):
+        DerivedFeature(name, "SessionsPerWeek + 1")
+
+
+def test_plan_rejects_cycles():
+    from backend.ml.feature_registry import DerivedFeature, compile_feature_plan
+
+    with pytest.raises(ValueError, match="Circular"):
+        compile_feature_plan([DerivedFeature("A", "B + 1"), DerivedFeature("B", "A + 1")])
@@ -0,0 +1,136 @@
+"""
+Tests for typed dataset ingestion.
+Covers the explicit schema, the Feather snapshot cache and its invalidation.
+"""
+
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from backend.ml import ingest
+from backend.ml.ingest import SCHEMA, load_typed, read_csv_typed
+from backend.ml.preprocess import DATA_PATH
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "players.csv"
+    pd.read_csv(DATA_PATH, nrows=300).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "cache")
+
+
+def _snapshot(path, cache_dir):
+    return ingest._cache_paths(path, cache_dir)[0]
+
+
+# ─── Schema ──────────────────────────────────────────────────────────────
+
+def test_columns_follow_schema(csv_path):
+    df = read_csv_typed(csv_path)
+    for col, dtype in SCHEMA.items():
+        assert str(df[col].dtype) == dtype, col
+
+
+def test_values_match_untyped_parse(csv_path):
+    typed = read_csv_typed(csv_path)
+    raw = pd.read_csv(csv_path)
+    for col in SCHEMA:
+        if SCHEMA[col] == "category":
+            assert typed[col].astype(str).tolist() == raw[col].astype(str).tolist()
+        else:
+            assert typed[col].astype(float).to_numpy() == pytest.approx(raw[col].to_numpy(), rel=1e-6)
+
+
+def test_out_of_range_integers_are_widened(tmp_path):
+    path = tmp_path / "wide.csv"
+    pd.DataFrame({"Age": [20, 300], "PlayerLevel": [1.5, 2.0]}).to_csv(path, index=False)
+    df = read_csv_typed(str(path))
+    assert df["Age"].tolist() == [20, 300]
+    assert str(df["Age"].dtype) == "int16"
+    assert df["PlayerLevel"].tolist() == [1.5, 2.0]
+
+
+def test_narrow_columns_do_not_overflow_features_or_rules(tmp_path):
+    from backend.main import get_recommendations, get_recommendations_batch
+    from backend.ml.feature_engineering import add_engagement_score
+    from backend.ml.preprocess import load_data
+
+    path = tmp_path / "narrow.csv"
+    raw = pd.read_csv(DATA_PATH, nrows=2)
+    raw["SessionsPerWeek"] = [20, 1]
+    raw["AvgSessionDurationMinutes"] = [3000, 30]
+    raw.to_csv(path, index=False)
+    df = load_data(str(path), use_cache=False)
+    assert str(df["AvgSessionDurationMinutes"].dtype) == "int16"
+
+    scores = add_engagement_score(df)["EngagementScore"]
+    assert scores.tolist() == [60000, 30]
+    assert scores.dtype == "int64"
+
+    levels = ["HIGH", "HIGH"]
+    expected = [get_recommendations(level, row) for level, row in zip(levels, raw.to_dict("records"))]
+    assert get_recommendations_batch(levels, df) == expected
+
+
+# ─── Snapshot cache ──────────────────────────────────────────────────────
+
+def test_cache_round_trip_preserves_frame(csv_path, cache_dir):
+    pytest.importorskip("pyarrow")
+    first = load_typed(csv_path, use_cache=True, cache_dir=cache_dir)
+    assert os.path.exists(_snapshot(csv_path, cache_dir))
+    second = load_typed(csv_path, use_cache=True, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_cache_is_reused_until_csv_changes(csv_path, cache_dir, monkeypatch):
+    pytest.importorskip("pyarrow")
+    load_typed(csv_path, use_cache=True, cache_dir=cache_dir)
+
+    parses = []
+    original = ingest.read_csv_typed
+    monkeypatch.setattr(ingest, "read_csv_typed", lambda path: parses.append(path) or original(path))
+
+    load_typed(csv_path, use_cache=True, cache_dir=cache_dir)
+    assert parses == []
+
+    df = pd.read_csv(csv_path)
+    df.loc[0, "PlayerLevel"] = 77
+    df.iloc[:-1].to_csv(csv_path, index=False)
+    reloaded = load_typed(csv_path, use_cache=True, cache_dir=cache_dir)
+    assert len(parses) == 1
+    assert len(reloaded) == len(df) - 1
+    assert reloaded.loc[0, "PlayerLevel"] == 77
+
+
+def test_touched_but_unchanged_csv_reuses_cache(csv_path, cache_dir, monkeypatch):
+    pytest.importorskip("pyarrow")
+    load_typed(csv_path, use_cache=True, cache_dir=cache_dir)
+    copy = csv_path + ".bak"
+    shutil.copy(csv_path, copy)
+    os.replace(copy, csv_path)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    monkeypatch.setattr(ingest, "read_csv_typed", lambda path: pytest.fail("CSV was reparsed"))
+    assert len(load_typed(csv_path, use_cache=True, cache_dir=cache_dir)) == 300
+
+
+def test_corrupt_snapshot_is_rebuilt(csv_path, cache_dir):
+    pytest.importorskip("pyarrow")
+    load_typed(csv_path, use_cache=True, cache_dir=cache_dir)
+    with open(_snapshot(csv_path, cache_dir), "wb") as f:
+        f.write(b"not a feather file")
+    assert len(load_typed(csv_path, use_cache=True, cache_dir=cache_dir)) == 300
+    assert len(load_typed(csv_path, use_cache=True, cache_dir=cache_dir)) == 300
+
+
+def test_cache_can_be_disabled(csv_path, cache_dir):
+    load_typed(csv_path, use_cache=False, cache_dir=cache_dir)
+    assert not os.path.exists(_snapshot(csv_path, cache_dir))
@@ -0,0 +1,121 @@
+"""
+Tests for background training jobs.
+Uses a fake pipeline so no artifacts are written.
+"""
+
+import threading
+
+import pytest
+
+from backend.ml.jobs import TrainingJobConflict, TrainingJobManager
+from backend.ml.train import ARTIFACT_LOCK_FILE, TRAINING_STAGES, artifact_write_lock
+
+
+def _fake_pipeline(gate=None, fail_at=None):
+    def run(on_stage):
+        for name in TRAINING_STAGES:
+            on_stage(name)
+            if name == fail_at:
+                raise RuntimeError(f"boom in {name}")
+            if gate is not None and name == "fit":
+                gate.wait(timeout=5)
+    return run
+
+
+def _wait(manager, job):
+    manager._executor.submit(lambda: None).result(timeout=5)
+    return manager.get(job.id)
+
+
+# ─── Lifecycle ───────────────────────────────────────────────────────────
+
+def test_successful_job_records_every_stage():
+    manager = TrainingJobManager(run_pipeline=_fake_pipeline(), on_success=lambda: {"model_version": "abc"})
+    job = _wait(manager, manager.submit())
+    assert job.status == "succeeded"
+    assert job.progress == 1.0
+    assert list(job.stage_timings) == TRAINING_STAGES
+    assert job.to_dict()["result"] == {"model_version": "abc"}
+
+
+def test_failed_job_reports_error():
+    manager = TrainingJobManager(run_pipeline=_fake_pipeline(fail_at="evaluate"))
+    job = _wait(manager, manager.submit())
+    assert job.status == "failed"
+    assert job.stage == "evaluate"
+    assert "boom" in job.error
+    assert job.finished_at is not None
+
+
+def test_reload_failure_is_reported_apart_from_training_failure():
+    def broken_reload():
+        raise RuntimeError("canary rejected")
+
+    manager = TrainingJobManager(run_pipeline=_fake_pipeline(), on_success=broken_reload)
+    job = _wait(manager, manager.submit())
+    assert job.status == "reload_failed"
+    assert job.error.startswith("Trained; new artifacts are on disk but reload failed")
+    assert "canary rejected" in job.error
+    assert list(job.stage_timings) == TRAINING_STAGES
+
+
+# ─── Concurrency & cancellation ──────────────────────────────────────────
+
+def test_second_submit_conflicts_while_active():
+    gate = threading.Event()
+    manager = TrainingJobManager(run_pipeline=_fake_pipeline(gate=gate))
+    first = manager.submit()
+    with pytest.raises(TrainingJobConflict) as exc:
+        manager.submit()
+    assert exc.value.active_job.id == first.id
+    gate.set()
+    assert _wait(manager, first).status == "succeeded"
+    assert manager.submit() is not None
+
+
+def test_cancel_stops_before_save_stage():
+    gate = threading.Event()
+    manager = TrainingJobManager(run_pipeline=_fake_pipeline(gate=gate))
+    job = manager.submit()
+    assert manager.cancel(job.id)
+    gate.set()
+    job = _wait(manager, job)
+    assert job.status == "cancelled"
+    assert "save" not in job.stage_timings
+
+
+def test_cancel_is_refused_once_saving():
+    in_save = threading.Event()
+    release = threading.Event()
+
+    def run(on_stage):
+        for name in TRAINING_STAGES:
+            on_stage(name)
+            if name == "save":
+                in_save.set()
+                release.wait(timeout=5)
+
+    manager = TrainingJobManager(run_pipeline=run)
+    job = manager.submit()
+    assert in_save.wait(timeout=5)
+    assert not manager.cancel(job.id)
+    release.set()
+    assert _wait(manager, job).status == "succeeded"
+
+
+def test_cancel_unknown_or_finished_job_returns_false():
+    manager = TrainingJobManager(run_pipeline=_fake_pipeline())
+    job = _wait(manager, manager.submit())
+    assert not manager.cancel(job.id)
+    assert not manager.cancel("missing")
+
+
+def test_artifact_lock_is_visible_to_other_processes(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    with artifact_write_lock(str(tmp_path)):
+        # A separate open file description stands in for another process
+        with open(tmp_path / ARTIFACT_LOCK_FILE, "a+b") as other:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(other.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    with open(tmp_path / ARTIFACT_LOCK_FILE, "a+b") as other:
+        fcntl.flock(other.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
@@ -0,0 +1,106 @@
+"""
+Tests for the /predict micro-batching scheduler.
+Checks flush triggers, result fan-out and parity with unbatched scoring.
+"""
+
+import asyncio
+import time
+
+from backend.ml.microbatch import MicroBatcher
+
+
+VALID_PLAYER = {
+    "Age": 25,
+    "Gender": "Male",
+    "Location": "USA",
+    "GameGenre": "Action",
+    "PlayTimeHours": 10.5,
+    "InGamePurchases": 1,
+    "GameDifficulty": "Medium",
+    "SessionsPerWeek": 5,
+    "AvgSessionDurationMinutes": 90,
+    "PlayerLevel": 30,
+    "AchievementsUnlocked": 15,
+}
+
+
+def _gather(batcher, items):
+    async def main():
+        return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+    return asyncio.run(main())
+
+
+# ─── Scheduler ───────────────────────────────────────────────────────────
+
+def test_full_batch_flushes_without_waiting_for_window():
+    calls = []
+
+    def score_many(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(score_many, max_rows=4, window_ms=10_000)
+    assert _gather(batcher, [1, 2, 3, 4]) == [2, 4, 6, 8]
+    assert calls == [[1, 2, 3, 4]]
+    assert batcher.info()["full_flushes"] == 1
+
+
+def test_window_flushes_partial_batch_and_routes_errors():
+    def score_many(items):
+        return [ValueError(f"bad {item}") if item < 0 else item for item in items]
+
+    batcher = MicroBatcher(score_many, max_rows=64, window_ms=1)
+    results = _gather(batcher, [1, -1, 3])
+
+    assert results[0] == 1 and results[2] == 3
+    assert isinstance(results[1], ValueError)
+    info = batcher.info()
+    assert (info["batches"], info["timer_flushes"], info["max_batch_size"]) == (1, 1, 3)
+
+
+def test_short_result_list_fails_every_caller_instead_of_hanging():
+    batcher = MicroBatcher(lambda items: items[:1], max_rows=3, window_ms=10_000)
+    results = _gather(batcher, [1, 2, 3])
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_close_flushes_pending_and_awaits_in_flight_batches():
+    def score_many(items):
+        time.sleep(0.05)
+        return list(items)
+
+    batcher = MicroBatcher(score_many, max_rows=64, window_ms=10_000)
+
+    async def main():
+        pending = [asyncio.ensure_future(batcher.submit(item)) for item in (1, 2)]
+        await asyncio.sleep(0)
+        await batcher.close()
+        assert not batcher._tasks
+        assert all(future.done() for future in pending)
+        return [future.result() for future in pending]
+
+    assert asyncio.run(main()) == [1, 2]
+    assert batcher.info()["batches"] == 1
+
+
+# ─── /predict integration ────────────────────────────────────────────────
+
+def test_batched_predict_matches_unbatched(monkeypatch):
+    import backend.main as main_module
+    from backend.main import PredictInput, load_artifacts, predict
+
+    load_artifacts()
+    monkeypatch.setattr(main_module, "agent", None)
+    players = [PredictInput(**{**VALID_PLAYER, "SessionsPerWeek": n}) for n in range(6)]
+
+    async def run_all():
+        return await asyncio.gather(*(predict(player) for player in players))
+
+    expected = asyncio.run(run_all())
+    batcher = MicroBatcher(main_module._score_players, max_rows=64, window_ms=5)
+    monkeypatch.setattr(main_module, "prediction_batcher", batcher)
+    batched = asyncio.run(run_all())
+
+    assert [r.churn_probability for r in batched] == [r.churn_probability for r in expected]
+    assert [r.risk_level for r in batched] == [r.risk_level for r in expected]
+    assert batcher.info()["max_batch_size"] == len(players)
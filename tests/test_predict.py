@@ -0,0 +1,220 @@
+"""
+Tests for the prediction module.
+Covers vectorized batch scoring, chunked offline file scoring and
+incremental rescoring.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.ml.predict import (
+    INPUT_COLUMNS,
+    get_model_bundle,
+    validate_bundle,
+    predict_batch,
+    predict_single,
+    rescore_file,
+    score_file,
+    score_file_parallel,
+)
+from backend.ml.preprocess import load_data
+
+
+@pytest.fixture(scope="module")
+def players():
+    return load_data().head(500)
+
+
+# ─── Batch Scoring ───
+
+class TestPredictBatch:
+    def test_matches_predict_single(self, players):
+        sample = players.head(20)
+        scored = predict_batch(sample[INPUT_COLUMNS])
+        for (_, row), (_, out) in zip(sample.iterrows(), scored.iterrows()):
+            single = predict_single(row[INPUT_COLUMNS].to_dict())
+            assert round(out["churn_probability"], 4) == single["churn_probability"]
+            assert out["risk_level"] == single["risk_level"]
+            assert out["churned"] == single["churned"]
+
+    def test_unknown_category_reported_per_row(self, players):
+        sample = players.head(3)[INPUT_COLUMNS].astype({"Location": object})
+        sample.loc[sample.index[1], "Location"] = "Mars"
+        scored = predict_batch(sample)
+        assert scored["error"].notna().tolist() == [False, True, False]
+        assert "Location" in scored["error"].iloc[1]
+        assert pd.isna(scored["churn_probability"].iloc[1])
+
+    def test_missing_or_non_numeric_value_reported_per_row(self, players):
+        sample = players.head(3)[INPUT_COLUMNS].astype({"PlayTimeHours": object, "PlayerLevel": object})
+        sample.loc[sample.index[0], "PlayTimeHours"] = np.nan
+        sample.loc[sample.index[2], "PlayerLevel"] = "high"
+        scored = predict_batch(sample)
+        assert scored["error"].notna().tolist() == [True, False, True]
+        assert "PlayTimeHours" in scored["error"].iloc[0]
+        assert "PlayerLevel" in scored["error"].iloc[2]
+        assert scored["churn_probability"].notna().tolist() == [False, True, False]
+
+    def test_preserves_index(self, players):
+        sample = players.iloc[10:15][INPUT_COLUMNS]
+        assert list(predict_batch(sample).index) == list(sample.index)
+
+
+# ─── File Scoring ───
+
+class TestScoreFile:
+    def test_csv_round_trip_in_chunks(self, players, tmp_path):
+        src = tmp_path / "players.csv"
+        dst = tmp_path / "scores.csv"
+        players.to_csv(src, index=False)
+
+        stats = score_file(str(src), str(dst), chunksize=64)
+
+        out = pd.read_csv(dst)
+        assert stats["rows"] == len(players) == len(out)
+        assert out["PlayerID"].tolist() == players["PlayerID"].tolist()
+        assert out["churn_probability"].between(0, 1).all()
+
+    def test_chunking_does_not_change_scores(self, players, tmp_path):
+        src = tmp_path / "players.csv"
+        players.to_csv(src, index=False)
+        score_file(str(src), str(tmp_path / "a.csv"), chunksize=7)
+        score_file(str(src), str(tmp_path / "b.csv"), chunksize=10_000)
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "a.csv"), pd.read_csv(tmp_path / "b.csv"))
+
+    def test_parquet_output(self, players, tmp_path):
+        pytest.importorskip("pyarrow")
+        src = tmp_path / "players.parquet"
+        dst = tmp_path / "scores.parquet"
+        players.to_parquet(src, index=False)
+
+        score_file(str(src), str(dst), chunksize=100)
+
+        out = pd.read_parquet(dst)
+        assert len(out) == len(players)
+        assert set(out["risk_level"].unique()) <= {"LOW", "MEDIUM", "HIGH"}
+
+    def test_blank_numeric_cell_does_not_abort_the_run(self, players, tmp_path):
+        src = tmp_path / "players.csv"
+        dst = tmp_path / "scores.csv"
+        players.astype({"PlayTimeHours": object}).assign(
+            PlayTimeHours=lambda df: df["PlayTimeHours"].where(df.index != df.index[3], "")
+        ).to_csv(src, index=False)
+
+        stats = score_file(str(src), str(dst), chunksize=64)
+
+        out = pd.read_csv(dst)
+        assert stats["rows"] == len(players) and stats["failed"] == 1
+        assert out["error"].notna().tolist() == [i == 3 for i in range(len(players))]
+        assert "PlayTimeHours" in out.loc[3, "error"]
+
+    def test_missing_columns_raise(self, tmp_path):
+        src = tmp_path / "bad.csv"
+        pd.DataFrame({"PlayerID": [1]}).to_csv(src, index=False)
+        with pytest.raises(ValueError, match="Missing columns"):
+            score_file(str(src), str(tmp_path / "out.csv"))
+
+
+# ─── Parallel File Scoring ───
+
+def test_parallel_output_matches_sequential_order(players, tmp_path):
+    src = tmp_path / "players.csv"
+    players.to_csv(src, index=False)
+
+    score_file(str(src), str(tmp_path / "seq.csv"), chunksize=50)
+    stats = score_file_parallel(str(src), str(tmp_path / "par.csv"), workers=2, chunksize=50)
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "seq.csv"), pd.read_csv(tmp_path / "par.csv"))
+    assert stats["rows"] == len(players)
+    assert sum(w["rows"] for w in stats["workers"].values()) == len(players)
+
+
+# ─── Incremental Rescoring ───
+
+class TestRescoreFile:
+    def test_only_changed_and_new_players_are_rescored(self, players, tmp_path):
+        pytest.importorskip("pyarrow")
+        store = str(tmp_path / "scores.sqlite3")
+        day1 = tmp_path / "day1.csv"
+        players.to_csv(day1, index=False)
+        first = rescore_file(str(day1), store, str(tmp_path / "delta1.csv"), chunksize=64)
+        assert first["new"] == len(players)
+        assert first["transitions"] == len(players)
+
+        day2 = players.copy()
+        day2.loc[day2.index[:10], "SessionsPerWeek"] = 0
+        day2.loc[day2.index[:10], "PlayTimeHours"] = 0.0
+        day2 = pd.concat([day2, players.head(2).assign(PlayerID=[-1, -2])], ignore_index=True)
+        day2_path = tmp_path / "day2.parquet"
+        day2.to_parquet(day2_path, index=False)
+
+        second = rescore_file(str(day2_path), store, str(tmp_path / "delta2.csv"), chunksize=64)
+        changed = (players.head(10)["SessionsPerWeek"] != 0) | (players.head(10)["PlayTimeHours"] != 0)
+        assert second["new"] == 2
+        assert second["changed"] == int(changed.sum())
+        assert second["unchanged"] == len(players) - second["changed"]
+
+        delta = pd.read_csv(tmp_path / "delta2.csv")
+        assert len(delta) == second["transitions"]
+        assert set(delta.loc[delta["previous_risk_level"].isna(), "PlayerID"]) == {-1, -2}
+        moved = delta.dropna(subset=["previous_risk_level"])
+        assert (moved["previous_risk_level"] != moved["risk_level"]).all()
+        assert (moved["transition"] == moved["previous_risk_level"] + "->" + moved["risk_level"]).all()
+
+        expected = predict_batch(day2[INPUT_COLUMNS])
+        for _, row in delta.iterrows():
+            i = day2.index[day2["PlayerID"] == row["PlayerID"]][0]
+            assert row["risk_level"] == expected.loc[i, "risk_level"]
+
+    def test_row_hashes_match_across_csv_parquet_and_feather(self, players, tmp_path):
+        pytest.importorskip("pyarrow")
+        from backend.ml.ingest import load_typed
+        from backend.ml.score_store import row_hashes
+
+        rows = players[INPUT_COLUMNS].astype({"PlayTimeHours": np.float64})
+        rows["PlayTimeHours"] += np.random.default_rng(0).uniform(0, 1e-9, len(rows))
+        csv_path, parquet_path = tmp_path / "players.csv", tmp_path / "players.parquet"
+        rows.to_csv(csv_path, index=False)
+        rows.to_parquet(parquet_path, index=False)
+
+        from_csv = row_hashes(pd.read_csv(csv_path))
+        assert (row_hashes(pd.read_parquet(parquet_path)) == from_csv).all()
+        load_typed(str(csv_path), use_cache=True, cache_dir=str(tmp_path / "cache"))
+        feather = load_typed(str(csv_path), use_cache=True, cache_dir=str(tmp_path / "cache"))  # from snapshot
+        assert (row_hashes(feather[INPUT_COLUMNS]) == from_csv).all()
+
+    def test_unchanged_export_writes_empty_delta(self, players, tmp_path):
+        src = tmp_path / "players.csv"
+        store = str(tmp_path / "scores.sqlite3")
+        players.to_csv(src, index=False)
+        rescore_file(str(src), store, str(tmp_path / "delta1.csv"))
+        stats = rescore_file(str(src), store, str(tmp_path / "delta2.csv"))
+        assert stats["unchanged"] == len(players)
+        assert stats["transitions"] == 0
+        assert pd.read_csv(tmp_path / "delta2.csv").empty
+
+    def test_requires_player_id(self, players, tmp_path):
+        src = tmp_path / "players.csv"
+        players.drop(columns="PlayerID").to_csv(src, index=False)
+        with pytest.raises(ValueError, match="PlayerID"):
+            rescore_file(str(src), str(tmp_path / "s.sqlite3"), str(tmp_path / "delta.csv"))
+
+
+# ─── Hot Reload Validation ───
+
+def test_live_bundle_passes_canary():
+    bundle = get_model_bundle()
+    assert validate_bundle(bundle) is bundle
+
+
+def test_canary_rejects_broken_bundle():
+    from backend.ml.bundle import build_bundle
+    import copy
+
+    live = get_model_bundle()
+    model = copy.deepcopy(live.model)
+    model.coef_ = model.coef_ * np.nan
+    broken = build_bundle(model, live.scaler, live.label_encoders, live.feature_names)
+    with pytest.raises(ValueError):
+        validate_bundle(broken)
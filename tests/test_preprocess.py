@@ -11,6 +11,9 @@ from backend.ml.preprocess import (
     load_data,
     create_target,
     encode_categoricals,
+    build_category_maps,
+    encode_with_maps,
+    UnknownCategoryError,
     DATA_PATH,
 )
 
@@ -42,6 +45,12 @@ class TestLoadData:
         for col in df.columns:
             assert not df[col].isna().all(), f"Column {col} is entirely null"
 
+    def test_columns_are_typed(self):
+        df = load_data()
+        assert isinstance(df["GameGenre"].dtype, pd.CategoricalDtype)
+        assert df["PlayTimeHours"].dtype == np.float32
+        assert df["SessionsPerWeek"].dtype == np.int8
+
     def test_dataset_file_exists(self):
         assert os.path.exists(DATA_PATH), f"Dataset not found at {DATA_PATH}"
 
@@ -103,3 +112,24 @@ class TestEncodeCategoricals:
         df = load_data()
         encoded, _ = encode_categoricals(df, fit=True)
         assert len(encoded) == len(df)
+
+
+# ─── Category Lookup Tables ───
+
+class TestCategoryMaps:
+    def test_maps_match_label_encoders(self):
+        df = load_data()
+        encoded, encoders = encode_categoricals(df, fit=True)
+        mapped, errors = encode_with_maps(df, build_category_maps(encoders))
+        assert all(err is None for err in errors)
+        for col in ["Gender", "Location", "GameGenre", "GameDifficulty"]:
+            assert (mapped[col].to_numpy() == encoded[col].to_numpy()).all()
+
+    def test_unknown_value_reported_per_row(self):
+        maps = {"Gender": {"Female": 0, "Male": 1}}
+        df = pd.DataFrame({"Gender": ["Male", "Other"]})
+        _, errors = encode_with_maps(df, maps)
+        assert errors[0] is None
+        assert isinstance(errors[1], UnknownCategoryError)
+        assert errors[1].column == "Gender"
+        assert errors[1].allowed == ["Female", "Male"]
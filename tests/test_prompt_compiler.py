@@ -0,0 +1,103 @@
+"""
+Tests for the agent prompt compiler.
+Covers compact rendering, budget trimming order and per-node stats.
+"""
+
+from backend.agent.prompt_compiler import (
+    PROMPT_STATS,
+    PromptSection,
+    compile_prompt,
+    estimate_tokens,
+)
+from backend.agent.prompts import REPORT_PROMPT_TEMPLATE
+from backend.agent.workflow import ChurnAgent
+
+
+VALID_PLAYER = {
+    "Age": 25,
+    "Gender": "Male",
+    "Location": "USA",
+    "GameGenre": "Action",
+    "PlayTimeHours": 10.5,
+    "InGamePurchases": 1,
+    "GameDifficulty": "Medium",
+    "SessionsPerWeek": 5,
+    "AvgSessionDurationMinutes": 90,
+    "PlayerLevel": 30,
+    "AchievementsUnlocked": 15,
+}
+
+TEMPLATE = "Q: {query}\nData: {data}\nNotes: {notes}\nExtra: {extra}"
+
+
+def _sections():
+    return [
+        PromptSection("query", "Why?", required=True),
+        PromptSection("data", VALID_PLAYER, required=True),
+        PromptSection("notes", ["n" * 40] * 5, priority=1),
+        PromptSection("extra", {"detail": "x" * 200}, priority=2),
+    ]
+
+
+# ─── Rendering & budget ──────────────────────────────────────────────────
+
+def test_sections_are_rendered_compactly():
+    prompt = compile_prompt(TEMPLATE, _sections(), budget=0)
+    assert '"Age":25,"Gender":"Male"' in prompt.text
+    assert "\n  " not in prompt.text
+    assert prompt.tokens == estimate_tokens(prompt.text)
+    assert prompt.trimmed == []
+
+
+def test_budget_trims_lowest_priority_list_items_first():
+    full = compile_prompt(TEMPLATE, _sections(), budget=0)
+    prompt = compile_prompt(TEMPLATE, _sections(), budget=full.tokens - 20)
+    assert prompt.tokens <= full.tokens - 20
+    assert prompt.trimmed == ["notes"]
+    assert '"x' in prompt.text
+
+
+def test_required_sections_survive_an_impossible_budget():
+    prompt = compile_prompt(TEMPLATE, _sections(), budget=1)
+    assert prompt.trimmed == ["notes", "extra"]
+    assert '"PlayerLevel":30' in prompt.text
+    assert "Q: Why?" in prompt.text
+
+
+def test_report_prompt_is_smaller_than_indented_rendering():
+    import json
+
+    analysis = {"engagement_analysis": "ok", "key_risk_factors": ["a", "b"], "confidence_level": "high"}
+    indented = REPORT_PROMPT_TEMPLATE.format(
+        user_query="Why?", player_data=json.dumps(VALID_PLAYER, indent=2),
+        prediction=json.dumps({"risk_level": "LOW"}, indent=2),
+        analysis=json.dumps(analysis, indent=2), industry_best_practices=json.dumps(["p"], indent=2),
+    )
+    compact = compile_prompt(REPORT_PROMPT_TEMPLATE, [
+        PromptSection("user_query", "Why?"), PromptSection("player_data", VALID_PLAYER),
+        PromptSection("prediction", {"risk_level": "LOW"}), PromptSection("analysis", analysis),
+        PromptSection("industry_best_practices", ["p"]),
+    ], budget=0)
+    assert compact.tokens < estimate_tokens(indented)
+
+
+# ─── Per-node stats ──────────────────────────────────────────────────────
+
+class _UsageLLM:
+    def invoke(self, prompt):
+        class Response:
+            content = '{"engagement_analysis": "ok", "key_risk_factors": ["a"], "confidence_level": "low"}'
+            usage_metadata = {"input_tokens": 123, "output_tokens": 7}
+        return Response()
+
+
+def test_llm_calls_are_recorded_per_node():
+    PROMPT_STATS.reset()
+    ChurnAgent(llm=_UsageLLM()).invoke({"player_data": VALID_PLAYER})
+
+    stats = PROMPT_STATS.snapshot()
+    assert stats["analyze"]["calls"] == 1
+    assert stats["analyze"]["prompt_tokens"] == 123
+    assert stats["analyze"]["completion_tokens"] == 7
+    # The stub's report reply is not a valid report; the call still counts
+    assert stats["generate_report"]["calls"] == 1
@@ -0,0 +1,118 @@
+"""
+Tests for the data-driven rule engine.
+Checks rule semantics (groups, otherwise, limit) and that batch evaluation
+matches per-row evaluation for the shipped rule table.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.main import get_recommendations, get_recommendations_batch
+from backend.ml.rules import RULES, RuleBook, rule_columns, rule_row
+
+
+TABLE = {
+    "conditions": {
+        "very_low": "x <= 2",
+        "low": "x <= 4",
+        "flagged": "(y == 1) & (x < 10)",
+    },
+    "rule_sets": {
+        "demo": {
+            "limit": 2,
+            "rules": [
+                {"when": ["very_low"], "group": "x", "text": "very low"},
+                {"when": ["low"], "group": "x", "text": "low"},
+                {"when": ["flagged"], "text": "flagged"},
+                {"otherwise": True, "text": "fine"},
+                {"when": ["flagged"], "text": "flagged again"},
+            ],
+        },
+    },
+}
+
+
+def _book():
+    return RuleBook.from_dict(TABLE)
+
+
+# ─── Semantics ───────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("row, expected", [
+    ({"x": 1, "y": 0}, ["very low"]),
+    ({"x": 3, "y": 0}, ["low"]),
+    ({"x": 3, "y": 1}, ["low", "flagged"]),
+    ({"x": 7, "y": 0}, ["fine"]),
+    ({"x": 7, "y": 1}, ["flagged", "flagged again"]),
+])
+def test_groups_otherwise_and_limit(row, expected):
+    assert _book().evaluate("demo", row) == expected
+
+
+def test_missing_columns_count_as_zero():
+    assert _book().evaluate("demo", {}) == ["very low"]
+
+
+def test_batch_matches_single_rows():
+    book = _book()
+    rows = [{"x": x, "y": y} for x in range(12) for y in (0, 1)]
+    columns = {"x": np.array([r["x"] for r in rows]), "y": np.array([r["y"] for r in rows])}
+    assert book.evaluate_batch("demo", columns, len(rows)) == [book.evaluate("demo", r) for r in rows]
+
+
+def test_empty_batch():
+    assert _book().evaluate_batch("demo", {"x": np.array([]), "y": np.array([])}, 0) == []
+
+
+def test_rejects_unsafe_expressions():
+    with pytest.raises(ValueError):
+        RuleBook.from_dict({"conditions": {"bad": "__import__('os')"}, "rule_sets": {}})
+
+
+def test_rejects_unknown_conditions():
+    table = {"conditions": {}, "rule_sets": {"demo": {"rules": [{"when": ["nope"], "text": "t"}]}}}
+    with pytest.raises(ValueError, match="unknown conditions"):
+        RuleBook.from_dict(table)
+
+
+# ─── Shipped rule table ──────────────────────────────────────────────────
+
+def _players(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "SessionsPerWeek": rng.integers(0, 20, n),
+        "AvgSessionDurationMinutes": rng.integers(10, 180, n),
+        "PlayerLevel": rng.integers(1, 100, n),
+        "PlayTimeHours": rng.uniform(0, 24, n),
+        "AchievementsUnlocked": rng.integers(0, 50, n),
+        "InGamePurchases": rng.integers(0, 2, n),
+        "GameGenre": rng.choice(["Action", "RPG", "Strategy", "Sports", "Simulation"], n),
+    }), rng.choice(np.array(["HIGH", "MEDIUM", "LOW"], dtype=object), n)
+
+
+def test_recommendations_follow_risk_level():
+    high = get_recommendations("HIGH", {"SessionsPerWeek": 1, "InGamePurchases": 0})
+    assert high[-2:] == ["Send re-engagement push notifications", "Offer a first-purchase discount or starter pack"]
+    assert len(get_recommendations("HIGH", {"SessionsPerWeek": 5, "InGamePurchases": 1})) == 3
+    assert get_recommendations("MEDIUM", {"PlayerLevel": 10})[-1] == "Provide a guided progression quest to level 20"
+    assert get_recommendations("LOW", {})[0] == "Player is healthy — maintain current experience"
+
+
+def test_batch_recommendations_match_single():
+    df, levels = _players()
+    rows = df.to_dict("records")
+    expected = [get_recommendations(level, row) for level, row in zip(levels, rows)]
+    assert get_recommendations_batch(levels, df) == expected
+
+
+@pytest.mark.parametrize("rule_set", ["risk_factors", "best_practices", "strategies"])
+def test_context_rule_sets_match_single(rule_set):
+    from backend.agent.workflow import _build_feature_snapshot
+
+    df, levels = _players()
+    batch = RULES.evaluate_batch(rule_set, rule_columns(df, levels, RULES.inputs([rule_set])), len(df))
+    for i, row in enumerate(df.to_dict("records")):
+        expected = RULES.evaluate(rule_set, rule_row(row, levels[i], _build_feature_snapshot(row)))
+        assert batch[i] == expected
+        assert 1 <= len(expected) <= 5
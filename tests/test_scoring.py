@@ -0,0 +1,53 @@
+"""
+Tests for the compiled scoring kernel.
+The kernel must reproduce the pandas/sklearn pipeline on real players.
+"""
+
+import pytest
+
+from backend.ml.predict import INPUT_COLUMNS, _predict_with_pipeline, get_scoring_kernel
+from backend.ml.preprocess import load_data
+
+
+@pytest.fixture(scope="module")
+def kernel():
+    return get_scoring_kernel()
+
+
+@pytest.fixture(scope="module")
+def players():
+    df = load_data().sample(200, random_state=0)
+    return df[INPUT_COLUMNS].to_dict(orient="records")
+
+
+# ─── Parity with the sklearn pipeline ───
+
+def test_kernel_is_available_for_logistic_model(kernel):
+    assert kernel is not None
+
+
+def test_probabilities_match_pipeline(kernel, players):
+    for player in players:
+        expected_pred, expected_proba = _predict_with_pipeline(player)
+        pred, proba = kernel.score(player)
+        assert abs(proba - float(expected_proba)) < 1e-9
+        assert pred == int(expected_pred)
+
+
+def test_zero_playtime_is_finite(kernel, players):
+    player = {**players[0], "PlayTimeHours": 0.0, "SessionsPerWeek": 0}
+    _, proba = kernel.score(player)
+    assert 0.0 <= proba <= 1.0
+
+
+# ─── Categorical handling ───
+
+def test_unknown_category_raises(kernel, players):
+    with pytest.raises(ValueError, match="Gender"):
+        kernel.score({**players[0], "Gender": "Other"})
+
+
+def test_encode_does_not_mutate_input(kernel, players):
+    player = dict(players[0])
+    kernel.encode(player)
+    assert player == players[0]